@@ -0,0 +1,56 @@
+# core/access.py
+from .models import AppUser, PatientAccess
+
+# Request-scoped "which patients may this caller see" for the guardian-facing
+# viewsets (reports, complaints, timelines). The AppUser is resolved once per
+# request; list filters use a PatientAccess subquery (no id list in Python)
+# and point checks an EXISTS query, so grants and revocations apply to the
+# next request in every worker.
+
+
+class AccessScope:
+    def __init__(self, request):
+        user = getattr(request, "user", None)
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.is_staff = bool(self.is_authenticated and user.is_staff)
+
+        # mobile: JWT already resolved the AppUser; web: map Django user by email
+        self.app_user = getattr(request, "app_user", None)
+        if self.app_user is None and self.is_authenticated and getattr(user, "email", None):
+            self.app_user = AppUser.objects.filter(email__iexact=user.email).order_by("-id").first()
+        self._allowed = {}  # patient_id -> bool, for this request only
+
+    @property
+    def sees_everything(self):
+        return self.is_staff
+
+    def patient_ids_subquery(self):
+        return PatientAccess.objects.filter(user_id=self.app_user.id).values("patient_id")
+
+    def filter(self, qs, field="patient_id"):
+        """Restrict qs to the caller's patients (staff: unchanged, no AppUser: empty)."""
+        if self.sees_everything:
+            return qs
+        if self.app_user is None:
+            return qs.none()
+        return qs.filter(**{f"{field}__in": self.patient_ids_subquery()})
+
+    def can_access_patient(self, patient_id):
+        if self.sees_everything:
+            return True
+        if self.app_user is None:
+            return False
+        if patient_id not in self._allowed:
+            self._allowed[patient_id] = (
+                PatientAccess.objects.filter(user_id=self.app_user.id, patient_id=patient_id).exists()
+            )
+        return self._allowed[patient_id]
+
+
+def get_access_scope(request):
+    """Memoized per request, so every caller in one request shares the lookups."""
+    scope = getattr(request, "_access_scope", None)
+    if scope is None:
+        scope = AccessScope(request)
+        request._access_scope = scope
+    return scope
@@ -1,10 +1,14 @@
 from django.contrib import admin, messages
 from decimal import Decimal
 from django import forms
-from django.db.models import Sum, F
+from django.utils import timezone
 
 
 from .models import Department, PatientRecord, Ward, Bed, Doctor, Admission, AdmissionTask, Report, Booking, Complaint, Notification, CanteenOrder, CanteenOrderItem, MenuItem, OtpCode, PatientAccess, MedicalOrder, AppUser
+from .auth_appuser import invalidate_app_user
+from .availability import invalidate_doctor_slots
+from .notify_hub import hub as notify_hub
+from .occupancy import invalidate_occupancy
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
@@ -28,6 +32,18 @@ class BedAdmin(admin.ModelAdmin):
     ordering = ('ward','code')
     list_select_related = ('ward',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_occupancy()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_occupancy()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_occupancy()
+
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
     list_display = ('id', 'full_name', 'department', 'qualification', 'experience_years')
@@ -50,6 +66,18 @@ class AdmissionAdmin(admin.ModelAdmin):
     ordering = ('-admit_time',)
     list_select_related = ('patient', 'ward', 'bed')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_occupancy()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_occupancy()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_occupancy()
+
 @admin.register(AdmissionTask)
 class AdmissionTaskAdmin(admin.ModelAdmin):
     list_display = ('id', 'admission', 'title', 'status', 'due_date', 'created_at')
@@ -74,6 +102,21 @@ class BookingAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     list_select_related = ('patient', 'department', 'doctor')
 
+    def save_model(self, request, obj, form, change):
+        old_doctor_id = form.initial.get('doctor') if change else None
+        super().save_model(request, obj, form, change)
+        invalidate_doctor_slots(old_doctor_id, obj.doctor_id)
+
+    def delete_model(self, request, obj):
+        doctor_id = obj.doctor_id
+        super().delete_model(request, obj)
+        invalidate_doctor_slots(doctor_id)
+
+    def delete_queryset(self, request, queryset):
+        doctor_ids = set(queryset.values_list('doctor_id', flat=True))
+        super().delete_queryset(request, queryset)
+        invalidate_doctor_slots(*doctor_ids)
+
 #################################################################################################
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
@@ -131,6 +174,11 @@ class NotificationAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     list_select_related = ('created_by', 'target_user')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            notify_hub.publish_on_commit(obj)
+
 class CanteenOrderItemInlineForm(forms.ModelForm):
     # Staff will type rupees here
     unit_price_rupees = forms.DecimalField(
@@ -225,11 +273,8 @@ class CanteenOrderAdmin(admin.ModelAdmin):
         for obj in formset.deleted_objects:
             obj.delete()
 
-        # Recompute order total directly from DB
-        agg = CanteenOrderItem.objects.filter(order=form.instance).values_list("qty", "price_cents")
-        total = sum(q * p for q, p in agg)
-        form.instance.total_cents = total
-        form.instance.save(update_fields=["total_cents"])
+        # Recompute order total directly in the DB
+        form.instance.recompute_total()
 
 
 @admin.register(MenuItem)
@@ -268,4 +313,20 @@ class AppUserAdmin(admin.ModelAdmin):
     list_display = ("id", "username", "email", "phone", "role", "is_active", "created_at")
     list_filter = ("role", "is_active")
     search_fields = ("username", "email", "phone")
-    ordering = ("-created_at",)
\ No newline at end of file
+    ordering = ("-created_at",)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            invalidate_app_user(obj.id)
+
+    def delete_model(self, request, obj):
+        au_id = obj.id
+        super().delete_model(request, obj)
+        invalidate_app_user(au_id)
+
+    def delete_queryset(self, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        super().delete_queryset(request, queryset)
+        for au_id in ids:
+            invalidate_app_user(au_id)
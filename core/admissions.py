@@ -0,0 +1,149 @@
+# core/admissions.py
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Admission, Bed
+from .occupancy import invalidate_occupancy
+
+# Clinical events for AdmissionViewSet (admit / discharge / transfer).
+# Each one runs in a single transaction that locks the Bed row(s) it touches
+# (SELECT ... FOR UPDATE), so concurrent admissions to the same bed serialize
+# and Admission and Bed.status always change together.
+# The partial unique index from migration 0004 backs this up at the DB level;
+# plain creates / updates (save()) rely on it alone and get the same 409.
+
+ACTIVE = "active"
+DISCHARGED = "discharged"
+
+
+class BedConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"bed": "This bed is already occupied."}
+    default_code = "bed_conflict"
+
+
+class AdmissionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"detail": "This admission is not active."}
+    default_code = "admission_conflict"
+
+
+def _active(qs):
+    return qs.filter(status__iexact=ACTIVE, discharge_time__isnull=True)
+
+
+def _lock_beds(*bed_ids):
+    # always lock in id order so two transfers can't deadlock each other
+    beds = Bed.objects.select_for_update().filter(id__in=bed_ids).order_by("id")
+    return {b.id: b for b in beds}
+
+
+def _ensure_free(bed, exclude_admission_id=None):
+    if (bed.status or "").lower() == "occupied":
+        raise BedConflict()
+    others = _active(Admission.objects.filter(bed_id=bed.id))
+    if exclude_admission_id:
+        others = others.exclude(id=exclude_admission_id)
+    if others.exists():
+        raise BedConflict()
+
+
+def _set_bed_status(bed, value):
+    if bed.status != value:
+        bed.status = value
+        bed.save(update_fields=["status"])
+
+
+def admit(patient, bed, doctor=None, admit_time=None, notes=None):
+    with transaction.atomic():
+        bed = _lock_beds(bed.id)[bed.id]
+        _ensure_free(bed)
+        if _active(Admission.objects.filter(patient_id=patient.id)).exists():
+            raise AdmissionConflict({"patient": "This patient already has an active admission."})
+
+        try:
+            with transaction.atomic():
+                admission = Admission.objects.create(
+                    patient=patient,
+                    ward_id=bed.ward_id,
+                    bed=bed,
+                    doctor=doctor,
+                    admit_time=admit_time or timezone.now(),
+                    status=ACTIVE,
+                    notes=notes,
+                )
+        except IntegrityError:
+            raise BedConflict()
+        _set_bed_status(bed, "occupied")
+        transaction.on_commit(invalidate_occupancy)
+    return admission
+
+
+def discharge(admission, discharge_time=None, notes=None):
+    with transaction.atomic():
+        admission = Admission.objects.select_for_update().get(pk=admission.pk)
+        if (admission.status or "").lower() != ACTIVE or admission.discharge_time:
+            raise AdmissionConflict()
+        bed = _lock_beds(admission.bed_id)[admission.bed_id]
+
+        admission.status = DISCHARGED
+        admission.discharge_time = discharge_time or timezone.now()
+        fields = ["status", "discharge_time"]
+        if notes:
+            admission.notes = notes
+            fields.append("notes")
+        admission.save(update_fields=fields)
+
+        if not _active(Admission.objects.filter(bed_id=bed.id)).exists():
+            _set_bed_status(bed, "available")
+        transaction.on_commit(invalidate_occupancy)
+    return admission
+
+
+def transfer(admission, to_bed):
+    with transaction.atomic():
+        admission = Admission.objects.select_for_update().get(pk=admission.pk)
+        if (admission.status or "").lower() != ACTIVE or admission.discharge_time:
+            raise AdmissionConflict()
+        if admission.bed_id == to_bed.id:
+            raise AdmissionConflict({"bed": "The patient is already in this bed."})
+
+        beds = _lock_beds(admission.bed_id, to_bed.id)
+        from_bed, to_bed = beds[admission.bed_id], beds[to_bed.id]
+        _ensure_free(to_bed, exclude_admission_id=admission.id)
+
+        admission.bed = to_bed
+        admission.ward_id = to_bed.ward_id
+        try:
+            with transaction.atomic():
+                admission.save(update_fields=["bed", "ward"])
+        except IntegrityError:
+            raise BedConflict()
+
+        _set_bed_status(to_bed, "occupied")
+        if not _active(Admission.objects.filter(bed_id=from_bed.id)).exists():
+            _set_bed_status(from_bed, "available")
+        transaction.on_commit(invalidate_occupancy)
+    return admission
+
+
+def save(serializer):
+    """
+    serializer.save() for a plain AdmissionViewSet create / update. A write
+    that gives the bed a second active admission trips the 0004 index:
+    BedConflict (409) instead of a 500.
+    """
+    instance = serializer.instance
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError:
+        bed = serializer.validated_data.get("bed", getattr(instance, "bed", None))
+        others = _active(Admission.objects.filter(bed_id=getattr(bed, "id", None)))
+        if instance is not None:
+            others = others.exclude(pk=instance.pk)
+        if bed is not None and others.exists():
+            raise BedConflict()
+        raise
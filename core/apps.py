@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .dbpool import count_connect
+        from .metrics import install_query_wrapper
+
+        # per-request query counting (core.metrics)
+        connection_created.connect(install_query_wrapper, dispatch_uid='core.metrics.query_wrapper')
+        # connection / pool accounting (core.dbpool)
+        connection_created.connect(count_connect, dispatch_uid='core.dbpool.count_connect')
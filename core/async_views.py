@@ -0,0 +1,243 @@
+# core/async_views.py
+from datetime import datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.urls import resolve
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .auth_appuser import aget_app_user_from_token
+from .availability import afree_slots
+from .fastlist import FastListMixin, render_rows, values_rows
+from .models import Doctor
+from .views import AdmissionViewSet, BedViewSet, NotificationViewSet, _parse_slot_window
+
+# Async (ASGI) versions of the hot read endpoints: GET /api/slots/,
+# /api/admissions/, /api/notifications/, /api/beds/ and /api/app/auth/me/.
+# Same URLs and JSON as the DRF views; the database work goes through the
+# async ORM so a waiting request doesn't hold a worker thread.
+#
+# They are only routed under ASGI: AsgiRoutesMiddleware points ASGI requests
+# at settings.ASGI_URLCONF (healthvault.urls_asgi), which lists these ahead
+# of the regular urlpatterns. WSGI deployments never see them, so both can
+# run side by side. Anything these views don't handle themselves (other
+# methods, Basic auth, the browsable API / ?format=, FK filters that need a
+# lookup) is handed to the DRF view in a worker thread, unchanged.
+#
+# List views reuse the DRF viewset for permissions, get_queryset, filters,
+# serializer and pagination; only the queries themselves are awaited.
+
+_renderer = JSONRenderer()
+
+
+def json_response(data, status=200):
+    response = HttpResponse(_renderer.render(data), content_type="application/json", status=status)
+    response["Vary"] = "Accept"
+    return response
+
+
+def _error_response(exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    status = exc.status_code
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        # DRF sends 403 here too: the first authenticator (AppUserJWTAuthentication)
+        # has no WWW-Authenticate header
+        status = 403
+    return json_response(data, status)
+
+
+async def _sync_fallback(request):
+    """Serve the request with the regular (sync DRF) view for this URL."""
+    match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+    request.resolver_match = match
+    return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+
+async def authenticate(request):
+    """
+    (user, app_user) the way REST_FRAMEWORK's authenticators would see it:
+    an AppUser JWT wins (user None, like AppUserJWTAuthentication), then the
+    session user, else AnonymousUser.
+    """
+    app_user = await aget_app_user_from_token(request)
+    if app_user is not None:
+        return None, app_user
+    user = await request.auser()
+    if not getattr(user, "is_active", False):
+        user = AnonymousUser()
+    return user, None
+
+
+class AsyncReadView(View):
+    """GET handled here by read(); everything else goes to the DRF view."""
+    sync_params = ()  # query params only the DRF view handles
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # DRF views are csrf_exempt (SessionAuthentication checks CSRF itself)
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def needs_sync(self, request):
+        if request.method != "GET":
+            return True
+        auth = request.META.get("HTTP_AUTHORIZATION", "")
+        if auth and not auth.startswith("Bearer "):
+            return True
+        if "format" in request.GET or "text/html" in request.META.get("HTTP_ACCEPT", ""):
+            return True
+        return any(p in request.GET for p in self.sync_params)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.needs_sync(request):
+            return await _sync_fallback(request)
+        user, app_user = await authenticate(request)
+        try:
+            return await self.read(request, user, app_user)
+        except exceptions.APIException as exc:
+            return _error_response(exc)
+
+    async def get(self, request, *args, **kwargs):
+        # dispatch() does the work; an async handler marks the view async
+        return await self.dispatch(request, *args, **kwargs)
+
+    async def read(self, request, user, app_user):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """list() of `viewset`, with its permissions, filters, serializer and pagination."""
+    viewset = None
+
+    def _view(self, request, user, app_user):
+        drf_request = Request(request)
+        drf_request.user = user
+        drf_request.auth = None
+        if app_user is not None:
+            drf_request.app_user = app_user
+        view = self.viewset(request=drf_request, args=(), kwargs={}, action="list",
+                            detail=False, format_kwarg=None)
+        view.headers = {}
+        return view
+
+    def _check_permissions(self, view, user, app_user):
+        for permission in view.get_permissions():
+            if not permission.has_permission(view.request, view):
+                if app_user is None and not (user and user.is_authenticated):
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None),
+                                                  getattr(permission, "code", None))
+
+    async def read(self, request, user, app_user):
+        view = self._view(request, user, app_user)
+        self._check_permissions(view, user, app_user)
+
+        qs = view.filter_queryset(view.get_queryset())
+        fast = isinstance(view, FastListMixin) and view.wants_fast_list(view.request)
+        rows = values_rows(qs, view.fast_list_fields) if fast else qs
+
+        paginator = view.paginator
+        page = None
+        if paginator:
+            # ?fast=1: count the plain queryset, like FastListMixin.paginate_rows
+            page = await paginator.apaginate_queryset(rows, view.request, view, count_queryset=qs)
+        rows = page if page is not None else [row async for row in rows]
+        if fast:
+            data = render_rows(rows, view.fast_list_fields, view.fast_list_skip_null)
+        else:
+            data = view.get_serializer(rows, many=True).data
+        if page is not None:
+            data = paginator.get_paginated_response(data).data
+        return json_response(data)
+
+
+class AdmissionListView(AsyncListView):
+    viewset = AdmissionViewSet
+
+
+class BedListView(AsyncListView):
+    viewset = BedViewSet
+
+
+class NotificationListView(AsyncListView):
+    viewset = NotificationViewSet
+    sync_params = ("created_by", "target_user")  # ModelChoiceFilter looks the row up
+
+
+class SlotsView(AsyncReadView):
+    """Async core.views.SlotsView."""
+
+    async def read(self, request, user, app_user):
+        doctor_id = request.GET.get("doctor")
+        date_str = request.GET.get("date")
+        if not doctor_id or not date_str:
+            return json_response({"detail": "doctor and date are required."}, 400)
+
+        try:
+            found = await Doctor.objects.filter(id=doctor_id).aexists()
+        except ValueError:
+            found = False
+        if not found:
+            return json_response({"detail": "Doctor not found."}, 404)
+
+        try:
+            the_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return json_response({"detail": "Invalid date format. Use YYYY-MM-DD."}, 400)
+        try:
+            start_t, end_t, step = _parse_slot_window(request.GET)
+        except ValueError:
+            return json_response({"detail": "Invalid start/end/step."}, 400)
+
+        free = await afree_slots([int(doctor_id)], [the_date], start_t, end_t, step)
+        return json_response({
+            "doctor": int(doctor_id),
+            "date": the_date.strftime("%Y-%m-%d"),
+            "start": start_t.strftime("%H:%M"),
+            "end": end_t.strftime("%H:%M"),
+            "step_minutes": step,
+            "slots": free[int(doctor_id)][the_date],
+        })
+
+
+class AppUserMeView(AsyncReadView):
+    """Async core.views.AppUserMeView."""
+
+    async def read(self, request, user, app_user):
+        if not app_user:
+            return json_response({"detail": "Unauthorized"}, 401)
+        return json_response({
+            "id": app_user.id,
+            "email": app_user.email,
+            "phone": app_user.phone,
+            "username": app_user.username,
+            "role": app_user.role,
+            "is_active": app_user.is_active,
+        })
+
+
+class AsgiRoutesMiddleware:
+    """Routes ASGI requests through settings.ASGI_URLCONF; WSGI requests are untouched."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if getattr(settings, "ASYNC_READ_VIEWS", True):
+            request.urlconf = settings.ASGI_URLCONF
+        return await self.get_response(request)
@@ -1,25 +1,157 @@
 # core/auth_appuser.py
+import threading
+import time
+from collections import OrderedDict
+
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
+from django.conf import settings
 from django.utils.functional import SimpleLazyObject
 from .jwt_utils import verify_appuser_jwt
 from .models import AppUser
 
-def get_app_user_from_token(request):
+# ---------- verified-token cache ----------
+# Per-process cache: token -> (expires_at, payload, app_user field values).
+# Saves the JWT decode + AppUser lookup for every polling request from the
+# mobile app. Entries are bounded by size and TTL (never beyond the JWT exp).
+_APPUSER_FIELDS = ("id", "email", "phone", "username", "password_hash",
+                   "role", "is_active", "created_at")
+
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+_token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+
+def _cache_ttl():
+    return int(getattr(settings, "APPUSER_TOKEN_CACHE_TTL", 60))
+
+
+def _cache_max_size():
+    return int(getattr(settings, "APPUSER_TOKEN_CACHE_MAX_SIZE", 5000))
+
+
+def _snapshot_to_app_user(snapshot):
+    # fresh instance per request so views can't leak state across requests
+    return AppUser.from_db("default", list(_APPUSER_FIELDS),
+                           [snapshot[f] for f in _APPUSER_FIELDS])
+
+
+def _cache_get(token):
+    now = time.monotonic()
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            _token_cache_stats["misses"] += 1
+            return None
+        expires_at, payload, snapshot = entry
+        if expires_at <= now:
+            del _token_cache[token]
+            _token_cache_stats["misses"] += 1
+            return None
+        _token_cache.move_to_end(token)
+        _token_cache_stats["hits"] += 1
+        return payload, snapshot
+
+
+def _cache_put(token, payload, app_user):
+    ttl = _cache_ttl()
+    if ttl <= 0:
+        return
+    now = time.monotonic()
+    expires_at = now + ttl
+    # never outlive the token itself
+    exp = payload.get("exp")
+    if exp:
+        expires_at = min(expires_at, now + (int(exp) - time.time()))
+    snapshot = {f: getattr(app_user, f) for f in _APPUSER_FIELDS}
+
+    with _token_cache_lock:
+        _token_cache[token] = (expires_at, payload, snapshot)
+        _token_cache.move_to_end(token)
+        max_size = _cache_max_size()
+        while len(_token_cache) > max_size:
+            _token_cache.popitem(last=False)
+            _token_cache_stats["evictions"] += 1
+
+
+def invalidate_app_user(app_user_id):
+    """Drop every cached token belonging to this AppUser (call after edit/deactivate/delete)."""
+    if app_user_id is None:
+        return
+    app_user_id = int(app_user_id)
+    with _token_cache_lock:
+        stale = [t for t, (_, _, snap) in _token_cache.items() if snap["id"] == app_user_id]
+        for t in stale:
+            del _token_cache[t]
+        _token_cache_stats["invalidations"] += len(stale)
+
+
+def clear_token_cache():
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+def token_cache_stats():
+    with _token_cache_lock:
+        return dict(_token_cache_stats, size=len(_token_cache),
+                    max_size=_cache_max_size(), ttl=_cache_ttl())
+
+
+def _bearer_token(request):
     auth = request.META.get("HTTP_AUTHORIZATION", "")
     if not auth.startswith("Bearer "):
         return None
-    token = auth.split(" ", 1)[1].strip()
+    return auth.split(" ", 1)[1].strip()
+
+
+def _token_app_user_id(token):
     payload = verify_appuser_jwt(token)
     if not payload:
+        return None, None
+    return payload, payload.get("app_user_id")
+
+
+def get_app_user_from_token(request):
+    token = _bearer_token(request)
+    if token is None:
         return None
-    au_id = payload.get("app_user_id")
+
+    cached = _cache_get(token)
+    if cached:
+        payload, snapshot = cached
+        return _snapshot_to_app_user(snapshot)
+
+    payload, au_id = _token_app_user_id(token)
+    if not au_id:
+        return None
+    try:
+        app_user = AppUser.objects.get(id=au_id, is_active=True)
+    except AppUser.DoesNotExist:
+        return None
+    _cache_put(token, payload, app_user)
+    return app_user
+
+
+async def aget_app_user_from_token(request):
+    """Async twin of get_app_user_from_token for async views; cache hits never touch the DB."""
+    token = _bearer_token(request)
+    if token is None:
+        return None
+
+    cached = _cache_get(token)
+    if cached:
+        payload, snapshot = cached
+        return _snapshot_to_app_user(snapshot)
+
+    payload, au_id = _token_app_user_id(token)
     if not au_id:
         return None
     try:
-        return AppUser.objects.get(id=au_id, is_active=True)
+        app_user = await AppUser.objects.aget(id=au_id, is_active=True)
     except AppUser.DoesNotExist:
         return None
+    _cache_put(token, payload, app_user)
+    return app_user
 
 class AppUserJWTAuthentication(BaseAuthentication):
     """
@@ -0,0 +1,127 @@
+# core/availability.py
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Booking
+
+# Free-slot lookups for SlotsView / SlotsAvailabilityView.
+# Results are cached per (doctor, day, window) for SLOTS_CACHE_TTL seconds.
+# Every doctor has a version in the cache; replacing it (on booking
+# create / update / cancel / delete) orphans all of that doctor's entries.
+# The cache is shared by all workers (settings.CACHES), so this reaches them all.
+
+
+def _ttl():
+    return int(getattr(settings, "SLOTS_CACHE_TTL", 30))
+
+
+def _version_key(doctor_id):
+    return f"slots:ver:{doctor_id}"
+
+
+def invalidate_doctor_slots(*doctor_ids):
+    """Call after a booking for these doctors is created, changed or removed."""
+    # a fresh random version, not incr(): on the database cache incr is get + set,
+    # and two concurrent bumps could both land on the same number
+    versions = {_version_key(d): uuid4().hex for d in doctor_ids if d is not None}
+    if versions:
+        cache.set_many(versions, None)
+
+
+def slot_grid(start_t: time, end_t: time, step_minutes: int):
+    """All "HH:MM" slots from start_t to end_t (exclusive) every step_minutes."""
+    dt = datetime.combine(datetime.today().date(), start_t)
+    end_dt = datetime.combine(datetime.today().date(), end_t)
+    step = timedelta(minutes=step_minutes)
+    out = []
+    while dt < end_dt:
+        out.append(dt.strftime("%H:%M"))
+        dt += step
+    return out
+
+
+def _slot_keys(doctor_ids, dates, window, versions):
+    keys = {}
+    for d in doctor_ids:
+        ver = versions.get(_version_key(d), 1)
+        for day in dates:
+            keys[(d, day)] = f"slots:{d}:{ver}:{day:%Y%m%d}:{window}"
+    return keys
+
+
+def _split_cached(keys, cached):
+    result = defaultdict(dict)
+    missing = []
+    for (d, day), key in keys.items():
+        if key in cached:
+            result[d][day] = cached[key]
+        else:
+            missing.append((d, day))
+    return result, missing
+
+
+def _taken_query(missing):
+    return (
+        Booking.objects
+        .filter(doctor_id__in={d for d, _ in missing}, slot_date__in={day for _, day in missing})
+        .exclude(status__iexact="cancelled")
+        .values_list("doctor_id", "slot_date", "slot_time")
+    )
+
+
+def _fill_missing(result, missing, rows, grid, keys):
+    """Put free slots for the missing (doctor, day) pairs into result; returns the new cache entries."""
+    taken = defaultdict(set)
+    for d, day, t in rows:
+        taken[(d, day)].add(t.strftime("%H:%M"))
+
+    fresh = {}
+    for d, day in missing:
+        slots = [s for s in grid if s not in taken[(d, day)]]
+        result[d][day] = slots
+        fresh[keys[(d, day)]] = slots
+    return fresh
+
+
+def free_slots(doctor_ids, dates, start_t, end_t, step_minutes):
+    """
+    Returns {doctor_id: {date: ["HH:MM", ...]}} of free slots.
+    Cache misses for all doctors/days are filled with ONE booking query.
+    """
+    grid = slot_grid(start_t, end_t, step_minutes)
+    window = f"{start_t:%H%M}-{end_t:%H%M}-{step_minutes}"
+
+    versions = cache.get_many([_version_key(d) for d in doctor_ids])
+    keys = _slot_keys(doctor_ids, dates, window, versions)
+    cached = cache.get_many(list(keys.values())) if _ttl() > 0 else {}
+    result, missing = _split_cached(keys, cached)
+
+    if missing:
+        fresh = _fill_missing(result, missing, _taken_query(missing), grid, keys)
+        if _ttl() > 0:
+            cache.set_many(fresh, _ttl())
+
+    return result
+
+
+async def afree_slots(doctor_ids, dates, start_t, end_t, step_minutes):
+    """free_slots() for async views: async cache calls and async ORM iteration."""
+    grid = slot_grid(start_t, end_t, step_minutes)
+    window = f"{start_t:%H%M}-{end_t:%H%M}-{step_minutes}"
+
+    versions = await cache.aget_many([_version_key(d) for d in doctor_ids])
+    keys = _slot_keys(doctor_ids, dates, window, versions)
+    cached = await cache.aget_many(list(keys.values())) if _ttl() > 0 else {}
+    result, missing = _split_cached(keys, cached)
+
+    if missing:
+        rows = [row async for row in _taken_query(missing)]
+        fresh = _fill_missing(result, missing, rows, grid, keys)
+        if _ttl() > 0:
+            await cache.aset_many(fresh, _ttl())
+
+    return result
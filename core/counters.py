@@ -0,0 +1,59 @@
+# core/counters.py
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RateCounter
+
+# Expiring hit counters in the database (rate_counter), for limits and marks
+# that must hold across every worker and process (core.otp, the replica
+# read-your-writes pin in core.dbrouter). hit() increments first and
+# returns the new value, so concurrent requests each get their own count and
+# can't all pass a check made on a stale read. Call it outside any
+# transaction that may roll back, or the hit is undone with it.
+# Expired rows are removed by `manage.py compact_tables`.
+
+
+def hit(key, ttl):
+    """Add one to key and return the new count. A counter restarts ttl seconds after its first hit."""
+    for _ in range(3):
+        now = timezone.now()
+        with transaction.atomic():
+            if RateCounter.objects.filter(key=key, expires_at__gt=now).update(count=F("count") + 1):
+                # the UPDATE holds the row lock until commit, so this is our own count
+                return RateCounter.objects.values_list("count", flat=True).get(key=key)
+
+        expires_at = now + timedelta(seconds=ttl)
+        try:
+            with transaction.atomic():
+                RateCounter.objects.create(key=key, count=1, expires_at=expires_at)
+            return 1
+        except IntegrityError:
+            pass
+        # the row exists: restart it if it expired; if another request just
+        # created or restarted it, the next round increments it
+        if RateCounter.objects.filter(key=key, expires_at__lte=now).update(count=1, expires_at=expires_at):
+            return 1
+    raise RuntimeError(f"rate counter {key!r} kept changing")
+
+
+def touch(key, ttl):
+    """Keep key alive until ttl seconds from now (count 1 if it is new)."""
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    RateCounter.objects.update_or_create(
+        key=key, defaults={"expires_at": expires_at}, create_defaults={"count": 1, "expires_at": expires_at},
+    )
+
+
+def value(key):
+    """Current count of key (0 when missing or expired)."""
+    return (
+        RateCounter.objects.filter(key=key, expires_at__gt=timezone.now())
+        .values_list("count", flat=True).first() or 0
+    )
+
+
+def expired():
+    return RateCounter.objects.filter(expires_at__lte=timezone.now())
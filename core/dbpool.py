@@ -0,0 +1,54 @@
+# core/dbpool.py
+import threading
+from collections import Counter
+
+from django.db import connections
+
+# Connection numbers for /api/metrics/ and `manage.py bench_db_pool`.
+# With DB_POOL=psycopg (settings) Django checks connections out of a
+# psycopg_pool.ConnectionPool; its get_stats() gives pool size, idle
+# connections, requests waiting and the time spent waiting for one.
+# Either way we count `connects` (connection_created): new server
+# connections in persistent mode, pool checkouts in pool mode.
+
+_lock = threading.Lock()
+_connects = Counter()
+
+
+def count_connect(sender=None, connection=None, **kwargs):
+    """connection_created receiver."""
+    if connection is not None:
+        with _lock:
+            _connects[connection.alias] += 1
+
+
+def _pool(conn):
+    # `pool` only exists on backends that support pooling (Postgres, Oracle)
+    return getattr(conn, "pool", None)
+
+
+def connection_stats(alias="default"):
+    conn = connections[alias]
+    pool = _pool(conn)
+    with _lock:
+        connects = _connects[alias]
+    return {
+        "alias": alias,
+        "vendor": conn.vendor,
+        "mode": "pool" if pool is not None else "persistent",
+        "conn_max_age": conn.settings_dict.get("CONN_MAX_AGE"),
+        "health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS"),
+        "connects": connects,
+        # pool_min/max/size/available, requests_waiting, requests_wait_ms, ... (psycopg_pool)
+        "pool": pool.get_stats() if pool is not None else None,
+    }
+
+
+def prometheus_gauges(alias="default"):
+    stats = connection_stats(alias)
+    gauges = {"healthvault_db_connects": ("Connections handed to Django (pool checkouts when pooled).",
+                                          stats["connects"])}
+    for key, value in (stats["pool"] or {}).items():
+        if isinstance(value, (int, float)):
+            gauges[f"healthvault_db_pool_{key}"] = (f"psycopg_pool stat {key}.", value)
+    return gauges
@@ -0,0 +1,204 @@
+# core/dbrouter.py
+import hashlib
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from . import counters
+
+# Read replicas (settings.DATABASE_REPLICAS, from DATABASE_REPLICA_URLS).
+#
+# A view opts in with `replica_read_actions` (viewset actions, e.g.
+# ("list", "retrieve")) or `replica_reads = True` (APIView GET). For a safe
+# request to such a view, ReplicaRoutingMiddleware picks a healthy replica
+# and ReplicaRouter sends that request's reads of core models to it.
+# Everything else reads and writes `default`:
+#   - the first write in a request sends its remaining reads to the primary;
+#   - a client that wrote (same bearer token or session cookie) reads from
+#     the primary for REPLICA_STICKY_SECONDS afterwards (read-your-writes;
+#     the pin is a core.counters row on the primary, so every worker and
+#     process sees it);
+#   - a replica that fails its check (connect + lag under
+#     REPLICA_MAX_LAG_SECONDS) is skipped for REPLICA_CHECK_INTERVAL seconds,
+#     and with none left requests fall back to the primary;
+#   - authorization data and counters (PRIMARY_ONLY_MODELS) always come from
+#     the primary, so grants, revocations and limits apply at once.
+
+PRIMARY_ONLY_MODELS = {"appuser", "patientaccess", "ratecounter"}
+
+_state = ContextVar("replica_routing_state", default=None)
+_health = {}  # alias -> (checked_at monotonic, ok)
+_health_lock = threading.Lock()
+
+
+class _RoutingState:
+    def __init__(self, pin_key):
+        self.pin_key = pin_key
+        self.replica = None
+        self.wrote = False
+
+
+def replica_aliases():
+    return [a for a in getattr(settings, "DATABASE_REPLICAS", ()) if a in settings.DATABASES]
+
+
+def _setting(name, default):
+    return float(getattr(settings, name, default))
+
+
+# ---- replica health --------------------------------------------------------------
+_LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _check(alias):
+    conn = connections[alias]
+    try:
+        with conn.cursor() as cur:
+            if conn.vendor == "postgresql":
+                cur.execute(_LAG_SQL)
+                lag = float(cur.fetchone()[0] or 0)
+            else:
+                cur.execute("SELECT 1")
+                lag = 0.0
+    except DatabaseError:
+        conn.close()
+        return False
+    return lag <= _setting("REPLICA_MAX_LAG_SECONDS", 10)
+
+
+def replica_healthy(alias):
+    now = time.monotonic()
+    with _health_lock:
+        checked = _health.get(alias)
+    if checked is not None and now - checked[0] < _setting("REPLICA_CHECK_INTERVAL", 5):
+        return checked[1]
+    ok = _check(alias)
+    with _health_lock:
+        _health[alias] = (now, ok)
+    return ok
+
+
+def pick_replica():
+    """A healthy replica alias, or None (read from the primary)."""
+    aliases = replica_aliases()
+    random.shuffle(aliases)
+    for alias in aliases:
+        if replica_healthy(alias):
+            return alias
+    return None
+
+
+# ---- read-your-writes ------------------------------------------------------------
+def _pin_key(request):
+    auth = request.META.get("HTTP_AUTHORIZATION", "")
+    if auth.startswith("Bearer "):
+        raw = "t:" + auth[7:].strip()
+    else:
+        session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not session:
+            return None
+        raw = "s:" + session
+    return "replica:pin:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _replica_eligible(request, view_func):
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        return False
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is None:
+        return False
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return actions.get(request.method.lower()) in getattr(cls, "replica_read_actions", ())
+    # core.async_views list views stand in for a viewset's list action
+    viewset = getattr(cls, "viewset", None)
+    if viewset is not None:
+        return "list" in getattr(viewset, "replica_read_actions", ())
+    return bool(getattr(cls, "replica_reads", False))
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        state = _RoutingState(_pin_key(request))
+        return state, _state.set(state)
+
+    def _finish(self, state):
+        if not (state.wrote and state.pin_key and replica_aliases()):
+            return
+        try:
+            counters.touch(state.pin_key, _setting("REPLICA_STICKY_SECONDS", 5))
+        except DatabaseError:
+            pass  # the write itself succeeded; at worst the client may read a stale replica
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+            self._finish(state)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _state.reset(token)
+            await sync_to_async(self._finish)(state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or not replica_aliases() or not _replica_eligible(request, view_func):
+            return None
+        if state.pin_key and counters.value(state.pin_key):
+            return None  # wrote recently: read it back from the primary
+        state.replica = pick_replica()
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return DEFAULT_DB_ALIAS if replica_aliases() else None
+        meta = model._meta
+        if meta.app_label != "core" or meta.model_name in PRIMARY_ONLY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label != "django_cache":  # cache fills aren't data writes
+            state.wrote = True
+        # explicit: rows read from a replica must still be saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        dbs = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get schema changes through replication
+        return False if db in replica_aliases() else None
@@ -0,0 +1,96 @@
+# core/fastlist.py
+from datetime import datetime
+
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Opt-in fast rendering for read-heavy list endpoints: ?fast=1 fetches rows
+# with .values() (joined labels computed in SQL) and emits plain dicts in the
+# same shape as the view's serializer, skipping model instances and the
+# per-field serializer machinery. Filters, scoping and pagination are the
+# view's own. Benchmark: `manage.py bench_fast_lists`.
+
+
+def full_name(prefix="patient__", strip_parts=False, blank_as_null=False):
+    """SQL for "<first> <last>" trimmed, like the serializers' patient_name."""
+    first = Coalesce(F(f"{prefix}first_name"), Value(""))
+    last = Coalesce(F(f"{prefix}last_name"), Value(""))
+    if strip_parts:
+        first, last = Trim(first), Trim(last)
+    expr = Trim(Concat(first, Value(" "), last, output_field=CharField()))
+    return NullIf(expr, Value("")) if blank_as_null else expr
+
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _plan(fields):
+    # output key -> ORM path (str) or expression; expressions are selected
+    # under a private alias so they can't clash with model field names
+    paths, exprs, plan = [], {}, []
+    for key, src in fields.items():
+        if isinstance(src, str):
+            paths.append(src)
+            plan.append((key, src))
+        else:
+            alias = f"_fast_{key}"
+            exprs[alias] = src
+            plan.append((key, alias))
+    return paths, exprs, plan
+
+
+def values_rows(qs, fields):
+    paths, exprs, _ = _plan(fields)
+    return qs.values(*paths, **exprs)
+
+
+def render_rows(rows, fields, skip_null=()):
+    _, _, plan = _plan(fields)
+    out = []
+    for row in rows:
+        item = {}
+        for key, src in plan:
+            v = row[src]
+            if v is None and key in skip_null:
+                continue
+            if isinstance(v, datetime):
+                # same timezone handling / format as serializers.DateTimeField
+                v = _datetime_field.to_representation(v)
+            item[key] = v
+        out.append(item)
+    return out
+
+
+class FastListMixin:
+    """
+    Set fast_list_fields to {"json key": "orm path" | expression} in the
+    serializer's field order. Keys used by keyset_ordering must map to
+    plain paths of the same name. Keys in fast_list_skip_null are left out
+    when NULL, matching read-only `source='fk.attr'` fields on a null FK.
+    """
+    fast_list_fields = None
+    fast_list_skip_null = ()
+    fast_list_param = "fast"
+
+    def wants_fast_list(self, request):
+        return bool(self.fast_list_fields) and request.query_params.get(self.fast_list_param) in ("1", "true", "True")
+
+    def paginate_rows(self, rows, qs):
+        # the paginator's COUNT(*) runs on the plain queryset: counting the
+        # values() one wraps every join and annotation in a subquery
+        if self.paginator is None:
+            return None
+        return self.paginator.paginate_queryset(rows, self.request, view=self, count_queryset=qs)
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_fast_list(request):
+            return super().list(request, *args, **kwargs)
+
+        qs = self.filter_queryset(self.get_queryset())
+        rows = values_rows(qs, self.fast_list_fields)
+        page = self.paginate_rows(rows, qs)
+        if page is not None:
+            return self.get_paginated_response(render_rows(page, self.fast_list_fields, self.fast_list_skip_null))
+        return Response(render_rows(rows, self.fast_list_fields, self.fast_list_skip_null))
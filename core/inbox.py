@@ -0,0 +1,73 @@
+# core/inbox.py
+from django.db.models import Case, Exists, IntegerField, Q, Subquery, Value, When
+
+from .models import Admission, AppUser, Notification, PatientAccess
+
+# Notification inbox for NotificationViewSet: everything is expressed as
+# subqueries so listing (or counting) an inbox is a single SQL statement.
+
+
+def app_user_id_for(user):
+    """
+    Subquery yielding the AppUser id mapped to a Django auth user:
+    email match first, then username, newest row wins.
+    """
+    email = getattr(user, "email", None) or ""
+    username = getattr(user, "username", None) or ""
+    if not email and not username:
+        return None
+
+    qs = AppUser.objects.all()
+    if email and username:
+        qs = qs.filter(Q(email__iexact=email) | Q(username__iexact=username)).order_by(
+            Case(When(email__iexact=email, then=Value(0)), default=Value(1), output_field=IntegerField()),
+            "-id",
+        )
+    elif email:
+        qs = qs.filter(email__iexact=email).order_by("-id")
+    else:
+        qs = qs.filter(username__iexact=username).order_by("-id")
+    return Subquery(qs.values("id")[:1])
+
+
+def _has_active_admission(app_user_id):
+    # app_user_id may be an int or the subquery above
+    return Exists(
+        Admission.objects.filter(
+            status__iexact="active",
+            patient_id__in=PatientAccess.objects.filter(user_id=app_user_id).values("patient_id"),
+        )
+    )
+
+
+def inbox_queryset(request, qs=None):
+    """
+    Notifications visible to the caller:
+      - staff: everything
+      - AppUser (JWT request.app_user, else mapped from the Django user):
+        targeted at them, plus broadcasts while one of their patients is admitted
+      - anyone else: nothing
+    """
+    qs = Notification.objects.all() if qs is None else qs
+
+    app_user = getattr(request, "app_user", None)
+    if app_user is not None:
+        au_id = app_user.id
+    else:
+        user = getattr(request, "user", None)
+        if not user or not user.is_authenticated:
+            return qs.none()
+        if user.is_staff:
+            return qs
+        au_id = app_user_id_for(user)
+        if au_id is None:
+            return qs.none()
+
+    return qs.filter(
+        Q(target_user_id=au_id) |
+        Q(target_user__isnull=True) & Q(_has_active_admission(au_id))
+    )
+
+
+def unread_count(request):
+    return inbox_queryset(request).filter(read_at__isnull=True).count()
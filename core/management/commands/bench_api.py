@@ -0,0 +1,198 @@
+import json
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.jwt_utils import create_appuser_jwt
+from core.models import AppUser, Doctor, PatientRecord
+from core.synthetic import (
+    BENCH_GUARDIAN_EMAIL, BENCH_PASSWORD, BENCH_STAFF_USERNAME, HospitalSeeder,
+    ensure_schema, has_real_patients,
+)
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "api_baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the core API in-process (full middleware stack): latency "
+        "percentiles and query counts per endpoint, compared with a stored baseline. "
+        "Use a local throwaway database; --seed fills it with a synthetic hospital."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true",
+                            help="create missing tables and seed a synthetic hospital first")
+        parser.add_argument("--patients", type=int, default=20000, help="seed size (with --seed)")
+        parser.add_argument("-n", "--iterations", type=int, default=30, help="requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", action="append", help="endpoint name prefix; repeatable")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+        parser.add_argument("--threshold", type=float, default=0.25,
+                            help="allowed p95 slowdown vs baseline (0.25 = 25%%)")
+        parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                            help="ignore p95 changes smaller than this (timer noise)")
+
+    # ---- setup ----------------------------------------------------------------
+    def _seed(self, patients):
+        created = ensure_schema()
+        if created:
+            self.stdout.write(f"created tables: {', '.join(created)}")
+        if has_real_patients():
+            raise CommandError("Refusing to seed: this database has non-synthetic patients.")
+        if PatientRecord.objects.exists():
+            self.stdout.write("synthetic data already present, not seeding again")
+            return
+        self.stdout.write(f"seeding {patients} patients ...")
+        t0 = time.perf_counter()
+        counts = HospitalSeeder(patients=patients, log=self.stdout.write).run()
+        self.stdout.write(f"seeded {sum(counts.values())} rows in {time.perf_counter() - t0:.1f}s")
+
+    def _fixtures(self):
+        staff = User.objects.filter(username=BENCH_STAFF_USERNAME).first()
+        guardian = AppUser.objects.filter(email=BENCH_GUARDIAN_EMAIL).order_by("-id").first()
+        if staff is None or guardian is None:
+            raise CommandError("No benchmark users found; run with --seed first.")
+        doctors = list(Doctor.objects.values_list("id", flat=True)[:20])
+        patient_id = PatientRecord.objects.values_list("id", flat=True).first()
+        if not doctors or patient_id is None:
+            raise CommandError("No doctors/patients found; run with --seed first.")
+
+        staff_client = Client()
+        staff_client.force_login(staff)
+        jwt_headers = {"Authorization": f"Bearer {create_appuser_jwt(guardian.id)}"}
+        return staff_client, jwt_headers, doctors, patient_id
+
+    def _scenarios(self):
+        staff, jwt, doctors, patient_id = self._fixtures()
+        anon = Client()
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        payload = b"%PDF-1.4\n" + b"0" * 64 * 1024
+        state = {"doctor": 0, "report": None}
+
+        def slots():
+            state["doctor"] = (state["doctor"] + 1) % len(doctors)
+            return anon.get(f"/api/slots/?doctor={doctors[state['doctor']]}&date={tomorrow}")
+
+        def upload():
+            r = staff.post("/api/reports/upload/", {
+                "patient": patient_id, "report_type": "lab",
+                "file": SimpleUploadedFile("bench.pdf", payload, content_type="application/pdf"),
+            })
+            if r.status_code == 201:
+                state["report"] = r.json()["id"]
+            return r
+
+        def download():
+            if state["report"] is None:
+                upload()
+            return staff.get(f"/api/reports/{state['report']}/download/")
+
+        # (name, callable, expected status)
+        return [
+            ("admissions.list", lambda: staff.get("/api/admissions/?page_size=100"), 200),
+            ("admissions.list.fast", lambda: staff.get("/api/admissions/?page_size=100&fast=1"), 200),
+            ("admissions.list.keyset", lambda: staff.get("/api/admissions/?page_size=100&pagination=keyset"), 200),
+            ("complaints.list", lambda: staff.get("/api/complaints/?page_size=100"), 200),
+            ("notifications.list.jwt", lambda: staff.get("/api/notifications/", headers=jwt), 200),
+            ("slots", slots, 200),
+            ("reports.upload", upload, 201),
+            ("reports.download", download, 200),
+            ("auth.staff_login", lambda: Client().post(
+                "/api/auth/login/", {"username": BENCH_STAFF_USERNAME, "password": BENCH_PASSWORD},
+                content_type="application/json"), 200),
+            ("auth.app_login", lambda: anon.post(
+                "/api/app/auth/login-password/", {"destination": BENCH_GUARDIAN_EMAIL, "password": BENCH_PASSWORD},
+                content_type="application/json"), 200),
+            ("auth.app_me", lambda: anon.get("/api/app/auth/me/", headers=jwt), 200),
+        ]
+
+    # ---- measuring --------------------------------------------------------------
+    def _measure(self, fn, expected, iterations, warmup):
+        for _ in range(warmup):
+            fn()
+        samples, queries = [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                response = fn()
+                if hasattr(response, "streaming_content"):
+                    b"".join(response.streaming_content)
+                elapsed = (time.perf_counter() - t0) * 1000
+            if response.status_code != expected:
+                raise CommandError(f"unexpected status {response.status_code} (wanted {expected})")
+            samples.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        return {
+            "p50": round(statistics.median(samples), 3),
+            "p95": round(cuts[94], 3),
+            "p99": round(cuts[98], 3),
+            "queries": max(queries),
+        }
+
+    def _compare(self, results, baseline, threshold, min_delta):
+        problems = []
+        for name, r in results.items():
+            base = baseline.get(name)
+            if not base:
+                continue
+            limit = base["p95"] * (1 + threshold)
+            if r["p95"] > limit and r["p95"] - base["p95"] >= min_delta:
+                problems.append(f"{name}: p95 {r['p95']:.2f} ms > {limit:.2f} ms (baseline {base['p95']:.2f})")
+            if r["queries"] > base["queries"]:
+                problems.append(f"{name}: {r['queries']} queries > baseline {base['queries']}")
+        return problems
+
+    def handle(self, *args, **opts):
+        if opts["seed"]:
+            self._seed(opts["patients"])
+
+        results = {}
+        with tempfile.TemporaryDirectory() as reports_dir, \
+                override_settings(ALLOWED_HOSTS=["*"], REPORTS_DIR=reports_dir, REPORTS_SENDFILE_MODE=""):
+            for name, fn, expected in self._scenarios():
+                if opts["only"] and not any(name.startswith(p) for p in opts["only"]):
+                    continue
+                try:
+                    r = self._measure(fn, expected, opts["iterations"], opts["warmup"])
+                except CommandError as e:
+                    raise CommandError(f"{name}: {e}")
+                results[name] = r
+                self.stdout.write(
+                    f"{name:<24} p50 {r['p50']:8.2f}  p95 {r['p95']:8.2f}  p99 {r['p99']:8.2f} ms  "
+                    f"queries {r['queries']:>3}"
+                )
+
+        baseline_path = Path(opts["baseline"])
+        if opts["save_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            existing = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            existing.setdefault("endpoints", {}).update(results)
+            existing["meta"] = {"iterations": opts["iterations"], "vendor": connection.vendor,
+                                "patients": PatientRecord.objects.count()}
+            baseline_path.write_text(json.dumps(existing, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"baseline written to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write("no baseline yet (use --save-baseline)")
+            return
+        problems = self._compare(results, json.loads(baseline_path.read_text()).get("endpoints", {}),
+                                 opts["threshold"], opts["min_delta_ms"])
+        if problems:
+            for p in problems:
+                self.stderr.write(p)
+            raise CommandError(f"{len(problems)} regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS(f"no regressions against {baseline_path}"))
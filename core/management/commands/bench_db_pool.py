@@ -0,0 +1,134 @@
+import json
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import Client, override_settings
+
+from core.dbpool import connection_stats
+from core.jwt_utils import create_appuser_jwt
+from core.models import AppUser, Doctor
+from core.synthetic import BENCH_GUARDIAN_EMAIL, BENCH_STAFF_USERNAME
+
+DEFAULT_OUTPUT = Path(settings.BASE_DIR) / "benchmarks" / "db_pool.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput of the read endpoints with N concurrent threads, for comparing "
+        "connection modes: run once as is (persistent connections) and once with "
+        "DB_POOL=psycopg, against the same Postgres. Needs the synthetic data from "
+        "`generate_data` / `bench_api --seed`. Results are merged into --output by mode."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--seconds", type=float, default=20.0)
+        parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+        parser.add_argument("--no-save", action="store_true")
+
+    def _targets(self):
+        staff = User.objects.filter(username=BENCH_STAFF_USERNAME).first()
+        guardian = AppUser.objects.filter(email=BENCH_GUARDIAN_EMAIL).order_by("-id").first()
+        doctors = list(Doctor.objects.values_list("id", flat=True)[:20])
+        if staff is None or guardian is None or not doctors:
+            raise CommandError("No benchmark data found; run `manage.py generate_data` first.")
+        jwt = {"Authorization": f"Bearer {create_appuser_jwt(guardian.id)}"}
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        # (path, headers); requests without a JWT go as the staff session
+        targets = [
+            ("/api/admissions/?page_size=50", {}),
+            ("/api/beds/?page_size=100", {}),
+            ("/api/notifications/", jwt),
+            ("/api/app/auth/me/", jwt),
+        ]
+        targets += [(f"/api/slots/?doctor={d}&date={tomorrow}", {}) for d in doctors[:5]]
+        return staff, targets
+
+    def _worker(self, n, client, targets, deadline, out):
+        latencies, errors, i = [], 0, n
+        try:
+            while time.perf_counter() < deadline:
+                path, headers = targets[i % len(targets)]
+                i += 1
+                t0 = time.perf_counter()
+                try:
+                    # secure: no SECURE_SSL_REDIRECT 301 when DEBUG is off
+                    status = client.get(path, headers=headers, secure=True).status_code
+                except Exception:  # incl. PoolTimeout when no connection frees up in DB_POOL_TIMEOUT
+                    status = 500
+                # what request_finished does in a real worker (the test Client
+                # skips it): keep a persistent connection, hand a pooled one back
+                close_old_connections()
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if status != 200:
+                    errors += 1
+        finally:
+            out.append((latencies, errors))
+            connections.close_all()  # this thread's connections (or pool checkouts)
+
+    def handle(self, *args, **opts):
+        staff, targets = self._targets()
+        clients = []
+        for _ in range(opts["threads"]):  # log in up front, outside the timed run
+            client = Client()
+            client.force_login(staff)
+            clients.append(client)
+        connection.close()  # the main thread's one shouldn't count
+
+        before = connection_stats()
+        results = []
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            deadline = time.perf_counter() + opts["seconds"]
+            threads = [
+                threading.Thread(target=self._worker, args=(n, client, targets, deadline, results))
+                for n, client in enumerate(clients)
+            ]
+            t0 = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - t0
+        after = connection_stats()
+
+        latencies = [ms for lat, _ in results for ms in lat]
+        if len(latencies) < 2:
+            raise CommandError("No requests completed.")
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        pool = after["pool"] or {}
+        summary = {
+            "mode": after["mode"],
+            "vendor": after["vendor"],
+            "threads": opts["threads"],
+            "seconds": round(elapsed, 2),
+            "requests": len(latencies),
+            "errors": sum(e for _, e in results),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "connects": after["connects"] - before["connects"],
+            "pool_max": pool.get("pool_max"),
+            "pool_wait_ms": pool.get("requests_wait_ms"),
+            "pool_queued": pool.get("requests_queued"),
+            "pool_errors": pool.get("requests_errors"),
+        }
+        for key, value in summary.items():
+            if value is not None:
+                self.stdout.write(f"{key:<14} {value}")
+
+        if opts["no_save"]:
+            return
+        output = Path(opts["output"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        existing = json.loads(output.read_text()) if output.exists() else {}
+        existing[f"{summary['vendor']}:{summary['mode']}"] = summary
+        output.write_text(json.dumps(existing, indent=2, sort_keys=True) + "\n")
+        self.stdout.write(self.style.SUCCESS(f"written to {output}"))
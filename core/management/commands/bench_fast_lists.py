@@ -0,0 +1,64 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.views import AdmissionViewSet, BookingViewSet, ComplaintViewSet
+
+VIEWS = {
+    "admissions": AdmissionViewSet,
+    "complaints": ComplaintViewSet,
+    "bookings": BookingViewSet,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare serializer vs ?fast=1 rendering for the big list endpoints "
+        "against the configured database (run seed data first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="page size (max 100)")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--only", choices=sorted(VIEWS), action="append")
+
+    def _time(self, view, path, user, repeat):
+        factory = APIRequestFactory()
+        samples, body = [], None
+        for _ in range(repeat):
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            t0 = time.perf_counter()
+            response = view(request)
+            response.render()
+            samples.append((time.perf_counter() - t0) * 1000)
+            body = response.content
+        return statistics.median(samples), body
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(is_staff=True, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError("Needs an active staff user to list as.")
+
+        rows, repeat = opts["rows"], opts["repeat"]
+        for name in opts["only"] or VIEWS:
+            view = VIEWS[name].as_view({"get": "list"})
+            base = f"/api/{name}/?page_size={rows}"
+            # the pagination links are built for the request factory's "testserver"
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                slow_ms, slow_body = self._time(view, base, user, repeat)
+                fast_ms, fast_body = self._time(view, base + "&fast=1", user, repeat)
+
+            # pagination links differ by the ?fast=1 flag; compare the rows
+            same = json.loads(slow_body)["results"] == json.loads(fast_body)["results"]
+            same = "same JSON" if same else "JSON DIFFERS"
+            speedup = slow_ms / fast_ms if fast_ms else float("inf")
+            self.stdout.write(
+                f"{name:<11} serializer {slow_ms:8.2f} ms   fast {fast_ms:8.2f} ms   "
+                f"x{speedup:5.2f}   ({same}, median of {repeat})"
+            )
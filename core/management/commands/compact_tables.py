@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import counters
+from core.otp import expired_codes
+from core.retention import delete_in_batches, stale_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete rows past their retention window from tables that only grow: "
+        "expired/consumed OTP codes, old read notifications and expired rate-limit "
+        "counters. Works in short "
+        "id-ordered batches and can be stopped and resumed (e.g. from cron with "
+        "--max-batches to cap each run)."
+    )
+
+    TABLES = ("otp", "notifications", "counters")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", action="append", choices=self.TABLES, help="repeatable; default all")
+        parser.add_argument("--batch-size", type=int, default=5000, help="rows per DELETE")
+        parser.add_argument("--max-batches", type=int, default=None,
+                            help="per table; stop after this many batches and leave the rest for the next run")
+        parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+        parser.add_argument("--otp-grace-seconds", type=int, default=3600,
+                            help="keep codes this long after they expire or are used")
+        parser.add_argument("--notification-days", type=int, default=None,
+                            help="delete notifications read more than this many days ago "
+                                 "(default NOTIFICATION_RETENTION_DAYS)")
+        parser.add_argument("--dry-run", action="store_true", help="only count what would be deleted")
+
+    def handle(self, *args, **opts):
+        querysets = {
+            "otp": lambda: expired_codes(opts["otp_grace_seconds"]),
+            "notifications": lambda: stale_notifications(opts["notification_days"]),
+            "counters": counters.expired,
+        }
+        total = 0
+        for name in opts["only"] or self.TABLES:
+            qs = querysets[name]()
+            if opts["dry_run"]:
+                self.stdout.write(f"{name:<14} {qs.count():>10} rows would be deleted")
+                continue
+
+            t0 = time.perf_counter()
+            result = delete_in_batches(qs, opts["batch_size"], opts["max_batches"], opts["pause"])
+            elapsed = time.perf_counter() - t0
+            total += result.deleted
+            self.stdout.write(
+                f"{name:<14} {result.deleted:>10} rows deleted in {result.batches} batch(es), "
+                f"{elapsed:.1f}s" + ("" if result.finished else "; more left, run again")
+            )
+        if not opts["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{total} rows reclaimed"))
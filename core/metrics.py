@@ -0,0 +1,229 @@
+# core/metrics.py
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+# Per-route request metrics, kept in process memory (one set per worker).
+# QueryMetricsMiddleware times every request and puts a QueryRecorder in a
+# context variable; a DB execute wrapper installed on each connection
+# (install_query_wrapper, hooked to connection_created) reports every
+# statement to the current request's recorder. Context variables follow
+# sync_to_async, so queries from async views are counted too.
+# The same SQL run METRICS_NPLUSONE_THRESHOLD+ times in one request is
+# flagged as a likely N+1. Routes are named "<router basename>.<action>" for
+# viewsets and by URL name otherwise. Read via MetricsView /
+# PrometheusMetricsView.
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_FLAGGED_SAMPLES = 5
+
+
+def _enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def _nplusone_threshold():
+    return int(getattr(settings, "METRICS_NPLUSONE_THRESHOLD", 5))
+
+
+class QueryRecorder:
+    """Statements of one request; fed by the connection execute wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - t0) * 1000
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0            # 5xx
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)   # last one is +Inf
+        self.queries_sum = 0
+        self.queries_max = 0
+        self.db_sum_ms = 0.0
+        self.nplusone_requests = 0
+        self.nplusone_samples = []  # [(sql, times)]
+
+    def as_dict(self):
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": {
+                "avg": round(self.latency_sum_ms / n, 2),
+                "max": round(self.latency_max_ms, 2),
+                "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"], self.buckets)),
+            },
+            "queries": {"avg": round(self.queries_sum / n, 2), "max": self.queries_max},
+            "db_ms_avg": round(self.db_sum_ms / n, 2),
+            "nplusone": {
+                "requests": self.nplusone_requests,
+                "samples": [{"sql": sql, "times": times} for sql, times in self.nplusone_samples],
+            },
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, status_code, latency_ms, recorder=None):
+        with self._lock:
+            st = self._routes.get(route)
+            if st is None:
+                st = self._routes[route] = RouteStats()
+            st.requests += 1
+            if status_code >= 500:
+                st.errors += 1
+            st.latency_sum_ms += latency_ms
+            st.latency_max_ms = max(st.latency_max_ms, latency_ms)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency_ms <= bound:
+                    st.buckets[i] += 1
+                    break
+            else:
+                st.buckets[-1] += 1
+
+            if recorder is not None:
+                st.queries_sum += recorder.count
+                st.queries_max = max(st.queries_max, recorder.count)
+                st.db_sum_ms += recorder.db_ms
+                repeated = recorder.repeated(_nplusone_threshold())
+                if repeated:
+                    st.nplusone_requests += 1
+                    st.nplusone_samples = (repeated + st.nplusone_samples)[:MAX_FLAGGED_SAMPLES]
+
+    def snapshot(self):
+        with self._lock:
+            return {route: st.as_dict() for route, st in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def prometheus(self, extra_gauges=None):
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP healthvault_request_latency_ms Request latency by route.",
+                "# TYPE healthvault_request_latency_ms histogram",
+            ]
+            for route, st in routes:
+                cumulative = 0
+                for bound, n in zip(list(LATENCY_BUCKETS_MS) + ["+Inf"], st.buckets):
+                    cumulative += n
+                    lines.append(f'healthvault_request_latency_ms_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+                lines.append(f'healthvault_request_latency_ms_sum{{route="{route}"}} {st.latency_sum_ms:.3f}')
+                lines.append(f'healthvault_request_latency_ms_count{{route="{route}"}} {st.requests}')
+
+            counters = (
+                ("healthvault_request_errors_total", "Responses with status >= 500.", "errors"),
+                ("healthvault_db_queries_total", "SQL statements executed.", "queries_sum"),
+                ("healthvault_db_time_ms_total", "Time spent in SQL.", "db_sum_ms"),
+                ("healthvault_nplusone_requests_total", "Requests that repeated one statement too often.", "nplusone_requests"),
+            )
+            for name, help_text, attr in counters:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for route, st in routes:
+                    lines.append(f'{name}{{route="{route}"}} {getattr(st, attr)}')
+
+        for name, (help_text, value) in sorted((extra_gauges or {}).items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+_current_recorder = ContextVar("metrics_query_recorder", default=None)
+
+
+def _dispatch(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_wrapper(sender=None, connection=None, **kwargs):
+    """connection_created receiver; also safe to call directly."""
+    if connection is not None and _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    view = match.func
+    basename = getattr(view, "initkwargs", {}).get("basename")
+    actions = getattr(view, "actions", None)
+    if basename and actions:
+        action = actions.get(request.method.lower(), request.method.lower())
+        return f"{basename}.{action}"
+    return match.url_name or match.route or match.view_name
+
+
+class QueryMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not _enabled():
+            return self.get_response(request)
+
+        install_query_wrapper(connection=connection)  # connection opened before the signal was hooked
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        registry.record(route_name(request), response.status_code, (time.perf_counter() - t0) * 1000, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not _enabled():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        token = _current_recorder.set(recorder)
+        t0 = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        registry.record(route_name(request), response.status_code, (time.perf_counter() - t0) * 1000, recorder)
+        return response
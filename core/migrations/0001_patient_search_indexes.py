@@ -0,0 +1,50 @@
+"""
+Search indexes for patient_record (core.search.search_patients).
+
+patient_record is an unmanaged table, so this migration only runs raw SQL on
+Postgres and is a no-op elsewhere. The table must exist before it runs.
+CONCURRENTLY keeps registration usable while the indexes build.
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEXES = {
+    # prefix search: UPPER(col) LIKE UPPER('term%') from __istartswith
+    "patient_record_mrn_upper_prefix": "(UPPER(mrn::text) text_pattern_ops)",
+    "patient_record_last_name_upper_prefix": "(UPPER(last_name::text) text_pattern_ops)",
+    "patient_record_first_name_upper_prefix": "(UPPER(first_name::text) text_pattern_ops)",
+    # fuzzy search: col % 'term' from TrigramSimilar
+    "patient_record_last_name_trgm": "USING gin (last_name gin_trgm_ops)",
+    "patient_record_first_name_trgm": "USING gin (first_name gin_trgm_ops)",
+}
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    require_tables(conn, ["patient_record"])
+    with conn.cursor() as cur:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, spec in INDEXES.items():
+        create_index(conn, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON patient_record {spec}")
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cur:
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = []
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
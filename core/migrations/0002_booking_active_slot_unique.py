@@ -0,0 +1,58 @@
+"""
+One active booking per doctor slot (see BookingSerializer._reserve).
+
+booking is an unmanaged table, so the index is created with raw SQL.
+Cancelled bookings (any case) and bookings without a doctor are excluded.
+The index build fails if duplicate active bookings already exist.
+Resolve them first with:
+
+    SELECT doctor_id, slot_date, slot_time, count(*) FROM booking
+    WHERE doctor_id IS NOT NULL AND lower(status) <> 'cancelled'
+    GROUP BY 1, 2, 3 HAVING count(*) > 1;
+
+The INVALID index a failed build leaves behind is dropped and rebuilt on
+the next migrate (_unmanaged.create_index).
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEX = (
+    "CREATE UNIQUE INDEX {concurrently} IF NOT EXISTS booking_active_doctor_slot_uniq "
+    "ON booking (doctor_id, slot_date, slot_time) "
+    "WHERE doctor_id IS NOT NULL AND lower(status) <> 'cancelled'"
+)
+DROP = "DROP INDEX {concurrently} IF EXISTS booking_active_doctor_slot_uniq"
+
+
+def _concurrently(conn):
+    # SQLite supports partial indexes too, just not CONCURRENTLY
+    return "CONCURRENTLY" if conn.vendor == "postgresql" else ""
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ("postgresql", "sqlite"):
+        return
+    require_tables(conn, ["booking"])
+    create_index(conn, "booking_active_doctor_slot_uniq", INDEX.format(concurrently=_concurrently(conn)))
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ("postgresql", "sqlite"):
+        return
+    with conn.cursor() as cur:
+        cur.execute(DROP.format(concurrently=_concurrently(conn)))
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = [
+        ("core", "0001_patient_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
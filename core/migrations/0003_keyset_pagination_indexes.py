@@ -0,0 +1,47 @@
+"""
+Composite indexes backing KeysetPagination (core.pagination) on the
+high-volume list endpoints: each page becomes an index range scan on
+(<ordering column>, id) instead of a sort + OFFSET.
+
+The tables are unmanaged, so this is raw SQL, Postgres only.
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEXES = {
+    "booking_created_at_id_idx": ("booking", "created_at DESC, id DESC"),
+    "admission_admit_time_id_idx": ("admission", "admit_time DESC, id DESC"),
+    "notification_created_at_id_idx": ("notification", "created_at DESC, id DESC"),
+    "report_uploaded_at_id_idx": ("report", "uploaded_at DESC, id DESC"),
+}
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    require_tables(conn, [table for table, _ in INDEXES.values()])
+    for name, (table, cols) in INDEXES.items():
+        create_index(conn, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})")
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cur:
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = [
+        ("core", "0002_booking_active_slot_unique"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
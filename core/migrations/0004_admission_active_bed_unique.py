@@ -0,0 +1,56 @@
+"""
+One active admission per bed (see core.admissions).
+
+admission is an unmanaged table, so the index is created with raw SQL.
+The index build fails if a bed already has several active admissions.
+Resolve them first with:
+
+    SELECT bed_id, count(*) FROM admission
+    WHERE lower(status) = 'active' AND discharge_time IS NULL
+    GROUP BY 1 HAVING count(*) > 1;
+
+The INVALID index a failed build leaves behind is dropped and rebuilt on
+the next migrate (_unmanaged.create_index).
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEX = (
+    "CREATE UNIQUE INDEX {concurrently} IF NOT EXISTS admission_active_bed_uniq "
+    "ON admission (bed_id) "
+    "WHERE lower(status) = 'active' AND discharge_time IS NULL"
+)
+DROP = "DROP INDEX {concurrently} IF EXISTS admission_active_bed_uniq"
+
+
+def _concurrently(conn):
+    return "CONCURRENTLY" if conn.vendor == "postgresql" else ""
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ("postgresql", "sqlite"):
+        return
+    require_tables(conn, ["admission"])
+    create_index(conn, "admission_active_bed_uniq", INDEX.format(concurrently=_concurrently(conn)))
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor not in ("postgresql", "sqlite"):
+        return
+    with conn.cursor() as cur:
+        cur.execute(DROP.format(concurrently=_concurrently(conn)))
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = [
+        ("core", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
@@ -0,0 +1,44 @@
+"""
+Index for core.otp lookups: the newest live code for a destination
+(destination, purpose, expires_at DESC), and expiry-ordered purges.
+
+The table is unmanaged, so this is raw SQL, Postgres only.
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEXES = {
+    "otp_code_dest_purpose_exp_idx": ("otp_code", "destination, purpose, expires_at DESC"),
+    "otp_code_expires_at_idx": ("otp_code", "expires_at"),
+}
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    require_tables(conn, [table for table, _ in INDEXES.values()])
+    for name, (table, cols) in INDEXES.items():
+        create_index(conn, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})")
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cur:
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = [
+        ("core", "0004_admission_active_bed_unique"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
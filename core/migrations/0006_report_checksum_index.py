@@ -0,0 +1,43 @@
+"""
+Index for upload de-duplication (REPORTS_DEDUPLICATE): ReportViewSet.upload
+looks for an earlier report with the same (checksum_sha256, size_bytes).
+
+The table is unmanaged, so this is raw SQL, Postgres only.
+"""
+from django.db import migrations
+
+from core.migrations._unmanaged import create_index, require_tables
+
+INDEXES = {
+    "report_checksum_size_idx": ("report", "checksum_sha256, size_bytes"),
+}
+
+
+def create(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    require_tables(conn, [table for table, _ in INDEXES.values()])
+    for name, (table, cols) in INDEXES.items():
+        create_index(conn, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({cols})")
+
+
+def drop(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    with conn.cursor() as cur:
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run inside a transaction
+
+    dependencies = [
+        ("core", "0005_otp_lookup_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
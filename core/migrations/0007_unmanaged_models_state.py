@@ -0,0 +1,301 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:47
+
+"""
+Migration state for the unmanaged core models (no SQL: managed=False).
+
+Keeps `makemigrations --check` clean and gives later migrations the models
+in their historical state. The tables themselves come from the external
+schema (or core.synthetic.ensure_schema on local databases).
+"""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_report_checksum_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Admission',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('admit_time', models.DateTimeField()),
+                ('discharge_time', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(max_length=16)),
+                ('notes', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'admission',
+                'ordering': ['-admit_time'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AdmissionTask',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=120)),
+                ('details', models.TextField(blank=True, null=True)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(max_length=16)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'admission_task',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AppUser',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('email', models.CharField(blank=True, max_length=255, null=True)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('username', models.CharField(blank=True, max_length=150, null=True)),
+                ('password_hash', models.CharField(blank=True, max_length=256, null=True)),
+                ('role', models.CharField(blank=True, max_length=16, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'app_user',
+                'ordering': ['-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Bed',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=16)),
+            ],
+            options={
+                'db_table': 'bed',
+                'ordering': ['ward', 'code'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField(db_column='user_id')),
+                ('booking_type', models.CharField(max_length=16)),
+                ('slot_date', models.DateField()),
+                ('slot_time', models.TimeField()),
+                ('status', models.CharField(max_length=16)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'booking',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CanteenOrder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(default='pending', max_length=16)),
+                ('total_cents', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'canteen_order',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CanteenOrderItem',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('qty', models.IntegerField()),
+                ('price_cents', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'canteen_order_item',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Complaint',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('category', models.CharField(blank=True, db_column='category', max_length=64, null=True)),
+                ('description', models.TextField(db_column='description')),
+                ('status', models.CharField(db_column='status', default='open', max_length=32)),
+                ('created_at', models.DateTimeField(blank=True, db_column='created_at', null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, db_column='resolved_at', null=True)),
+            ],
+            options={
+                'db_table': 'complaint',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'department',
+                'ordering': ['name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Doctor',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('full_name', models.CharField(db_column='full_name', max_length=120)),
+                ('qualification', models.CharField(blank=True, max_length=100, null=True)),
+                ('experience_years', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'doctor',
+                'ordering': ['full_name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MedicalOrder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('order_type', models.CharField(max_length=32)),
+                ('status', models.CharField(max_length=16)),
+                ('created_at', models.DateTimeField()),
+                ('payload_json', models.JSONField(blank=True, db_column='payload_json', null=True)),
+            ],
+            options={
+                'db_table': 'medical_order',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MenuItem',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=120)),
+                ('category', models.CharField(default='meal', max_length=40)),
+                ('price_cents', models.IntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'db_table': 'menu_item',
+                'ordering': ['name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=120)),
+                ('message', models.TextField()),
+                ('channels', models.CharField(default='in_app', max_length=32)),
+                ('created_at', models.DateTimeField()),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'notification',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OtpCode',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('destination', models.CharField(max_length=255)),
+                ('purpose', models.CharField(max_length=16)),
+                ('code_hash', models.CharField(max_length=64)),
+                ('salt', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+                ('consumed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'otp_code',
+                'ordering': ['-expires_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientAccess',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('relationship', models.CharField(blank=True, db_column='relationship', max_length=32, null=True)),
+            ],
+            options={
+                'db_table': 'patient_access',
+                'ordering': ['-id'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientRecord',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('mrn', models.CharField(max_length=32, unique=True)),
+                ('first_name', models.CharField(max_length=80)),
+                ('last_name', models.CharField(max_length=80)),
+                ('sex', models.CharField(blank=True, max_length=12, null=True)),
+                ('dob', models.DateField(blank=True, null=True)),
+                ('blood_group', models.CharField(blank=True, max_length=8, null=True)),
+                ('allergies', models.TextField(blank=True, null=True)),
+                ('address', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'patient_record',
+                'ordering': ['last_name', 'first_name'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('report_type', models.CharField(max_length=32)),
+                ('file_name', models.CharField(max_length=255)),
+                ('object_key', models.CharField(max_length=512)),
+                ('mime_type', models.CharField(max_length=80)),
+                ('size_bytes', models.BigIntegerField(blank=True, null=True)),
+                ('checksum_sha256', models.CharField(blank=True, max_length=64, null=True)),
+                ('uploaded_by', models.BigIntegerField()),
+                ('uploaded_at', models.DateTimeField()),
+                ('notes', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'report',
+                'ordering': ['-uploaded_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Ward',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('floor', models.IntegerField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'ward',
+                'ordering': ['name'],
+                'managed': False,
+            },
+        ),
+    ]
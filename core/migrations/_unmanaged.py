@@ -0,0 +1,46 @@
+"""
+Shared by the raw-SQL index migrations on unmanaged core tables (not a
+migration itself: the loader skips modules starting with "_").
+"""
+
+
+def require_tables(conn, tables):
+    """
+    Raise if any of `tables` is missing. Skipping would record the migration
+    as applied without its index, and a later `migrate` would never build it.
+    """
+    missing = sorted(set(tables) - set(conn.introspection.table_names()))
+    if missing:
+        raise RuntimeError(
+            f"core tables missing on '{conn.alias}': {', '.join(missing)}. "
+            "Create the database schema before running migrate "
+            "(local/throwaway databases: manage.py generate_data --schema-only)."
+        )
+
+
+def _index_valid(cur, name):
+    """pg_index.indisvalid of index `name` (None if it doesn't exist)."""
+    cur.execute(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [name],
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def create_index(conn, name, sql):
+    """
+    Run `sql`, a CREATE [UNIQUE] INDEX [CONCURRENTLY] IF NOT EXISTS for `name`.
+
+    On Postgres a failed CONCURRENTLY build (duplicate key, cancel) leaves an
+    INVALID index behind, which IF NOT EXISTS would then skip while the
+    migration is recorded as applied. Drop such a leftover first, and raise
+    if the index isn't valid after the build.
+    """
+    with conn.cursor() as cur:
+        if conn.vendor == "postgresql" and _index_valid(cur, name) is False:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        cur.execute(sql)
+        if conn.vendor == "postgresql" and not _index_valid(cur, name):
+            raise RuntimeError(f"index {name} on '{conn.alias}' is missing or INVALID after CREATE INDEX.")
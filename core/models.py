@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 
 class Department(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -347,6 +349,21 @@ class CanteenOrder(models.Model):
     def __str__(self):
         return f"Order {self.id} – {self.status}"
 
+    def recompute_total(self):
+        """Set total_cents = SUM(qty * price_cents) of its items in one UPDATE."""
+        line_total = (
+            CanteenOrderItem.objects
+            .filter(order_id=OuterRef('pk'))
+            .values('order_id')
+            .annotate(t=Sum(F('qty') * F('price_cents')))
+            .values('t')
+        )
+        CanteenOrder.objects.filter(pk=self.pk).update(
+            total_cents=Coalesce(Subquery(line_total), Value(0))
+        )
+        self.refresh_from_db(fields=['total_cents'])
+        return self.total_cents
+
 
 class MenuItem(models.Model):
     id = models.BigAutoField(primary_key=True)
@@ -470,3 +487,18 @@ class MedicalOrder(models.Model):
     def __str__(self):
         return f"{self.order_type} ({self.status}) for admission {self.admission_id}"
     
+
+
+class RateCounter(models.Model):
+    """Expiring hit counter shared by all workers (core.counters). Managed by Django."""
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=320, unique=True)
+    count = models.IntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'rate_counter'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.key} = {self.count}"
@@ -0,0 +1,68 @@
+# core/notify_hub.py
+import asyncio
+import threading
+
+from django.db import transaction
+
+# In-process fan-out for new notifications (see notification_stream /
+# notification_poll in views.py). Publishers are ordinary sync code
+# (NotificationViewSet, NotificationAdmin); subscribers are async views
+# waiting on an asyncio.Queue in the ASGI event loop.
+#
+# The hub only reaches clients connected to THIS process. Streams also
+# re-query the inbox on a timer, so rows created by another worker (or
+# directly in the DB) still arrive, just later.
+
+
+class Subscription:
+    def __init__(self, app_user_id, loop, maxsize=100):
+        self.app_user_id = app_user_id   # None -> sees everything (staff)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def wants(self, target_user_id):
+        return self.app_user_id is None or target_user_id is None or target_user_id == self.app_user_id
+
+    def _offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass  # slow consumer: the periodic catch-up query fills the gap
+
+
+class NotificationHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = set()
+
+    def subscribe(self, app_user_id):
+        sub = Subscription(app_user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, notification_id, target_user_id):
+        event = {"id": notification_id, "target_user_id": target_user_id}
+        with self._lock:
+            subs = [s for s in self._subs if s.wants(target_user_id)]
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                self.unsubscribe(sub)  # loop already closed
+
+    def publish_on_commit(self, notification):
+        """Wake subscribers once the row is visible to their queries."""
+        nid, target = notification.id, notification.target_user_id
+        transaction.on_commit(lambda: self.publish(nid, target))
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subs)
+
+
+hub = NotificationHub()
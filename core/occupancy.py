@@ -0,0 +1,138 @@
+# core/occupancy.py
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+from .models import Admission, Bed, Ward
+
+# Ward / bed occupancy board (WardViewSet.occupancy). Three queries whatever
+# the size of the hospital: wards (+department), bed counts grouped by
+# (ward, status), and the active admissions with their patient.
+# The board is cached for OCCUPANCY_CACHE_TTL seconds under a global version
+# that admissions and bed edits replace (invalidate_occupancy). The cache is
+# shared by all workers (settings.CACHES), so this reaches them all.
+
+BED_STATES = ("available", "occupied", "reserved")
+_VERSION_KEY = "occupancy:ver"
+
+
+def _ttl():
+    return int(getattr(settings, "OCCUPANCY_CACHE_TTL", 15))
+
+
+def invalidate_occupancy():
+    """Call after an admission or bed status changes."""
+    # random, not incr(): see core.availability.invalidate_doctor_slots
+    cache.set(_VERSION_KEY, uuid4().hex, None)
+
+
+def _empty_totals():
+    totals = {state: 0 for state in BED_STATES}
+    totals.update(other=0, total=0)
+    return totals
+
+
+def _add(totals, status, n):
+    totals[status if status in BED_STATES else "other"] += n
+    totals["total"] += n
+
+
+def _build(department_id=None, ward_id=None):
+    wards = Ward.objects.select_related("department").order_by("department__name", "name")
+    beds = Bed.objects.all()
+    admissions = Admission.objects.filter(status__iexact="active", discharge_time__isnull=True)
+    if department_id:
+        wards = wards.filter(department_id=department_id)
+        beds = beds.filter(ward__department_id=department_id)
+        admissions = admissions.filter(ward__department_id=department_id)
+    if ward_id:
+        wards = wards.filter(id=ward_id)
+        beds = beds.filter(ward_id=ward_id)
+        admissions = admissions.filter(ward_id=ward_id)
+
+    counts = (
+        beds.annotate(state=Lower("status"))
+        .values("ward_id", "state")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    current = (
+        admissions
+        .order_by("ward_id", "bed__code")
+        .values(
+            "id", "ward_id", "bed_id", "bed__code", "admit_time",
+            "patient_id", "patient__mrn", "patient__first_name", "patient__last_name",
+        )
+    )
+
+    ward_rows = {}
+    departments = {}
+    for w in wards:
+        dept = w.department
+        dept_key = dept.id if dept else None
+        if dept_key not in departments:
+            departments[dept_key] = {
+                "id": dept_key,
+                "name": dept.name if dept else None,
+                "totals": _empty_totals(),
+                "wards": [],
+            }
+        row = {
+            "id": w.id,
+            "name": w.name,
+            "floor": w.floor,
+            "totals": _empty_totals(),
+            "occupied_beds": [],
+        }
+        ward_rows[w.id] = (row, dept_key)
+        departments[dept_key]["wards"].append(row)
+
+    totals = _empty_totals()
+    for c in counts:
+        entry = ward_rows.get(c["ward_id"])
+        if entry is None:
+            continue
+        row, dept_key = entry
+        _add(row["totals"], c["state"] or "", c["n"])
+        _add(departments[dept_key]["totals"], c["state"] or "", c["n"])
+        _add(totals, c["state"] or "", c["n"])
+
+    for a in current:
+        entry = ward_rows.get(a["ward_id"])
+        if entry is None:
+            continue
+        full_name = " ".join(x for x in (a["patient__first_name"], a["patient__last_name"]) if x)
+        entry[0]["occupied_beds"].append({
+            "bed_id": a["bed_id"],
+            "bed_code": a["bed__code"],
+            "admission_id": a["id"],
+            "admit_time": a["admit_time"],
+            "patient": {
+                "id": a["patient_id"],
+                "mrn": a["patient__mrn"],
+                "name": full_name,
+            },
+        })
+
+    return {"totals": totals, "departments": list(departments.values())}
+
+
+def occupancy_board(department_id=None, ward_id=None):
+    """
+    {"totals": {...}, "departments": [{"id", "name", "totals",
+     "wards": [{"id", "name", "floor", "totals", "occupied_beds": [...]}]}]}
+    totals are bed counts by Bed.status: available / occupied / reserved / other / total.
+    """
+    if _ttl() <= 0:
+        return _build(department_id, ward_id)
+
+    ver = cache.get(_VERSION_KEY, 1)
+    key = f"occupancy:{ver}:{department_id or '-'}:{ward_id or '-'}"
+    board = cache.get(key)
+    if board is None:
+        board = _build(department_id, ward_id)
+        cache.set(key, board, _ttl())
+    return board
@@ -0,0 +1,178 @@
+# core/otp.py
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters
+from .models import OtpCode
+
+# One-time codes for the OTP / app-user auth views.
+#
+# - Codes are hashed with HMAC-SHA256 keyed by SECRET_KEY over the row's own
+#   random salt: a 6-digit code that lives 5 minutes doesn't need PBKDF2, and
+#   HMAC costs microseconds instead of hundreds of milliseconds per call.
+#   Rows written before this change (no salt, make_password hash) still verify.
+# - Sends and verifications are rate limited per destination with a sliding
+#   window (two fixed buckets, weighted). The counters live in the database
+#   (core.counters), so the limits hold across all workers, and every check
+#   counts itself before deciding: parallel requests can't share one count.
+# - Each code can be checked OTP_MAX_ATTEMPTS times; past that it is burned,
+#   and a wrong guess on the last attempt burns it too.
+# - Consumed or expired rows for a destination are dropped when it is sent a
+#   new code; `manage.py compact_tables` clears the rest (expired_codes()).
+
+
+class OtpError(Exception):
+    reason = "invalid"
+    status_code = 400
+
+
+class OtpNotFound(OtpError):
+    reason = "not_found"
+
+
+class OtpInvalid(OtpError):
+    reason = "invalid"
+
+
+class OtpLocked(OtpError):
+    reason = "locked"
+    status_code = 429
+
+
+class OtpThrottled(OtpError):
+    reason = "throttled"
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many requests; retry in {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def _setting(name, default):
+    return int(getattr(settings, name, default))
+
+
+def normalize_destination(destination):
+    destination = (destination or "").strip()
+    return destination.lower() if "@" in destination else destination
+
+
+def generate_code(digits=6):
+    return f"{secrets.randbelow(10 ** digits):0{digits}d}"
+
+
+def hash_code(code, salt, destination, purpose):
+    msg = f"{salt}:{purpose}:{destination}:{code}".encode("utf-8")
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), msg, hashlib.sha256).hexdigest()
+
+
+def check_code(otp, code, destination):
+    if not otp.salt:
+        # legacy row hashed with make_password
+        from django.contrib.auth.hashers import check_password
+        return check_password(code, otp.code_hash)
+    expected = hash_code(code, otp.salt, destination, otp.purpose)
+    return hmac.compare_digest(expected, otp.code_hash or "")
+
+
+# ---- rate limiting ---------------------------------------------------------------
+def _sliding_window_hit(key, limit, window):
+    """Count one hit; raise OtpThrottled if it makes more than `limit` in the last `window` seconds."""
+    now = time.time()
+    bucket = int(now // window)
+    into = (now % window) / window
+    current = counters.hit(f"{key}:{bucket}", window * 2)
+    estimate = counters.value(f"{key}:{bucket - 1}") * (1 - into) + current
+    if estimate > limit:
+        raise OtpThrottled(max(1, int(window - now % window)))
+
+
+def _attempts_key(otp_id):
+    return f"otp:attempts:{otp_id}"
+
+
+# ---- issue / verify ----------------------------------------------------------------
+def issue(destination, purpose):
+    """Create a code for destination. Returns (code, OtpCode). Raises OtpThrottled."""
+    destination = normalize_destination(destination)
+    _sliding_window_hit(f"otp:send:{destination}",
+                        _setting("OTP_SEND_LIMIT", 5), _setting("OTP_SEND_WINDOW", 900))
+
+    now = timezone.now()
+    # keep this destination's lookups short: drop its spent/expired rows
+    OtpCode.objects.filter(destination=destination).filter(
+        Q(expires_at__lt=now) | Q(consumed_at__isnull=False)
+    ).delete()
+
+    code = generate_code()
+    salt = secrets.token_hex(16)
+    otp = OtpCode.objects.create(
+        destination=destination,
+        purpose=purpose,
+        code_hash=hash_code(code, salt, destination, purpose),
+        salt=salt,
+        expires_at=now + timedelta(seconds=_setting("OTP_TTL_SECONDS", 300)),
+    )
+    return code, otp
+
+
+def verify(destination, purposes, code, consume=False):
+    """
+    Check code against the newest live OTP for destination and any of purposes.
+    Returns the OtpCode; raises OtpThrottled / OtpNotFound / OtpLocked / OtpInvalid.
+    consume=True marks it used (exactly once, even under concurrent requests).
+    """
+    destination = normalize_destination(destination)
+    _sliding_window_hit(f"otp:verify:{destination}",
+                        _setting("OTP_VERIFY_LIMIT", 10), _setting("OTP_SEND_WINDOW", 900))
+
+    now = timezone.now()
+    otp = (
+        OtpCode.objects
+        .filter(destination=destination, purpose__in=list(purposes),
+                expires_at__gte=now, consumed_at__isnull=True)
+        .order_by("-expires_at", "-id")
+        .first()
+    )
+    if otp is None:
+        raise OtpNotFound("OTP expired or not found.")
+
+    # count this attempt before checking the code
+    max_attempts = _setting("OTP_MAX_ATTEMPTS", 5)
+    ttl = max(1, int((otp.expires_at - now).total_seconds()))
+    attempts = counters.hit(_attempts_key(otp.id), ttl)
+    if attempts > max_attempts:
+        consume_code(otp, now)   # burn it
+        raise OtpLocked("Too many attempts. Request a new code.")
+
+    if not check_code(otp, (code or "").strip(), destination):
+        if attempts >= max_attempts:
+            consume_code(otp, now)   # that was the last attempt
+        raise OtpInvalid("Invalid OTP.")
+
+    if consume and not consume_code(otp, now):
+        raise OtpNotFound("OTP already used.")
+    return otp
+
+
+def consume_code(otp, now=None):
+    """Mark used; False if another request got there first."""
+    now = now or timezone.now()
+    updated = OtpCode.objects.filter(pk=otp.pk, consumed_at__isnull=True).update(consumed_at=now)
+    if updated:
+        otp.consumed_at = now
+    return bool(updated)
+
+
+# ---- housekeeping ------------------------------------------------------------------
+def expired_codes(grace_seconds=3600):
+    """Codes that expired (or were consumed) more than grace_seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    return OtpCode.objects.filter(Q(expires_at__lt=cutoff) | Q(consumed_at__lt=cutoff))
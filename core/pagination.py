@@ -1,7 +1,196 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a view's `keyset_ordering`,
+    e.g. ("-created_at", "-id"). The last id makes the order unique.
+
+    - no COUNT(*), no OFFSET: each page is an index range scan
+    - pages stay stable while new rows are inserted at the head
+    - forward only: {"next": <url or null>, "results": [...]}
+    """
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _decode_cursor(self, model, ordering, raw):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(raw.encode("ascii")).decode("utf-8"))
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip("-")).to_python(v)
+                for name, v in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode_cursor(self, obj, ordering):
+        values = []
+        for name in ordering:
+            field = name.lstrip("-")
+            v = obj[field] if isinstance(obj, dict) else getattr(obj, field)  # dict: ?fast=1 rows
+            values.append(v.isoformat() if hasattr(v, "isoformat") else v)
+        raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def _after(self, ordering, values):
+        # (a, b) after (x, y)  ==  a past x  OR  (a = x AND b past y).
+        # The OR alone can't start an index range, so it's ANDed with the
+        # redundant `a at or past x`: the index scan starts at the cursor
+        # instead of filtering every row from the head of the index.
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+        q = Q()
+        for i, name in enumerate(ordering):
+            field = name.lstrip("-")
+            op = "lt" if name.startswith("-") else "gt"
+            clause = Q(**{f"{field}__{op}": values[i]})
+            for prev_name, prev_value in zip(ordering[:i], values[:i]):
+                clause &= Q(**{prev_name.lstrip("-"): prev_value})
+            q |= clause
+        return bound & q
+
+    def _page_query(self, queryset, request, view):
+        ordering = tuple(getattr(view, "keyset_ordering", None) or ("-id",))
+        self.request = request
+        self.ordering = ordering
+        self.limit = self.get_page_size(request)
+
+        queryset = queryset.order_by(*ordering)
+        raw = request.query_params.get(self.cursor_query_param)
+        if raw:
+            queryset = queryset.filter(self._after(ordering, self._decode_cursor(queryset.model, ordering, raw)))
+        return queryset[:self.limit + 1]
+
+    def _set_page(self, rows):
+        self.has_next = len(rows) > self.limit
+        self.page = rows[:self.limit]
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._set_page(list(self._page_query(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() for async views (core.async_views)."""
+        return self._set_page([row async for row in self._page_query(queryset, request, view)])
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode_cursor(self.page[-1], self.ordering))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CountPaginator(Paginator):
+    """Paginator that takes its COUNT(*) from `count_queryset` when one is given."""
+
+    def __init__(self, object_list, per_page, *args, count_queryset=None, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.count_queryset = count_queryset
+
+    @cached_property
+    def count(self):
+        if self.count_queryset is None:
+            return super().count
+        return self.count_queryset.count()
+
 
 class DefaultPagination(PageNumberPagination):
     page_size = 25                      # default per page
     page_size_query_param = "page_size" # allow ?page_size=50
     max_page_size = 100                 # hard cap
-    invalid_page_message = "Invalid page number."
\ No newline at end of file
+    invalid_page_message = "Invalid page number."
+
+    # opt-in keyset mode: ?pagination=keyset (or a ?cursor= from a previous page)
+    # on views that declare keyset_ordering
+    keyset_query_param = "pagination"
+
+    def _wants_keyset(self, request, view):
+        if not getattr(view, "keyset_ordering", None):
+            return False
+        p = request.query_params
+        return p.get(self.keyset_query_param) == "keyset" or KeysetPagination.cursor_query_param in p
+
+    # count_queryset: count these rows instead of `queryset` (same rows, cheaper
+    # COUNT), e.g. the plain queryset behind core.fastlist's values() rows
+    count_queryset = None
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountPaginator(object_list, per_page, count_queryset=self.count_queryset)
+
+    def paginate_queryset(self, queryset, request, view=None, count_queryset=None):
+        self.keyset = KeysetPagination() if self._wants_keyset(request, view) else None
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.count_queryset = count_queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None, count_queryset=None):
+        """
+        paginate_queryset() for async views (core.async_views): COUNT and the
+        page fetch go through the async ORM. Same page numbers, errors and
+        response as the sync path.
+        """
+        self.keyset = KeysetPagination() if self._wants_keyset(request, view) else None
+        if self.keyset:
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # fills the cached_property: no sync COUNT
+        paginator.count = await (queryset if count_queryset is None else count_queryset).acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        bottom = (number - 1) * page_size
+        rows = [row async for row in queryset[bottom:bottom + page_size]]
+        self.page = paginator._get_page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if getattr(self, "keyset", None):
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
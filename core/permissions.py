@@ -2,10 +2,12 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 class StaffWriteOnly(BasePermission):
-    """Read for any authenticated user; write only for staff."""
+    """Read for any authenticated user (Django session or AppUser JWT); write only for staff."""
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:
-            return request.user and request.user.is_authenticated
+            if getattr(request, "app_user", None) is not None:
+                return True
+            return bool(request.user and request.user.is_authenticated)
         return bool(request.user and request.user.is_authenticated and request.user.is_staff)
 
 class IsTargetUserOrStaff(BasePermission):
@@ -15,3 +17,10 @@ class IsTargetUserOrStaff(BasePermission):
             return True
         app_user_id = getattr(getattr(request.user, "appuser", None), "id", None)
         return obj.target_user_id and obj.target_user_id == app_user_id
+
+class IsAuthenticatedOrAppUser(BasePermission):
+    """Any Django-authenticated user, or a request carrying a valid AppUser JWT."""
+    def has_permission(self, request, view):
+        if getattr(request, "app_user", None) is not None:
+            return True
+        return bool(request.user and request.user.is_authenticated)
@@ -0,0 +1,45 @@
+# core/retention.py
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Notification
+
+# Deleting old rows from tables that only grow (otp_code, notification, rate_counter).
+# Rows go in id order, batch_size per DELETE, each batch its own short
+# autocommit statement: no long locks, replicas/autovacuum keep up (pause
+# between batches), and a run stopped by max_batches or a crash simply
+# continues where it left off next time. Used by `manage.py compact_tables`.
+
+PurgeResult = namedtuple("PurgeResult", "deleted batches finished")
+
+
+def delete_in_batches(qs, batch_size=5000, max_batches=None, pause=0.0):
+    """
+    Delete the rows of qs batch_size at a time. Returns a PurgeResult;
+    finished is False when max_batches stopped the run with rows left.
+    """
+    model = qs.model
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(qs.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return PurgeResult(deleted, batches, True)
+        # nothing references these tables, so Django fast-deletes: one DELETE ... WHERE id IN (...)
+        deleted += model._base_manager.using(qs.db).filter(pk__in=ids).delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            return PurgeResult(deleted, batches, True)
+        if pause:
+            time.sleep(pause)
+    return PurgeResult(deleted, batches, not qs.exists())
+
+
+def stale_notifications(days=None):
+    """Read notifications whose read_at is older than the retention window."""
+    days = int(getattr(settings, "NOTIFICATION_RETENTION_DAYS", 90)) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    return Notification.objects.filter(read_at__isnull=False, read_at__lt=cutoff)
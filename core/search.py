@@ -0,0 +1,69 @@
+# core/search.py
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Concat
+
+from .models import PatientRecord
+
+
+def max_results():
+    return int(getattr(settings, "PATIENT_SEARCH_MAX_RESULTS", 50))
+
+
+def _prefix_rank(term):
+    """Exact MRN > MRN prefix > name prefix > anything else."""
+    return Case(
+        When(mrn__iexact=term, then=Value(3.0)),
+        When(mrn__istartswith=term, then=Value(2.0)),
+        When(Q(last_name__istartswith=term) | Q(first_name__istartswith=term), then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def _token_match(token, fuzzy):
+    q = Q(first_name__istartswith=token) | Q(last_name__istartswith=token)
+    if fuzzy:
+        # served by the gin_trgm_ops indexes on first_name / last_name
+        q |= Q(TrigramSimilar(F("first_name"), token)) | Q(TrigramSimilar(F("last_name"), token))
+    else:
+        q |= Q(first_name__icontains=token) | Q(last_name__icontains=token)
+    return q
+
+
+def search_patients(term, limit=None):
+    """
+    Ranked patient search used by /api/patients/search/.
+
+    - MRN: exact or prefix match (btree on UPPER(mrn)).
+    - Names: every word must prefix-match first/last name, or be
+      trigram-similar to it on Postgres (pg_trgm, see migration 0001).
+    - SQLite/other backends fall back to prefix + icontains so tests still work.
+    Results are capped at PATIENT_SEARCH_MAX_RESULTS (limit is clamped to 1..cap).
+    """
+    term = (term or "").strip()
+    if not term:
+        return PatientRecord.objects.none()
+
+    cap = max_results()
+    limit = max(1, min(int(limit or cap), cap))
+    fuzzy = connection.vendor == "postgresql"
+
+    names = Q()
+    for token in term.split():
+        names &= _token_match(token, fuzzy)
+
+    qs = PatientRecord.objects.filter(Q(mrn__istartswith=term) | names)
+
+    rank = _prefix_rank(term)
+    if fuzzy:
+        full_name = Concat(F("first_name"), Value(" "), F("last_name"))
+        rank = rank + TrigramSimilarity(full_name, term)
+
+    return (
+        qs.annotate(rank=rank)
+          .order_by("-rank", "last_name", "first_name", "id")[:limit]
+    )
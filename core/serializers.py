@@ -1,6 +1,9 @@
 from django.contrib.auth import get_user_model
 User = get_user_model()
-from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
 from .models import Department, Doctor, Booking, Admission, AdmissionTask, MenuItem, Report, Complaint, Notification, MenuItem, CanteenOrder, CanteenOrderItem, PatientRecord, PatientAccess, MedicalOrder, AppUser, Ward, Bed
 
 
@@ -15,6 +18,12 @@ class DoctorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Doctor
         fields = ['id', 'full_name', 'qualification', 'experience_years', 'department_id']
+class SlotTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"slot_time": "This time slot is already booked for the selected doctor."}
+    default_code = "slot_taken"
+
+
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
@@ -25,6 +34,17 @@ class BookingSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'status', 'created_at']
 
+    def _slot_is_taken(self, doc, slot_date, slot_time):
+        # same rule as SlotsView: cancelled bookings free the slot
+        qs = Booking.objects.filter(
+            doctor=doc,
+            slot_date=slot_date,
+            slot_time=slot_time
+        ).exclude(status__iexact="cancelled")
+        if self.instance is not None:
+            qs = qs.exclude(pk=self.instance.pk)
+        return qs.exists()
+
     # ---- VALIDATION RULES ----
     def validate(self, data):
         dept = data.get('department')
@@ -38,24 +58,53 @@ class BookingSerializer(serializers.ModelSerializer):
                 {"doctor": "Selected doctor does not belong to the chosen department."}
             )
 
-        # 2) prevent duplicate bookings of the same doctor slot
-        if doc and slot_date and slot_time:
-            exists = Booking.objects.filter(
-                doctor=doc,
-                slot_date=slot_date,
-                slot_time=slot_time
-            ).exists()
-            if exists:
-                raise serializers.ValidationError(
-                    {"slot_time": "This time slot is already booked for the selected doctor."}
-                )
+        # 2) prevent duplicate bookings of the same doctor slot (fast path;
+        #    _reserve re-checks under a lock, the partial unique index is the backstop)
+        if doc and slot_date and slot_time and not self._is_cancelled() \
+                and self._slot_is_taken(doc, slot_date, slot_time):
+            raise SlotTaken()
         return data
 
+    def _is_cancelled(self):
+        return (getattr(self.instance, 'status', '') or '').lower() == 'cancelled'
+
+    def _reserve(self, save, validated_data):
+        """
+        Run save() with the doctor row locked so concurrent requests for the
+        same doctor queue up instead of both passing the exists() check.
+        A unique-index violation (booking_active_doctor_slot_uniq) maps to 409.
+        """
+        instance = self.instance
+        doc = validated_data.get('doctor', getattr(instance, 'doctor', None))
+        slot_date = validated_data.get('slot_date', getattr(instance, 'slot_date', None))
+        slot_time = validated_data.get('slot_time', getattr(instance, 'slot_time', None))
+        if self._is_cancelled():
+            # a cancelled booking doesn't hold its slot
+            return save(validated_data)
+        try:
+            with transaction.atomic():
+                if doc and slot_date and slot_time:
+                    Doctor.objects.select_for_update().filter(pk=doc.pk).first()
+                    if self._slot_is_taken(doc, slot_date, slot_time):
+                        raise SlotTaken()
+                return save(validated_data)
+        except IntegrityError:
+            if doc and slot_date and slot_time and self._slot_is_taken(doc, slot_date, slot_time):
+                raise SlotTaken()
+            raise
+
     # optional: set default status on create
     def create(self, validated_data):
         if 'status' not in validated_data:
             validated_data['status'] = 'pending'
-        return super().create(validated_data)
+        validated_data.setdefault('created_at', timezone.now())
+        app_user = getattr(self.context.get('request'), 'app_user', None)
+        if app_user and 'user_id' not in validated_data:
+            validated_data['user_id'] = app_user.id
+        return self._reserve(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._reserve(lambda data: super(BookingSerializer, self).update(instance, data), validated_data)
     
 class AppUserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -92,6 +141,23 @@ class AdmissionSerializer(serializers.ModelSerializer):
         return (fn + ' ' + ln).strip()
 
 
+class AdmitSerializer(serializers.Serializer):
+    patient = serializers.PrimaryKeyRelatedField(queryset=PatientRecord.objects.all())
+    bed = serializers.PrimaryKeyRelatedField(queryset=Bed.objects.all())
+    doctor = serializers.PrimaryKeyRelatedField(queryset=Doctor.objects.all(), required=False, allow_null=True)
+    admit_time = serializers.DateTimeField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class DischargeSerializer(serializers.Serializer):
+    discharge_time = serializers.DateTimeField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class TransferSerializer(serializers.Serializer):
+    bed = serializers.PrimaryKeyRelatedField(queryset=Bed.objects.all())
+
+
 class AdmissionTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = AdmissionTask
@@ -279,10 +345,15 @@ class CanteenOrderSerializer(serializers.ModelSerializer):
         full = f"{first} {last}".strip()
         return full or None
 
-    def _active_admission_for(self, patient_id):
+    def _active_admission_for(self, patient):
+        # CanteenOrderViewSet prefetches these (with ward/bed) for the whole page
+        prefetched = getattr(patient, "active_admissions", None)
+        if prefetched is not None:
+            return prefetched[0] if prefetched else None
         return (
             Admission.objects
-            .filter(patient_id=patient_id, status__iexact="active")
+            .select_related("ward", "bed")
+            .filter(patient_id=patient.id, status__iexact="active")
             .order_by("-admit_time")
             .first()
         )
@@ -291,14 +362,14 @@ class CanteenOrderSerializer(serializers.ModelSerializer):
         p = getattr(obj, "patient", None)
         if not p:
             return None
-        adm = self._active_admission_for(p.id)
+        adm = self._active_admission_for(p)
         return getattr(getattr(adm, "ward", None), "name", None) if adm else None
 
     def get_bed_code(self, obj):
         p = getattr(obj, "patient", None)
         if not p:
             return None
-        adm = self._active_admission_for(p.id)
+        adm = self._active_admission_for(p)
         return getattr(getattr(adm, "bed", None), "code", None) if adm else None
 
 
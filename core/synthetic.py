@@ -0,0 +1,394 @@
+# core/synthetic.py
+import csv
+import hashlib
+import io
+import json
+import random
+from datetime import date, time, timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    Admission, AdmissionTask, AppUser, Bed, Booking, CanteenOrder, CanteenOrderItem, Complaint,
+    Department, Doctor, MedicalOrder, MenuItem, Notification, PatientAccess, PatientRecord, Report, Ward,
+)
+
+# Synthetic hospital for benchmarks and load tests (bench_api, generate_data).
+# All core tables are unmanaged, so ensure_schema() creates any that are
+# missing straight from the model definitions (local/throwaway DBs only).
+#
+# Rows are generated deterministically from a seed, in chunks, with ids
+# allocated up front so children can reference parents without reading
+# them back; only ids (and the few columns children copy) stay in memory.
+# Chunks are written with COPY on PostgreSQL and bulk_create elsewhere.
+# Synthetic patients have MRNs starting "SYN".
+
+MRN_PREFIX = "SYN"
+BENCH_PASSWORD = "bench-password"
+BENCH_STAFF_USERNAME = "bench-staff"
+BENCH_GUARDIAN_EMAIL = "bench-guardian@example.com"
+
+FIRST_NAMES = ("Aarav", "Diya", "Kabir", "Meera", "Rohan", "Anaya", "Vikram", "Isha", "Arjun", "Sara",
+               "Nikhil", "Priya", "Rahul", "Tara", "Dev", "Leela", "Omar", "Zoya", "Ravi", "Nisha")
+LAST_NAMES = ("Sharma", "Patel", "Iyer", "Khan", "Reddy", "Das", "Menon", "Gupta", "Singh", "Rao",
+              "Joshi", "Nair", "Bose", "Kapoor", "Mehta", "Pillai", "Verma", "Shah", "Ali", "Sethi")
+DEPARTMENTS = ("General Medicine", "Surgery", "Paediatrics", "Cardiology",
+               "Orthopaedics", "Neurology", "Obstetrics", "Oncology")
+MENU = (("Tea", "drink", 1500), ("Coffee", "drink", 2500), ("Idli", "meal", 4000), ("Dosa", "meal", 6000),
+        ("Thali", "meal", 12000), ("Soup", "meal", 5000), ("Fruit bowl", "snack", 4500), ("Juice", "drink", 3500))
+SLOT_TIMES = [time(9 + i // 2, 30 * (i % 2)) for i in range(20)]   # 09:00 .. 18:30
+
+
+def ensure_schema(using="default"):
+    """Create the tables of unmanaged core models that don't exist yet. Returns their names."""
+    conn = connections[using]
+    existing = set(conn.introspection.table_names())
+    created = []
+    with conn.schema_editor() as editor:
+        for model in apps.get_app_config("core").get_models():
+            if not model._meta.managed and model._meta.db_table not in existing:
+                editor.create_model(model)
+                created.append(model._meta.db_table)
+    return created
+
+
+def has_real_patients(using="default"):
+    return PatientRecord.objects.using(using).exclude(mrn__startswith=MRN_PREFIX).exists()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class HospitalSeeder:
+    """
+    HospitalSeeder(patients=20000).run() -> {table: rows written}
+    Other volumes scale with the number of patients (see the seed_* methods).
+    """
+
+    def __init__(self, patients=20000, seed=42, batch_size=5000, use_copy=None,
+                 report_files=0, reports_dir=None, log=None, using="default"):
+        self.patients = patients
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.using = using
+        self.conn = connections[using]
+        self.use_copy = (self.conn.vendor == "postgresql") if use_copy is None else use_copy
+        self.report_files = report_files
+        self.reports_dir = Path(reports_dir or settings.REPORTS_DIR)
+        self.log = log or (lambda msg: None)
+        self.now = timezone.now()
+        self.counts = {}
+        self._next_id = {}
+
+    # ---- writing ----------------------------------------------------------------
+    def _ids(self, model, n):
+        """Reserve n consecutive primary keys for model."""
+        if model not in self._next_id:
+            top = model.objects.using(self.using).aggregate(m=Max("pk"))["m"] or 0
+            self._next_id[model] = top + 1
+        start = self._next_id[model]
+        self._next_id[model] += n
+        return range(start, start + n)
+
+    def _copy(self, model, objs):
+        fields = model._meta.concrete_fields
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for obj in objs:
+            row = []
+            for f in fields:
+                v = getattr(obj, f.attname)
+                if v is None:
+                    row.append("\\N")
+                elif isinstance(f, models.JSONField):
+                    row.append(json.dumps(v))
+                else:
+                    row.append(f.get_db_prep_save(v, self.conn))
+            writer.writerow(row)
+        cols = ", ".join(self.conn.ops.quote_name(f.column) for f in fields)
+        sql = f"COPY {self.conn.ops.quote_name(model._meta.db_table)} ({cols}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        with self.conn.cursor() as cur:
+            raw = cur.cursor
+            if hasattr(raw, "copy_expert"):        # psycopg2
+                buf.seek(0)
+                raw.copy_expert(sql, buf)
+            else:                                  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+
+    def _write(self, model, rows):
+        """Write an iterable of unsaved instances (ids already set) in chunks."""
+        n = 0
+        for chunk in _chunks(rows, self.batch_size):
+            if self.use_copy:
+                self._copy(model, chunk)
+            else:
+                model.objects.using(self.using).bulk_create(chunk, batch_size=self.batch_size)
+            n += len(chunk)
+        table = model._meta.db_table
+        self.counts[table] = self.counts.get(table, 0) + n
+        self.log(f"  {table}: {n}")
+        return n
+
+    def _reset_sequences(self):
+        # explicit ids bypass the sequences; move them past what we wrote
+        if self.conn.vendor != "postgresql":
+            return
+        with self.conn.cursor() as cur:
+            for model in self._next_id:
+                table = model._meta.db_table
+                cur.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT COALESCE(MAX(id), 1) FROM {}))"
+                    .format(self.conn.ops.quote_name(table)),
+                    [table],
+                )
+
+    def _ago(self, max_days):
+        return self.now - timedelta(days=self.rng.random() * max_days)
+
+    # ---- reference data -----------------------------------------------------------
+    def seed_structure(self):
+        rng = self.rng
+        dept_ids = list(self._ids(Department, len(DEPARTMENTS)))
+        self._write(Department, (Department(id=i, name=n, created_at=self.now) for i, n in zip(dept_ids, DEPARTMENTS)))
+
+        wards = [(d, w) for d in dept_ids for w in range(4)]
+        ward_ids = list(self._ids(Ward, len(wards)))
+        ward_names = {}
+        rows = []
+        for wid, (d, w) in zip(ward_ids, wards):
+            ward_names[wid] = f"{DEPARTMENTS[dept_ids.index(d)][:3].upper()}-{w + 1}"
+            rows.append(Ward(id=wid, department_id=d, name=ward_names[wid], floor=w + 1))
+        self._write(Ward, rows)
+
+        beds = [(w, b) for w in ward_ids for b in range(25)]
+        self.beds = [(bid, w) for bid, (w, _) in zip(self._ids(Bed, len(beds)), beds)]   # (bed id, ward id)
+        self.occupied = set(bid for bid, _ in rng.sample(self.beds, int(len(self.beds) * 0.7)))
+        self._write(Bed, (
+            Bed(id=bid, ward_id=w, code=f"{ward_names[w]}-B{b + 1:02d}",
+                status="occupied" if bid in self.occupied else "available")
+            for (bid, w), (_, b) in zip(self.beds, beds)
+        ))
+
+        docs = [d for d in dept_ids for _ in range(5)]
+        self.doctors = list(zip(self._ids(Doctor, len(docs)), docs))   # (doctor id, department id)
+        self._write(Doctor, (
+            Doctor(id=i, department_id=d, full_name=f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                   qualification="MD", experience_years=rng.randint(1, 30))
+            for i, d in self.doctors
+        ))
+
+        self.menu = list(zip(self._ids(MenuItem, len(MENU)), (p for _, _, p in MENU)))   # (id, price)
+        self._write(MenuItem, (
+            MenuItem(id=i, name=n, category=c, price_cents=p)
+            for (i, _), (n, c, p) in zip(self.menu, MENU)
+        ))
+
+    def seed_users(self):
+        from django.contrib.auth.models import User
+
+        password_hash = make_password(BENCH_PASSWORD)   # hashed once, reused
+        if not User.objects.using(self.using).filter(username=BENCH_STAFF_USERNAME).exists():
+            User.objects.db_manager(self.using).create_user(
+                BENCH_STAFF_USERNAME, "bench-staff@example.com", BENCH_PASSWORD, is_staff=True)
+
+        n = max(1, self.patients // 10)
+        ids = list(self._ids(AppUser, n + 2))
+        self.staff_app_user_id, bench_guardian_id, self.guardians = ids[0], ids[1], ids[1:]
+        rows = [
+            AppUser(id=self.staff_app_user_id, email="bench-staff@example.com", username=BENCH_STAFF_USERNAME,
+                    password_hash=password_hash, role="staff", created_at=self.now),
+            AppUser(id=bench_guardian_id, email=BENCH_GUARDIAN_EMAIL, username="bench-guardian",
+                    password_hash=password_hash, role="guardian", created_at=self.now),
+        ]
+        rows += [
+            AppUser(id=gid, email=f"guardian{gid}@example.com", phone=f"9{gid:09d}", username=f"guardian{gid}",
+                    password_hash=password_hash, role="guardian", created_at=self._ago(365))
+            for gid in ids[2:]
+        ]
+        self._write(AppUser, rows)
+        self.bench_guardian_id = bench_guardian_id
+
+    # ---- clinical data --------------------------------------------------------------
+    def seed_patients(self):
+        rng = self.rng
+        self.patient_ids = self._ids(PatientRecord, self.patients)
+        self._write(PatientRecord, (
+            PatientRecord(
+                id=pid,
+                mrn=f"{MRN_PREFIX}{pid:08d}",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                sex=rng.choice(("male", "female")),
+                dob=date(1940, 1, 1) + timedelta(days=rng.randint(0, 30000)),
+                blood_group=rng.choice(("A+", "B+", "O+", "AB+", "O-")),
+                created_at=self._ago(1000),
+            )
+            for pid in self.patient_ids
+        ))
+
+        # every guardian gets one or two patients; the bench guardian gets three
+        links = []
+        for g in self.guardians:
+            picks = set(rng.choice(self.patient_ids) for _ in range(3 if g == self.bench_guardian_id else rng.randint(1, 2)))
+            links += [(g, p) for p in picks]
+        self._write(PatientAccess, (
+            PatientAccess(id=i, user_id=g, patient_id=p, relationship="guardian")
+            for i, (g, p) in zip(self._ids(PatientAccess, len(links)), links)
+        ))
+
+    def seed_admissions(self):
+        rng = self.rng
+        # one active admission per occupied bed, each for a different patient
+        occupied = [b for b in self.beds if b[0] in self.occupied]
+        patients = rng.sample(self.patient_ids, min(len(occupied), len(self.patient_ids)))
+        self.active = []   # (admission id, patient id, ward id, bed id, admit time)
+        for aid, pid, (bid, w) in zip(self._ids(Admission, len(patients)), patients, occupied):
+            self.active.append((aid, pid, w, bid, self._ago(20)))
+        self._write(Admission, (
+            Admission(id=aid, patient_id=pid, ward_id=w, bed_id=bid, doctor_id=rng.choice(self.doctors)[0],
+                      admit_time=t, status="active")
+            for aid, pid, w, bid, t in self.active
+        ))
+
+        def history():
+            for aid in self._ids(Admission, self.patients // 2):
+                bid, w = rng.choice(self.beds)
+                admit = self._ago(900)
+                yield Admission(id=aid, patient_id=rng.choice(self.patient_ids), ward_id=w, bed_id=bid,
+                                doctor_id=rng.choice(self.doctors)[0], admit_time=admit,
+                                discharge_time=admit + timedelta(days=rng.randint(1, 14)), status="discharged")
+        self._write(Admission, history())
+
+        n = len(self.active) * 2
+        task_ids, order_ids = iter(self._ids(AdmissionTask, n)), iter(self._ids(MedicalOrder, n))
+        tasks, orders = [], []
+        for aid, _, _, _, admitted in self.active:
+            for h in (1, 2):
+                created = admitted + timedelta(hours=h)
+                tasks.append(AdmissionTask(id=next(task_ids), admission_id=aid,
+                                           title=rng.choice(("Vitals", "Dressing", "Blood test", "Physio")),
+                                           status=rng.choice(("open", "done")), created_at=created, updated_at=created))
+                orders.append(MedicalOrder(id=next(order_ids), admission_id=aid, created_by_id=self.staff_app_user_id,
+                                           order_type=rng.choice(("medication", "lab", "imaging", "diet")),
+                                           status=rng.choice(("new", "in_progress", "completed")),
+                                           created_at=created, payload_json={"note": "synthetic"}))
+        self._write(AdmissionTask, tasks)
+        self._write(MedicalOrder, orders)
+
+    def seed_bookings(self):
+        # walk the (day, slot, doctor) grid so no doctor slot is booked twice
+        rng = self.rng
+        start = date.today() - timedelta(days=60)
+        per_day = len(SLOT_TIMES) * len(self.doctors)
+
+        def rows():
+            for k, bid in enumerate(self._ids(Booking, self.patients // 2)):
+                day, rest = divmod(k, per_day)
+                slot, doc = divmod(rest, len(self.doctors))
+                doctor_id, dept_id = self.doctors[doc]
+                yield Booking(
+                    id=bid, user_id=rng.choice(self.guardians), patient_id=rng.choice(self.patient_ids),
+                    booking_type=rng.choice(("opd", "followup", "teleconsult")),
+                    department_id=dept_id, doctor_id=doctor_id,
+                    slot_date=start + timedelta(days=day), slot_time=SLOT_TIMES[slot],
+                    status=rng.choice(("booked", "booked", "booked", "completed", "cancelled")),
+                    created_at=self._ago(120),
+                )
+        self._write(Booking, rows())
+
+    def seed_complaints_and_notifications(self):
+        rng = self.rng
+
+        def complaints():
+            for cid in self._ids(Complaint, max(1, self.patients // 20)):
+                aid, pid, w, bid, _ = rng.choice(self.active)
+                yield Complaint(
+                    id=cid, user_id=rng.choice(self.guardians), patient_id=pid, admission_id=aid,
+                    ward_id=w, bed_id=bid, category=rng.choice(("food", "cleanliness", "staff", "billing")),
+                    description="Synthetic complaint for load testing.",
+                    status=rng.choice(("open", "in_progress", "resolved")), created_at=self._ago(60),
+                )
+        self._write(Complaint, complaints())
+
+        def notifications():
+            for nid in self._ids(Notification, max(1, self.patients // 5)):
+                yield Notification(
+                    id=nid, created_by_id=self.staff_app_user_id,
+                    target_user_id=None if nid % 5 == 0 else rng.choice(self.guardians),
+                    title="Update", message="Synthetic notification.", channels="in_app",
+                    created_at=self._ago(30), read_at=self.now if rng.random() < 0.5 else None,
+                )
+        self._write(Notification, notifications())
+
+    def seed_canteen(self):
+        # one order per two patients, 1-3 lines each; totals match the lines
+        rng = self.rng
+        items = []   # (order id, menu item id, qty, price), written once the orders exist
+
+        def orders():
+            for oid in self._ids(CanteenOrder, self.patients // 2):
+                lines = [(rng.choice(self.menu), rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+                items.extend((oid, mid, q, p) for (mid, p), q in lines)
+                created = self._ago(90)
+                paid = rng.random() < 0.6
+                yield CanteenOrder(
+                    id=oid, user_id=rng.choice(self.guardians), patient_id=rng.choice(self.patient_ids),
+                    status="paid" if paid else "pending", total_cents=sum(p * q for (_, p), q in lines),
+                    created_at=created, paid_at=created + timedelta(minutes=5) if paid else None,
+                )
+        self._write(CanteenOrder, orders())
+        self._write(CanteenOrderItem, (
+            CanteenOrderItem(id=i, order_id=oid, menu_item_id=mid, qty=q, price_cents=p)
+            for i, (oid, mid, q, p) in zip(self._ids(CanteenOrderItem, len(items)), items)
+        ))
+
+    def seed_reports(self):
+        # metadata for one report per ten patients; the first `report_files` also get a file on disk
+        rng = self.rng
+        if self.report_files:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+
+        def rows():
+            for n, rid in enumerate(self._ids(Report, max(1, self.patients // 10))):
+                aid, pid, *_ = rng.choice(self.active)
+                key = f"synthetic-{rid}.pdf"
+                size = checksum = None
+                if n < self.report_files:
+                    body = b"%PDF-1.4\n% synthetic report " + str(rid).encode() + b"\n" + b"0" * rng.randint(1024, 16384)
+                    (self.reports_dir / key).write_bytes(body)
+                    size, checksum = len(body), hashlib.sha256(body).hexdigest()
+                yield Report(
+                    id=rid, patient_id=pid, admission_id=aid, report_type=rng.choice(("lab", "imaging", "billing")),
+                    file_name=f"report-{rid}.pdf", object_key=key, mime_type="application/pdf",
+                    size_bytes=size, checksum_sha256=checksum, uploaded_by=self.staff_app_user_id,
+                    uploaded_at=self._ago(200),
+                )
+        self._write(Report, rows())
+
+    def run(self):
+        with transaction.atomic(using=self.using):
+            self.seed_structure()
+            self.seed_users()
+            self.seed_patients()
+            self.seed_admissions()
+            self.seed_bookings()
+            self.seed_complaints_and_notifications()
+            self.seed_canteen()
+            self.seed_reports()
+            self._reset_sequences()
+        return self.counts
@@ -0,0 +1,26 @@
+# core/testing.py
+from django.apps import apps
+from django.db.models.signals import pre_migrate
+from django.test.runner import DiscoverRunner
+
+from .synthetic import ensure_schema
+
+
+def _create_core_tables(sender, using, **kwargs):
+    ensure_schema(using)
+
+
+class SchemaTestRunner(DiscoverRunner):
+    """
+    The core tables are unmanaged and their index migrations require them,
+    so test databases get the tables (from the model definitions) just
+    before migrate runs.
+    """
+
+    def setup_databases(self, **kwargs):
+        core = apps.get_app_config("core")
+        pre_migrate.connect(_create_core_tables, sender=core, dispatch_uid="core.testing.schema")
+        try:
+            return super().setup_databases(**kwargs)
+        finally:
+            pre_migrate.disconnect(sender=core, dispatch_uid="core.testing.schema")
@@ -1,3 +1,947 @@
-from django.test import TestCase
+import json
+import os
+import runpy
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from . import auth_appuser, counters, dbrouter, metrics, otp as otp_service
+from .jwt_utils import create_appuser_jwt
+from .management.commands import bench_api
+from .migrations._unmanaged import require_tables
+from .models import (
+    Admission, AppUser, Bed, Booking, CanteenOrder, CanteenOrderItem, Department, Doctor, MenuItem, Notification, OtpCode,
+    PatientAccess, PatientRecord, RateCounter, Report, Ward,
+)
+from .occupancy import occupancy_board
+from .pagination import KeysetPagination
+from .serializers import BookingSerializer, SlotTaken
+from .synthetic import has_real_patients
+from .views import SlotsAvailabilityView, _parse_slot_window
+
+# The core tables are unmanaged: core.testing.SchemaTestRunner (TEST_RUNNER)
+# creates them in the test database before migrations run.
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        cls.app_user = AppUser.objects.create(email="guardian@example.com", role="guardian",
+                                              created_at=now)
+        cls.patient = PatientRecord.objects.create(mrn="T-1", first_name="Asha", last_name="Rao",
+                                                   created_at=now)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(self.staff)
+
+
+class AppUserTokenCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        auth_appuser.clear_token_cache()
+        self.addCleanup(auth_appuser.clear_token_cache)
+        self.request = SimpleNamespace(META={"HTTP_AUTHORIZATION": f"Bearer {create_appuser_jwt(self.app_user.pk)}"})
+
+    def authenticate(self):
+        return auth_appuser.get_app_user_from_token(self.request)
+
+    def test_second_request_is_a_cache_hit(self):
+        self.assertEqual(self.authenticate().pk, self.app_user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate().email, "guardian@example.com")
+
+    @override_settings(APPUSER_TOKEN_CACHE_TTL=60)
+    def test_entry_expires_after_the_ttl(self):
+        self.authenticate()
+        later = auth_appuser.time.monotonic() + 61
+        with mock.patch.object(auth_appuser.time, "monotonic", return_value=later), self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_app_user_update_drops_its_cached_tokens(self):
+        self.authenticate()
+        response = self.client.patch(f"/api/appusers/{self.app_user.pk}/", {"is_active": False}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(self.authenticate())
+
+
+class CanteenOrderTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tea = MenuItem.objects.create(name="Tea", category="drink", price_cents=1500)
+        cls.order = CanteenOrder.objects.create(user=cls.app_user, patient=cls.patient,
+                                                total_cents=0, created_at=timezone.now())
+
+    def test_add_item_with_list_filters_in_query_string(self):
+        url = f"/api/canteen-orders/{self.order.pk}/add-item/?status=pending&user={self.app_user.pk}"
+        response = self.client.post(url, {"menu_item": self.tea.pk, "qty": 2}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_cents"], 3000)
+        self.assertEqual(len(response.data["items"]), 1)
+
+    def test_add_items(self):
+        url = f"/api/canteen-orders/{self.order.pk}/add-items/?patient={self.patient.pk}"
+        response = self.client.post(url, {"items": [{"menu_item": self.tea.pk}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_cents"], 1500)
+
+
+class CanteenOrderListTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.tea = MenuItem.objects.create(name="Tea", category="drink", price_cents=1500)
+
+    def add_orders(self, n):
+        now = timezone.now()
+        for i in range(n):
+            patient = PatientRecord.objects.create(mrn=f"C-{now.timestamp()}-{i}", first_name="P",
+                                                   last_name=str(i), created_at=now)
+            ward = Ward.objects.create(name=f"W{patient.pk}")
+            bed = Bed.objects.create(ward=ward, code="1", status="occupied")
+            Admission.objects.create(patient=patient, ward=ward, bed=bed, status="active", admit_time=now)
+            order = CanteenOrder.objects.create(user=self.app_user, patient=patient, total_cents=3000,
+                                                created_at=now)
+            for _ in range(2):
+                CanteenOrderItem.objects.create(order=order, menu_item=self.tea, qty=1, price_cents=1500)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/canteen-orders/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_does_not_grow_with_orders(self):
+        self.add_orders(2)
+        small, _ = self.list_queries()
+        self.add_orders(5)
+        large, response = self.list_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(response.data["count"], 7)
+
+
+class UnmanagedSchemaMigrationTests(TestCase):
+    def test_missing_table_stops_the_migration(self):
+        with self.assertRaisesMessage(RuntimeError, "no_such_table"):
+            require_tables(connection, ["booking", "no_such_table"])
+
+    def test_partial_unique_indexes_are_built(self):
+        with connection.cursor() as cur:
+            booking = connection.introspection.get_constraints(cur, "booking")
+            admission = connection.introspection.get_constraints(cur, "admission")
+        self.assertTrue(booking["booking_active_doctor_slot_uniq"]["unique"])
+        self.assertTrue(admission["admission_active_bed_uniq"]["unique"])
+
+
+class PatientSearchTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()  # cls.patient: Asha Rao, a name-prefix match for "rao"
+        now = timezone.now()
+        cls.exact = PatientRecord.objects.create(mrn="RAO", first_name="Kiran", last_name="Shah", created_at=now)
+        cls.prefix = PatientRecord.objects.create(mrn="RAO-7", first_name="Meena", last_name="Iyer",
+                                                  created_at=now)
+        cls.contains = PatientRecord.objects.create(mrn="T-9", first_name="Barao", last_name="Sen",
+                                                    created_at=now)
+        PatientRecord.objects.create(mrn="T-8", first_name="Nila", last_name="Das", created_at=now)
+
+    def search(self, **params):
+        return self.client.get("/api/patients/search/", params)
+
+    def test_exact_mrn_then_mrn_prefix_then_name_prefix(self):
+        response = self.search(q="rao")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["id"] for r in response.data],
+                         [self.exact.pk, self.prefix.pk, self.patient.pk, self.contains.pk])
+
+    def test_limit_is_clamped(self):
+        for limit in ("-1", "0", "1"):
+            self.assertEqual(len(self.search(q="rao", limit=limit).data), 1)
+        self.assertEqual(len(self.search(q="rao", limit="1000").data), 4)
+        with override_settings(PATIENT_SEARCH_MAX_RESULTS=2):
+            self.assertEqual(len(self.search(q="rao", limit="1000").data), 2)
+        self.assertEqual(self.search(q="rao", limit="abc").status_code, 400)
+
+    def test_short_or_missing_term_is_400(self):
+        self.assertEqual(self.search(q="r").status_code, 400)
+        self.assertEqual(self.search(q="  ").status_code, 400)
+        self.assertEqual(self.search().status_code, 400)
+
+
+class ReportDownloadTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(REPORTS_DIR=Path(tmp.name), REPORTS_SENDFILE_MODE="")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.dir = Path(tmp.name)
+        self.report = self.make("r.pdf", b"0123456789")
+
+    def make(self, name, content):
+        (self.dir / name).write_bytes(content)
+        return Report.objects.create(patient=self.patient, report_type="lab", file_name=name, object_key=name,
+                                     mime_type="application/pdf", size_bytes=len(content),
+                                     checksum_sha256=name.replace(".", "") * 4, uploaded_by=self.staff.pk,
+                                     uploaded_at=timezone.now() - timedelta(days=1))
+
+    def get(self, report=None, **headers):
+        response = self.client.get(f"/api/reports/{(report or self.report).pk}/download/", headers=headers)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_conditional_get(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b"0123456789")
+        self.assertEqual(self.get(**{"If-None-Match": response["ETag"]}).status_code, 304)
+        self.assertEqual(self.get(**{"If-Modified-Since": response["Last-Modified"]}).status_code, 304)
+        older = http_date((self.report.uploaded_at - timedelta(days=1)).timestamp())
+        self.assertEqual(self.get(**{"If-Modified-Since": older}).status_code, 200)
+
+    def test_ranges(self):
+        response = self.get(Range="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(self.body(response), b"2345")
+
+        response = self.get(Range="bytes=-3")
+        self.assertEqual((response.status_code, self.body(response)), (206, b"789"))
+
+        response = self.get(Range="bytes=10-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+        response = self.get(Range="bytes=0-1,4-5")  # multi-range: the whole file
+        self.assertEqual((response.status_code, self.body(response)), (200, b"0123456789"))
+
+    def test_suffix_range_of_an_empty_file_is_416(self):
+        response = self.get(self.make("empty.pdf", b""), Range="bytes=-5")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */0")
+
+
+class SlotWindowTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.department = Department.objects.create(name="Cardiology", created_at=timezone.now())
+        cls.doctor = Doctor.objects.create(full_name="Dr Iyer", department=cls.department)
+
+    def test_parse_rejects_bad_step_and_oversized_grid(self):
+        for params in ({"step": "0"}, {"step": "-5"}, {"step": "x"},
+                       {"start": "00:00", "end": "23:59", "step": "1"}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                _parse_slot_window(params)
+        self.assertEqual(_parse_slot_window({"start": "00:00", "end": "23:59", "step": "5"})[2], 5)
+
+    def test_slots(self):
+        response = self.client.get("/api/slots/", {"doctor": self.doctor.pk, "date": "2030-01-07",
+                                                   "start": "09:00", "end": "10:00", "step": "30"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["slots"], ["09:00", "09:30"])
+        response = self.client.get("/api/slots/", {"doctor": self.doctor.pk, "date": "2030-01-07",
+                                                   "step": "0"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_booking_change_invalidates_the_shared_slot_cache(self):
+        params = {"doctor": self.doctor.pk, "date": "2030-01-07", "start": "09:00", "end": "10:00", "step": "30"}
+        booking = Booking.objects.create(user_id=self.app_user.pk, booking_type="appointment",
+                                         doctor=self.doctor, slot_date="2030-01-07", slot_time="11:00",
+                                         status="pending", created_at=timezone.now())
+        self.assertEqual(self.client.get("/api/slots/", params).data["slots"], ["09:00", "09:30"])
+        with connection.cursor() as cur:  # in the database cache table, so every worker sees it
+            cur.execute("SELECT count(*) FROM django_cache")
+            self.assertGreater(cur.fetchone()[0], 0)
+        response = self.client.patch(f"/api/bookings/{booking.pk}/", {"slot_time": "09:00"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/slots/", params).data["slots"], ["09:30"])
+
+    def test_availability_validates_department_and_doctors(self):
+        url = "/api/slots/availability/"
+        self.assertEqual(self.client.get(url, {"from": "2030-01-07", "department": "x"}).status_code, 400)
+        many = ",".join(str(i) for i in range(1, SlotsAvailabilityView.MAX_DOCTORS + 2))
+        self.assertEqual(self.client.get(url, {"from": "2030-01-07", "doctors": many}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"from": "2030-01-07", "doctors": "1", "step": "-1"}).status_code, 400)
+        response = self.client.get(url, {"from": "2030-01-07", "department": self.department.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([d["doctor"] for d in response.data["doctors"]], [self.doctor.pk])
+
+    async def test_async_slots_view_rejects_bad_step(self):
+        response = await self.async_client.get("/api/slots/", {"doctor": self.doctor.pk,
+                                                               "date": "2030-01-07", "step": "0"})
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingConflictTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.doctor = Doctor.objects.create(full_name="Dr Menon")
+
+    def book(self, slot_time="10:00"):
+        serializer = BookingSerializer(
+            data={"booking_type": "appointment", "patient": self.patient.pk, "doctor": self.doctor.pk,
+                  "slot_date": "2030-01-07", "slot_time": slot_time},
+            context={"request": SimpleNamespace(app_user=self.app_user)},
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_second_booking_of_a_slot_is_409(self):
+        self.book()
+        with self.assertRaises(SlotTaken) as cm:
+            self.book()
+        self.assertEqual(cm.exception.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_unique_index_violation_is_409(self):
+        self.book()
+        # both checks miss the first booking (a concurrent request), the index catches it
+        with mock.patch.object(BookingSerializer, "_slot_is_taken", side_effect=[False, False, True]):
+            with self.assertRaises(SlotTaken):
+                self.book()
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_cancelled_booking_frees_the_slot(self):
+        Booking.objects.create(user_id=self.app_user.pk, doctor=self.doctor, booking_type="appointment",
+                               slot_date="2030-01-07", slot_time="10:00", status="Cancelled",
+                               created_at=timezone.now())
+        self.assertEqual(self.book().status, "pending")
+
+
+class KeysetPaginationTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        base = timezone.now()
+        # pairs of equal created_at: the id breaks the tie
+        cls.bookings = [
+            Booking.objects.create(user_id=cls.app_user.pk, booking_type="lab", slot_date="2030-01-07",
+                                   slot_time="10:00", status="pending",
+                                   created_at=base - timedelta(minutes=i // 2))
+            for i in range(7)
+        ]
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen += [row["id"] for row in response.data["results"]]
+            url, pages = response.data["next"], pages + 1
+        return seen, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = [b.pk for b in sorted(self.bookings, key=lambda b: (b.created_at, b.pk), reverse=True)]
+        for query in ("pagination=keyset&page_size=2", "pagination=keyset&page_size=2&fast=1"):
+            with self.subTest(query=query):
+                seen, pages = self.walk(f"/api/bookings/?{query}")
+                self.assertEqual(seen, expected)
+                self.assertEqual(pages, 4)
+
+    def test_rows_inserted_at_the_head_do_not_shift_pages(self):
+        first = self.client.get("/api/bookings/?pagination=keyset&page_size=3").data
+        Booking.objects.create(user_id=self.app_user.pk, booking_type="lab", slot_date="2030-01-07",
+                               slot_time="11:00", status="pending", created_at=timezone.now())
+        second = self.client.get(first["next"]).data
+        self.assertFalse({r["id"] for r in first["results"]} & {r["id"] for r in second["results"]})
+
+    def test_cursor_starts_an_index_range_scan(self):
+        # the Postgres index comes from migration 0003; build the same one here on SQLite
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cur:
+                cur.execute("CREATE INDEX IF NOT EXISTS booking_created_at_id_idx "
+                            "ON booking (created_at DESC, id DESC)")
+        last = self.bookings[3]
+        after = KeysetPagination()._after(("-created_at", "-id"), [last.created_at, last.pk])
+        qs = Booking.objects.filter(after).order_by("-created_at", "-id")[:26]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cur:
+                cur.execute("SET LOCAL enable_seqscan = off")  # a handful of rows would seq scan
+            self.assertIn("Index Cond: (created_at <=", qs.explain())
+        else:
+            self.assertIn("SEARCH booking USING INDEX booking_created_at_id_idx (created_at<?)", qs.explain())
+        self.assertEqual(list(qs), [b for b in sorted(self.bookings, key=lambda b: (b.created_at, b.pk),
+                                                      reverse=True)
+                                    if (b.created_at, b.pk) < (last.created_at, last.pk)])
+
+    def test_invalid_cursor_is_404(self):
+        for cursor in ("garbage", "WzFd"):  # not base64 JSON / wrong number of values
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(f"/api/bookings/?cursor={cursor}").status_code, 404)
+
+
+class NotificationStreamTests(ApiTestCase):
+    def test_stream_needs_asgi(self):
+        response = self.client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("/api/notifications/poll/", response.json()["detail"])
+
+    async def test_stream_under_asgi(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+
+class PatientAccessTests(ApiTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {create_appuser_jwt(self.app_user.pk)}")
+        self.timeline = f"/api/patients/{self.patient.pk}/timeline/"
+
+    def test_revoke_takes_effect_on_the_next_request(self):
+        access = PatientAccess.objects.create(user=self.app_user, patient=self.patient, relationship="parent")
+        self.assertEqual(self.client.get(self.timeline).status_code, 200)
+        # revoked elsewhere (another worker, the admin, SQL): no cache to go stale
+        PatientAccess.objects.filter(pk=access.pk).delete()
+        self.assertEqual(self.client.get(self.timeline).status_code, 404)
+
+    def test_grant_takes_effect_on_the_next_request(self):
+        self.assertEqual(self.client.get(self.timeline).status_code, 404)
+        PatientAccess.objects.create(user=self.app_user, patient=self.patient)
+        self.assertEqual(self.client.get(self.timeline).status_code, 200)
+
+
+class NotificationTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.sender = AppUser.objects.create(username="staff", role="staff", created_at=now)  # maps to cls.staff
+        cls.other = AppUser.objects.create(email="other@example.com", role="guardian", created_at=now)
+        ward = Ward.objects.create(name="Ward A")
+        bed = Bed.objects.create(ward=ward, code="A1", status="occupied")
+        Admission.objects.create(patient=cls.patient, ward=ward, bed=bed, status="active", admit_time=now)
+        PatientAccess.objects.create(user=cls.app_user, patient=cls.patient)  # sees broadcasts
+
+        def note(target, age):
+            return Notification.objects.create(created_by=cls.sender, target_user=target, title="t",
+                                               message="m", created_at=now - age)
+        cls.own_old = note(cls.app_user, timedelta(hours=2))
+        cls.own_new = note(cls.app_user, timedelta(0))
+        cls.others = note(cls.other, timedelta(hours=2))
+        cls.broadcast = note(None, timedelta(hours=2))
+        cls.cutoff = (now - timedelta(hours=1)).isoformat()
+
+    def setUp(self):
+        super().setUp()
+        self.guardian = APIClient()
+        self.guardian.credentials(HTTP_AUTHORIZATION=f"Bearer {create_appuser_jwt(self.app_user.pk)}")
+
+    def unread(self):
+        return set(Notification.objects.filter(read_at__isnull=True).values_list("pk", flat=True))
+
+    def mark(self, client, body):
+        return client.post("/api/notifications/mark-read/", body, format="json")
+
+    def test_inbox_is_one_query(self):
+        self.addCleanup(auth_appuser.clear_token_cache)
+        self.guardian.get("/api/notifications/unread-count/")  # warms the token cache: auth needs no query
+        with self.assertNumQueries(1):
+            response = self.guardian.get("/api/notifications/?pagination=keyset")
+        # targeted at them plus the broadcast (their patient is admitted), newest first
+        self.assertEqual([r["id"] for r in response.data["results"]],
+                         [self.own_new.pk, self.broadcast.pk, self.own_old.pk])
+        with self.assertNumQueries(1):
+            response = self.guardian.get("/api/notifications/unread-count/")
+        self.assertEqual(response.data, {"unread": 3})
+
+    def test_ids_mark_only_the_callers_targeted_rows(self):
+        response = self.mark(self.guardian, {"ids": [self.own_old.pk, self.others.pk, self.broadcast.pk]})
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(self.unread(), {self.own_new.pk, self.others.pk, self.broadcast.pk})
+
+    def test_before_skips_broadcasts_and_newer_rows(self):
+        response = self.mark(self.guardian, {"before": self.cutoff})
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(self.unread(), {self.own_new.pk, self.others.pk, self.broadcast.pk})
+
+    def test_staff_before_needs_a_target_user(self):
+        self.assertEqual(self.mark(self.client, {"before": self.cutoff}).status_code, 400)
+        self.assertEqual(len(self.unread()), 4)
+        response = self.mark(self.client, {"before": self.cutoff, "target_user": self.other.pk})
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(self.unread(), {self.own_old.pk, self.own_new.pk, self.broadcast.pk})
+
+    @override_settings(NOTIFICATION_FANOUT_BATCH_SIZE=2)
+    def test_fan_out_inserts_in_batches(self):
+        now = timezone.now()
+        extra = [AppUser.objects.create(email=f"g{i}@example.com", created_at=now) for i in range(3)]
+        inactive = AppUser.objects.create(email="gone@example.com", is_active=False, created_at=now)
+        ids = [self.app_user.pk, self.other.pk, inactive.pk] + [u.pk for u in extra]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/notifications/fan-out/",
+                                        {"title": "Visiting hours", "message": "m", "app_users": ids},
+                                        format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {"created": 5})
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "notification"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Notification.objects.filter(title="Visiting hours").count(), 5)
+        self.assertFalse(Notification.objects.filter(title="Visiting hours", target_user=inactive).exists())
+
+
+class AdmissionBedConflictTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        cls.ward = Ward.objects.create(name="Ward A")
+        cls.bed = Bed.objects.create(ward=cls.ward, code="A1", status="available")
+        cls.other_bed = Bed.objects.create(ward=cls.ward, code="A2", status="available")
+        cls.other_patient = PatientRecord.objects.create(mrn="T-2", first_name="Ravi", last_name="Das",
+                                                         created_at=now)
+
+    def admit(self, patient, bed, query=""):
+        return self.client.post(f"/api/admissions/admit/{query}",
+                                {"patient": patient.pk, "bed": bed.pk}, format="json")
+
+    def plain(self, patient, bed):
+        return {"patient": patient.pk, "ward": self.ward.pk, "bed": bed.pk, "status": "active",
+                "admit_time": timezone.now().isoformat()}
+
+    def test_admit_to_an_occupied_bed_is_409(self):
+        response = self.admit(self.patient, self.bed, query="?status=discharged")  # list filters ignored
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["bed_code"], "A1")
+        response = self.admit(self.other_patient, self.bed)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("bed", response.data)
+
+    def test_plain_create_and_update_onto_an_occupied_bed_are_409(self):
+        self.assertEqual(self.admit(self.patient, self.bed).status_code, 201)
+        response = self.client.post("/api/admissions/", self.plain(self.other_patient, self.bed), format="json")
+        self.assertEqual(response.status_code, 409)
+
+        response = self.client.post("/api/admissions/", self.plain(self.other_patient, self.other_bed),
+                                    format="json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(f"/api/admissions/{response.data['id']}/", {"bed": self.bed.pk},
+                                     format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Admission.objects.filter(bed=self.bed).count(), 1)
+
+    def test_transfer_and_discharge(self):
+        first = self.admit(self.patient, self.bed).data["id"]
+        second = self.admit(self.other_patient, self.other_bed).data["id"]
+        response = self.client.post(f"/api/admissions/{second}/transfer/", {"bed": self.bed.pk}, format="json")
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(f"/api/admissions/{first}/discharge/?ward={self.ward.pk}", {}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f"/api/admissions/{second}/transfer/", {"bed": self.bed.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Bed.objects.get(pk=self.other_bed.pk).status, "available")
+
+
+class OccupancyBoardTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cardio = Department.objects.create(name="Cardiology", created_at=timezone.now())
+        ortho = Department.objects.create(name="Orthopaedics", created_at=timezone.now())
+        cls.ward_a = Ward.objects.create(name="A", department=cardio)
+        ward_b = Ward.objects.create(name="B", department=ortho)
+        bed = Bed.objects.create(ward=cls.ward_a, code="A1", status="Occupied")  # any case
+        Bed.objects.create(ward=cls.ward_a, code="A2", status="occupied")
+        Bed.objects.create(ward=cls.ward_a, code="A3", status="available")
+        Bed.objects.create(ward=ward_b, code="B1", status="reserved")
+        Bed.objects.create(ward=ward_b, code="B2", status="maintenance")
+        Admission.objects.create(patient=cls.patient, ward=cls.ward_a, bed=bed, status="active",
+                                 admit_time=timezone.now())
+
+    def board(self, **params):
+        response = self.client.get("/api/wards/occupancy/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @override_settings(OCCUPANCY_CACHE_TTL=0)
+    def test_counts_by_status_and_department(self):
+        with self.assertNumQueries(3):
+            occupancy_board()
+        board = self.board()
+        self.assertEqual(board["totals"], {"available": 1, "occupied": 2, "reserved": 1, "other": 1, "total": 5})
+        self.assertEqual([d["name"] for d in board["departments"]], ["Cardiology", "Orthopaedics"])
+
+        ward = self.board(department=self.ward_a.department_id)["departments"][0]["wards"][0]
+        self.assertEqual(ward["totals"], {"available": 1, "occupied": 2, "reserved": 0, "other": 0, "total": 3})
+        self.assertEqual([(b["bed_code"], b["patient"]["name"]) for b in ward["occupied_beds"]],
+                         [("A1", "Asha Rao")])
+
+
+class PatientTimelineTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        at = timezone.now().replace(microsecond=0)
+        ward = Ward.objects.create(name="Ward B")
+        bed = Bed.objects.create(ward=ward, code="B1", status="occupied")
+        # several kinds share timestamps: (at, kind, id) orders them
+        Admission.objects.create(patient=cls.patient, ward=ward, bed=bed, admit_time=at, status="active")
+        for i in range(4):
+            Booking.objects.create(user_id=cls.app_user.pk, patient=cls.patient, booking_type="lab",
+                                   slot_date="2030-01-07", slot_time="10:00", status="pending",
+                                   created_at=at - timedelta(hours=i % 2))
+            Report.objects.create(patient=cls.patient, report_type="lab", file_name="r.pdf", object_key="r.pdf",
+                                  mime_type="application/pdf", uploaded_by=0, uploaded_at=at - timedelta(hours=i % 2))
+
+    def entries(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [(r["type"], r["id"]) for r in response.data["results"]], response.data["next"]
+
+    def test_cursor_pages_match_the_full_timeline(self):
+        url = f"/api/patients/{self.patient.pk}/timeline/"
+        everything, next_url = self.entries(url)
+        self.assertIsNone(next_url)
+        self.assertEqual(len(everything), 9)
+        newest = Report.objects.order_by("-uploaded_at", "-id").first()
+        self.assertEqual(everything[0], ("report", newest.pk))  # "report" > "booking" > "admission"
+
+        walked, next_url = [], f"{url}?page_size=2"
+        while next_url:
+            page, next_url = self.entries(next_url)
+            walked += page
+        self.assertEqual(walked, everything)
+
+    def test_types_filter_and_bad_cursor(self):
+        url = f"/api/patients/{self.patient.pk}/timeline/"
+        rows, _ = self.entries(f"{url}?types=admission")
+        self.assertEqual([kind for kind, _ in rows], ["admission"])
+        self.assertEqual(self.client.get(f"{url}?types=visit").status_code, 400)
+        self.assertEqual(self.client.get(f"{url}?cursor=WzFd").status_code, 400)
+
+
+class FastListTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(3):
+            Booking.objects.create(user_id=cls.app_user.pk, patient=cls.patient, booking_type="lab",
+                                   slot_date="2030-01-07", slot_time="10:00", status="pending",
+                                   created_at=timezone.now() - timedelta(minutes=i))
+
+    def test_fast_list_matches_serializer_and_counts_the_plain_queryset(self):
+        plain = self.client.get("/api/bookings/?page_size=2").json()
+        with CaptureQueriesContext(connection) as queries:
+            fast = self.client.get("/api/bookings/?page_size=2&fast=1").json()
+        self.assertEqual(fast["count"], 3)
+        self.assertEqual(fast["results"], plain["results"])
+        counts = [q["sql"] for q in queries.captured_queries if "COUNT(*)" in q["sql"]]
+        self.assertEqual(len(counts), 1)
+        self.assertNotIn("SELECT COUNT(*) FROM (SELECT", counts[0])
+
+    async def test_async_fast_list(self):
+        ward = await Ward.objects.acreate(name="Ward C")
+        for code in ("C1", "C2", "C3"):
+            bed = await Bed.objects.acreate(ward=ward, code=code, status="occupied")
+            await Admission.objects.acreate(patient=self.patient, ward=ward, bed=bed, status="active",
+                                            admit_time=timezone.now())
+        await self.async_client.aforce_login(self.staff)
+        plain = await self.async_client.get("/api/admissions/?page_size=2")
+        fast = await self.async_client.get("/api/admissions/?page_size=2&fast=1")
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.json()["count"], 3)
+        self.assertEqual(fast.json()["results"], plain.json()["results"])
+
+
+class AsyncViewParityTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        ward = Ward.objects.create(name="Ward D")
+        for code in ("D1", "D2"):
+            bed = Bed.objects.create(ward=ward, code=code, status="occupied")
+            Admission.objects.create(patient=cls.patient, ward=ward, bed=bed, status="active", admit_time=now)
+        Bed.objects.create(ward=ward, code="D3", status="free")
+        PatientAccess.objects.create(user=cls.app_user, patient=cls.patient)
+        sender = AppUser.objects.create(username="staff", role="staff", created_at=now)
+        Notification.objects.create(created_by=sender, target_user=cls.app_user, title="t", message="m",
+                                    created_at=now)
+        Notification.objects.create(created_by=sender, title="all", message="m",
+                                    created_at=now - timedelta(hours=1))
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(auth_appuser.clear_token_cache)
+        self.bearer = {"Authorization": f"Bearer {create_appuser_jwt(self.app_user.pk)}"}
+
+    async def both(self, url, login=False, headers=None):
+        sync_client = APIClient()
+        if login:
+            await sync_to_async(sync_client.force_login)(self.staff)
+            await self.async_client.aforce_login(self.staff)
+        sync = await sync_to_async(sync_client.get)(url, headers=headers)
+        asynchronous = await self.async_client.get(url, headers=headers)
+        self.assertNotIsInstance(asynchronous, Response)  # served by core.async_views, not the fallback
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        self.assertEqual(asynchronous.json(), sync.json())
+        return sync.status_code
+
+    async def test_staff_lists_match(self):
+        for url in ("/api/admissions/", "/api/admissions/?status=active&page_size=1",
+                    "/api/beds/", "/api/beds/?status=free", "/api/notifications/"):
+            with self.subTest(url=url):
+                self.assertEqual(await self.both(url, login=True), 200)
+
+    async def test_guardian_inbox_matches(self):
+        for url in ("/api/notifications/", "/api/notifications/?pagination=keyset"):
+            with self.subTest(url=url):
+                self.assertEqual(await self.both(url, headers=self.bearer), 200)
+
+    async def test_permissions_match(self):
+        # IsAuthenticatedOrReadOnly lets anyone list wards and beds; the inbox needs a login
+        for url, status in (("/api/admissions/", 200), ("/api/beds/", 200), ("/api/notifications/", 403)):
+            with self.subTest(url=url):
+                self.assertEqual(await self.both(url), status)
+        bad_token = {"Authorization": "Bearer not-a-jwt"}
+        self.assertEqual(await self.both("/api/notifications/", headers=bad_token), 403)
+
+class DbPoolSettingsTests(TestCase):
+    def load_settings(self, **env):
+        env.setdefault("DATABASE_URL", "postgres://hv:pw@db.internal:5432/healthvault")
+        # load_dotenv(override=True) would let a local .env win over the patched environment
+        with mock.patch.dict(os.environ, env), mock.patch("dotenv.load_dotenv"):
+            return runpy.run_path(str(Path(__file__).resolve().parent.parent / "healthvault" / "settings.py"))
+
+    def test_db_pool_psycopg_configures_the_pool(self):
+        db = self.load_settings(DB_POOL="psycopg", DB_POOL_MIN_SIZE="3", DB_POOL_MAX_SIZE="7",
+                                DB_POOL_TIMEOUT="2.5")["DATABASES"]["default"]
+        self.assertEqual(db["CONN_MAX_AGE"], 0)
+        pool = db["OPTIONS"]["pool"]
+        self.assertEqual((pool["min_size"], pool["max_size"], pool["timeout"]), (3, 7, 2.5))
+
+    def test_persistent_connections_without_db_pool(self):
+        db = self.load_settings(DB_POOL="", DB_CONN_MAX_AGE="120")["DATABASES"]["default"]
+        self.assertEqual(db["CONN_MAX_AGE"], 120)
+        self.assertNotIn("pool", db.get("OPTIONS", {}))
+
+
+class QueryMetricsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def test_requests_are_counted_per_route_with_their_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/wards/occupancy/").status_code, 200)
+        queries = len(ctx.captured_queries)  # read now: the next request resets connection.queries
+        self.client.get("/api/slots/", {"doctor": "x"})
+        routes = self.client.get("/api/metrics/").data["routes"]
+        self.assertEqual(routes["ward.occupancy"]["requests"], 1)
+        self.assertEqual(routes["ward.occupancy"]["queries"]["max"], queries)
+        self.assertEqual(routes["slots"]["requests"], 1)
+
+    @override_settings(METRICS_NPLUSONE_THRESHOLD=3)
+    def test_repeated_statement_is_flagged_as_n_plus_one(self):
+        recorder = metrics.QueryRecorder()
+        for _ in range(3):
+            recorder(lambda *args: None, "SELECT 1 FROM bed WHERE id = %s", [1], False, {})
+        metrics.registry.record("bed.list", 200, 12.0, recorder)
+        stats = metrics.registry.snapshot()["bed.list"]
+        self.assertEqual(stats["queries"], {"avg": 3.0, "max": 3})
+        self.assertEqual(stats["nplusone"]["requests"], 1)
+        self.assertEqual(stats["nplusone"]["samples"], [{"sql": "SELECT 1 FROM bed WHERE id = %s", "times": 3}])
+
+
+class BenchBaselineTests(TestCase):
+    def test_committed_baseline_covers_the_scenarios(self):
+        baseline = json.loads(bench_api.DEFAULT_BASELINE.read_text())
+        self.assertIn("admissions.list", baseline["endpoints"])
+        for row in baseline["endpoints"].values():
+            self.assertLessEqual(row["p50"], row["p95"])
+
+    def test_compare_flags_slower_p95_and_extra_queries(self):
+        compare = bench_api.Command()._compare
+        baseline = {"a": {"p95": 10.0, "queries": 3}}
+        self.assertEqual(compare({"a": {"p95": 12.0, "queries": 3}}, baseline, 0.25, 2.0), [])
+        self.assertEqual(len(compare({"a": {"p95": 13.0, "queries": 4}}, baseline, 0.25, 2.0)), 2)
+        self.assertEqual(compare({"b": {"p95": 99.0, "queries": 9}}, baseline, 0.25, 2.0), [])
+
+
+class SyntheticDataTests(TestCase):
+    def test_has_real_patients_checks_the_given_alias(self):
+        with mock.patch.object(PatientRecord.objects, "using", wraps=PatientRecord.objects.using) as using:
+            self.assertFalse(has_real_patients("default"))
+        using.assert_called_once_with("default")
+        PatientRecord.objects.create(mrn="REAL-1", first_name="A", last_name="B", created_at=timezone.now())
+        self.assertTrue(has_real_patients("default"))
+
+
+class RateCounterTests(TestCase):
+    def test_hit_counts_and_restarts_after_expiry(self):
+        self.assertEqual([counters.hit("k", 60) for _ in range(3)], [1, 2, 3])
+        self.assertEqual(counters.value("k"), 3)
+        RateCounter.objects.filter(key="k").update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(counters.value("k"), 0)
+        self.assertEqual(counters.hit("k", 60), 1)
+        self.assertEqual(list(counters.expired()), [])
+
+
+class CompactTablesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        old, recent = now - timedelta(days=2), now - timedelta(minutes=5)
+
+        def code(expires_at, consumed_at=None):
+            return OtpCode.objects.create(destination="a@example.com", purpose="login", code_hash="x",
+                                          salt="y", expires_at=expires_at, consumed_at=consumed_at)
+        self.stale_codes = [code(old), code(now + timedelta(minutes=5), consumed_at=old), code(old), code(old)]
+        self.live_codes = [code(now + timedelta(minutes=5)), code(recent)]  # recent: inside the grace period
+
+        def note(read_at):
+            return Notification.objects.create(created_by=self.app_user, target_user=self.app_user, title="t",
+                                               message="m", created_at=old, read_at=read_at)
+        self.stale_notes = [note(now - timedelta(days=100))]
+        self.kept_notes = [note(now - timedelta(days=10)), note(None)]
+
+        counters.hit("live", 60)
+        counters.hit("gone", 60)
+        RateCounter.objects.filter(key="gone").update(expires_at=now - timedelta(seconds=1))
+
+    def test_deletes_only_rows_past_retention_in_batches(self):
+        out = StringIO()
+        call_command("compact_tables", "--batch-size", "3", stdout=out)
+        self.assertIn("otp                     4 rows deleted in 2 batch(es)", out.getvalue())
+        self.assertEqual(set(OtpCode.objects.values_list("pk", flat=True)), {c.pk for c in self.live_codes})
+        self.assertEqual(set(Notification.objects.values_list("pk", flat=True)), {n.pk for n in self.kept_notes})
+        self.assertEqual(list(RateCounter.objects.values_list("key", flat=True)), ["live"])
+
+    def test_max_batches_leaves_the_rest_for_the_next_run(self):
+        out = StringIO()
+        call_command("compact_tables", "--only", "otp", "--batch-size", "3", "--max-batches", "1", stdout=out)
+        self.assertIn("more left, run again", out.getvalue())
+        self.assertEqual(OtpCode.objects.count(), 3)
+        call_command("compact_tables", "--only", "otp", "--dry-run", stdout=out)
+        self.assertIn("otp                     1 rows would be deleted", out.getvalue())
+
+
+@override_settings(OTP_MAX_ATTEMPTS=3, OTP_SEND_LIMIT=2, OTP_VERIFY_LIMIT=5, OTP_SEND_WINDOW=900)
+class OtpTests(ApiTestCase):
+    destination = "Guardian@Example.com"
+
+    def wrong(self, code):
+        return "000000" if code != "000000" else "111111"
+
+    def test_code_verifies_once_consumed(self):
+        code, _ = otp_service.issue(self.destination, "login")
+        otp = otp_service.verify(self.destination, ["login"], code, consume=True)
+        self.assertIsNotNone(otp.consumed_at)
+        with self.assertRaises(otp_service.OtpNotFound):
+            otp_service.verify(self.destination, ["login"], code)
+
+    def test_last_wrong_guess_burns_the_code(self):
+        code, otp = otp_service.issue(self.destination, "login")
+        for _ in range(3):
+            with self.assertRaises(otp_service.OtpInvalid):
+                otp_service.verify(self.destination, ["login"], self.wrong(code))
+        self.assertTrue(OtpCode.objects.filter(pk=otp.pk, consumed_at__isnull=False).exists())
+        with self.assertRaises(otp_service.OtpNotFound):
+            otp_service.verify(self.destination, ["login"], code)
+
+    def test_attempts_are_counted_before_the_code_is_checked(self):
+        # requests that counted themselves concurrently: the right code is refused too
+        code, otp = otp_service.issue(self.destination, "login")
+        for _ in range(3):
+            counters.hit(otp_service._attempts_key(otp.pk), 300)
+        with mock.patch.object(otp_service, "check_code") as check:
+            with self.assertRaises(otp_service.OtpLocked):
+                otp_service.verify(self.destination, ["login"], code)
+        check.assert_not_called()
+        self.assertTrue(OtpCode.objects.filter(pk=otp.pk, consumed_at__isnull=False).exists())
+
+    def test_send_limit(self):
+        otp_service.issue(self.destination, "login")
+        otp_service.issue(self.destination.lower(), "login")  # same destination
+        with self.assertRaises(otp_service.OtpThrottled) as cm:
+            otp_service.issue(self.destination, "login")
+        self.assertGreater(cm.exception.retry_after, 0)
+
+    def test_verify_limit_returns_429(self):
+        code, _ = otp_service.issue(self.destination, "login")
+        body = {"destination": self.destination, "purpose": "login", "code": self.wrong(code)}
+        statuses = [self.client.post("/api/otp/verify/", body, format="json").status_code for _ in range(6)]
+        # 3 wrong guesses burn the code (400 / 404), the 6th verify call is over the limit
+        self.assertEqual(statuses[:3], [400, 400, 400])
+        self.assertEqual(statuses[-1], 429)
+        response = self.client.post("/api/otp/verify/", body, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+class ReplicaRoutingTests(ApiTestCase):
+    # one pretend replica; pick_replica is mocked, so the queries still run on default
+    def setUp(self):
+        super().setUp()
+        for patch in (mock.patch.object(dbrouter, "replica_aliases", return_value=["replica1"]),
+                      mock.patch.object(dbrouter, "pick_replica", return_value=None)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_router_sends_core_reads_to_the_replica_until_a_write(self):
+        state = dbrouter._RoutingState(None)
+        state.replica = "replica1"
+        token = dbrouter._state.set(state)
+        try:
+            router = dbrouter.ReplicaRouter()
+            self.assertEqual(router.db_for_read(PatientRecord), "replica1")
+            for model in (AppUser, PatientAccess, RateCounter, User):
+                self.assertEqual(router.db_for_read(model), "default")
+            self.assertEqual(router.db_for_write(PatientRecord), "default")
+            self.assertEqual(router.db_for_read(PatientRecord), "default")
+        finally:
+            dbrouter._state.reset(token)
+
+    def test_a_write_pins_that_client_to_the_primary(self):
+        tea = MenuItem.objects.create(name="Tea", category="drink", price_cents=1500)
+        order = CanteenOrder.objects.create(user=self.app_user, patient=self.patient,
+                                            total_cents=0, created_at=timezone.now())
+        other = APIClient()
+        other.force_login(self.staff)  # a second session
+
+        self.client.get("/api/admissions/")
+        self.assertEqual(dbrouter.pick_replica.call_count, 1)
+        response = self.client.post(f"/api/canteen-orders/{order.pk}/add-item/",
+                                    {"menu_item": tea.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RateCounter.objects.filter(key__startswith="replica:pin:").count(), 1)
+
+        self.client.get("/api/admissions/")  # pinned: no replica picked
+        self.assertEqual(dbrouter.pick_replica.call_count, 1)
+        other.get("/api/admissions/")
+        self.assertEqual(dbrouter.pick_replica.call_count, 2)
+
+        RateCounter.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.client.get("/api/admissions/")
+        self.assertEqual(dbrouter.pick_replica.call_count, 3)
+
+    def test_occupancy_board_reads_the_primary(self):
+        self.assertEqual(self.client.get("/api/wards/occupancy/").status_code, 200)
+        self.assertEqual(self.client.get("/api/reports/").status_code, 200)
+        self.assertEqual(dbrouter.pick_replica.call_count, 1)  # reports only
@@ -0,0 +1,108 @@
+# core/timeline.py
+import base64
+import json
+
+from django.db.models import BigIntegerField, CharField, F, Q, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils.dateparse import parse_datetime
+
+from .models import Admission, AdmissionTask, Booking, Complaint, MedicalOrder, Report
+
+# Patient chart timeline (PatientRecordViewSet.timeline): admissions, tasks,
+# reports, medical orders, bookings and complaints as one stream, newest first.
+# Every source is projected to the same columns and the page is fetched with a
+# single UNION ALL ... ORDER BY at DESC, kind DESC, id DESC LIMIT n+1.
+# Paging is keyset on (at, kind, row_id): the cursor predicate is pushed into
+# each branch of the union so every branch is an index range scan.
+
+KINDS = ("admission", "task", "report", "order", "booking", "complaint")
+COLUMNS = ("kind", "row_id", "at", "title", "status", "admission_ref")
+
+
+def _sources(patient_id):
+    """kind -> (queryset, timestamp field, title, status, admission id) expressions"""
+    return {
+        "admission": (
+            Admission.objects.filter(patient_id=patient_id),
+            "admit_time", F("ward__name"), F("status"), F("id"),
+        ),
+        "task": (
+            AdmissionTask.objects.filter(admission__patient_id=patient_id),
+            "created_at", F("title"), F("status"), F("admission_id"),
+        ),
+        "report": (
+            Report.objects.filter(patient_id=patient_id),
+            "uploaded_at", F("report_type"), Value(None, output_field=CharField()), F("admission_id"),
+        ),
+        "order": (
+            MedicalOrder.objects.filter(admission__patient_id=patient_id),
+            "created_at", F("order_type"), F("status"), F("admission_id"),
+        ),
+        "booking": (
+            Booking.objects.filter(patient_id=patient_id),
+            "created_at", F("booking_type"), F("status"), Value(None, output_field=BigIntegerField()),
+        ),
+        "complaint": (
+            # complaints without created_at can't be placed on a timeline
+            Complaint.objects.filter(patient_id=patient_id, created_at__isnull=False),
+            "created_at", Coalesce("category", Value("complaint")), F("status"), F("admission_id"),
+        ),
+    }
+
+
+def _after(kind, at_field, cursor):
+    # rows strictly after (at, kind, row_id) in DESC order; kind is fixed per branch
+    at, c_kind, c_id = cursor
+    if kind < c_kind:
+        return Q(**{f"{at_field}__lte": at})
+    if kind > c_kind:
+        return Q(**{f"{at_field}__lt": at})
+    return Q(**{f"{at_field}__lt": at}) | Q(**{at_field: at, "id__lt": c_id})
+
+
+def encode_cursor(row):
+    raw = json.dumps([row["at"].isoformat(), row["kind"], row["row_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(raw):
+    """Returns (at, kind, row_id) or raises ValueError."""
+    try:
+        at, kind, row_id = json.loads(base64.urlsafe_b64decode(raw.encode("ascii")).decode("utf-8"))
+    except (TypeError, UnicodeError, json.JSONDecodeError) as e:
+        raise ValueError(str(e))
+    at = parse_datetime(at) if isinstance(at, str) else None
+    if at is None or kind not in KINDS or not isinstance(row_id, int):
+        raise ValueError("bad cursor")
+    return at, kind, row_id
+
+
+def patient_timeline(patient_id, kinds=None, cursor=None, limit=50):
+    """
+    One page of the timeline: (rows, has_more). Each row is a dict with
+    kind, row_id, at, title, status and admission_ref.
+    """
+    parts = []
+    for kind, (qs, at_field, title, status, adm) in _sources(patient_id).items():
+        if kinds and kind not in kinds:
+            continue
+        if cursor:
+            qs = qs.filter(_after(kind, at_field, cursor))
+        parts.append(
+            qs.order_by()
+            .annotate(
+                tl_kind=Value(kind, output_field=CharField()),
+                tl_id=F("id"),
+                tl_at=F(at_field),
+                tl_title=Cast(title, CharField()),
+                tl_status=Cast(status, CharField()),
+                tl_admission=adm,
+            )
+            .values_list("tl_kind", "tl_id", "tl_at", "tl_title", "tl_status", "tl_admission")
+        )
+    if not parts:
+        return [], False
+
+    qs = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    rows = [dict(zip(COLUMNS, r)) for r in qs.order_by("-tl_at", "-tl_kind", "-tl_id")[:limit + 1]]
+    return rows[:limit], len(rows) > limit
@@ -1,15 +1,37 @@
+import asyncio
+import json
+import os
 from pathlib import Path
-import random
+from types import SimpleNamespace
 import hashlib, uuid
 from .jwt_utils import create_appuser_jwt
+from .auth_appuser import aget_app_user_from_token, invalidate_app_user
+from .search import max_results as max_search_results, search_patients
+from .availability import free_slots, invalidate_doctor_slots
+from .inbox import app_user_id_for, inbox_queryset, unread_count as inbox_unread_count
+from .notify_hub import hub as notify_hub
+from .access import get_access_scope
+from .occupancy import occupancy_board, invalidate_occupancy
+from . import admissions as admission_flow
+from .fastlist import FastListMixin, full_name
+from .metrics import registry as metrics_registry
+from .dbpool import connection_stats, prometheus_gauges as db_prometheus_gauges
+from . import otp as otp_service
+from .auth_appuser import token_cache_stats
+from .timeline import KINDS as TIMELINE_KINDS, patient_timeline, encode_cursor as encode_timeline_cursor, decode_cursor as decode_timeline_cursor
 from rest_framework.permissions import AllowAny
 from rest_framework.authtoken.models import Token
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.conf import settings
-from django.http import FileResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
 from rest_framework.decorators import action
+from rest_framework.utils.urls import replace_query_param
 from datetime import  time, timedelta, datetime
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.hashers import make_password, check_password  
@@ -22,13 +44,14 @@ from django.db import transaction
 from django.db import IntegrityError
 from django.conf import settings    
 from rest_framework.exceptions import ValidationError
-from .permissions import StaffWriteOnly, IsTargetUserOrStaff
+from .permissions import StaffWriteOnly, IsTargetUserOrStaff, IsAuthenticatedOrAppUser
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from rest_framework.permissions import IsAuthenticated
-from .models import Department, Doctor, Booking, Admission, AdmissionTask, Report, Complaint, Notification, MenuItem, CanteenOrder, CanteenOrderItem, PatientRecord, PatientAccess, OtpCode, MedicalOrder, AppUser, Bed, Ward
+from .models import Department, Doctor, Booking, Admission, AdmissionTask, Report, Complaint, Notification, MenuItem, CanteenOrder, CanteenOrderItem, PatientRecord, PatientAccess, MedicalOrder, AppUser, Bed, Ward
 from django.utils import timezone
-from .serializers import DepartmentSerializer, DoctorSerializer, BookingSerializer, AdmissionSerializer, AdmissionTaskSerializer, ReportSerializer, ComplaintSerializer, NotificationSerializer, MenuItemSerializer, CanteenOrderSerializer,  CanteenOrderItemSerializer , PatientRecordSerializer, PatientAccessSerializer, OtpSendSerializer, OtpVerifySerializer, SignupSerializer, LoginSerializer, MedicalOrderSerializer, AppUserSerializer, ReportUploadSerializer, WardSerializer, BedSerializer
+from django.utils.dateparse import parse_datetime
+from .serializers import DepartmentSerializer, DoctorSerializer, BookingSerializer, AdmissionSerializer, AdmissionTaskSerializer, ReportSerializer, ComplaintSerializer, NotificationSerializer, MenuItemSerializer, CanteenOrderSerializer,  CanteenOrderItemSerializer , PatientRecordSerializer, PatientAccessSerializer, OtpVerifySerializer, SignupSerializer, LoginSerializer, MedicalOrderSerializer, AppUserSerializer, ReportUploadSerializer, WardSerializer, BedSerializer, AdmitSerializer, DischargeSerializer, TransferSerializer
 from .permissions import StaffWriteOnly, IsTargetUserOrStaff
 
 class DepartmentViewSet(viewsets.ModelViewSet):
@@ -52,8 +75,17 @@ class DoctorViewSet(viewsets.ModelViewSet):
             qs = qs.filter(department_id=dept_id)
         return qs
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = BookingSerializer
+    keyset_ordering = ('-created_at', '-id')  # ?pagination=keyset
+    replica_read_actions = ('list', 'retrieve', 'my_bookings')  # core.dbrouter
+    # ?fast=1: same JSON as BookingSerializer, rendered from .values()
+    fast_list_fields = {
+        'id': 'id', 'booking_type': 'booking_type', 'patient': 'patient_id',
+        'department': 'department_id', 'doctor': 'doctor_id',
+        'slot_date': 'slot_date', 'slot_time': 'slot_time', 'status': 'status',
+        'created_at': 'created_at', 'notes': 'notes',
+    }
 
     def get_queryset(self):
         qs = Booking.objects.select_related('patient', 'department', 'doctor').order_by('-created_at')
@@ -75,6 +107,21 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    # keep cached slot availability in step with bookings
+    def perform_create(self, serializer):
+        booking = serializer.save()
+        invalidate_doctor_slots(booking.doctor_id)
+
+    def perform_update(self, serializer):
+        old_doctor_id = serializer.instance.doctor_id
+        booking = serializer.save()
+        invalidate_doctor_slots(old_doctor_id, booking.doctor_id)
+
+    def perform_destroy(self, instance):
+        doctor_id = instance.doctor_id
+        instance.delete()
+        invalidate_doctor_slots(doctor_id)
+
     @action(detail=False, methods=['get'], url_path='my-bookings')
     def my_bookings(self, request):
         patient_id = request.query_params.get('patient')
@@ -84,11 +131,24 @@ class BookingViewSet(viewsets.ModelViewSet):
         data = BookingSerializer(qs, many=True).data
         return Response(data)
     
-class AdmissionViewSet(viewsets.ModelViewSet):
+class AdmissionViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = AdmissionSerializer
+    keyset_ordering = ('-admit_time', '-id')  # ?pagination=keyset
+    replica_read_actions = ('list', 'retrieve')  # core.dbrouter
+    # ?fast=1: same JSON as AdmissionSerializer, labels joined in SQL
+    fast_list_fields = {
+        'id': 'id', 'patient': 'patient_id', 'ward': 'ward_id', 'bed': 'bed_id', 'doctor': 'doctor_id',
+        'status': 'status', 'admit_time': 'admit_time', 'discharge_time': 'discharge_time', 'notes': 'notes',
+        'patient_mrn': 'patient__mrn', 'patient_name': full_name(), 'ward_name': 'ward__name',
+        'bed_code': 'bed__code', 'doctor_name': 'doctor__full_name',
+    }
+    fast_list_skip_null = ('doctor_name',)  # AdmissionSerializer drops it when there's no doctor
+
+    def _base_queryset(self):
+        return Admission.objects.select_related('patient', 'ward', 'bed', 'doctor').order_by('-admit_time')
 
     def get_queryset(self):
-        qs = Admission.objects.select_related('patient', 'ward', 'bed', 'doctor').order_by('-admit_time')
+        qs = self._base_queryset()
 
         # Optional filters
         patient = self.request.query_params.get('patient')
@@ -110,6 +170,48 @@ class AdmissionViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    # the occupancy board (core.occupancy) is cached; any admission change stales it.
+    # A second active admission for a bed is a 409 (core.admissions.save).
+    def perform_create(self, serializer):
+        admission_flow.save(serializer)
+        invalidate_occupancy()
+
+    def perform_update(self, serializer):
+        admission_flow.save(serializer)
+        invalidate_occupancy()
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate_occupancy()
+
+    # ---- clinical events: one round-trip each, Admission + Bed.status in one transaction
+    # POST /api/admissions/admit/  {patient, bed, doctor?, admit_time?, notes?}
+    @action(detail=False, methods=['post'], url_path='admit')
+    def admit(self, request):
+        ser = AdmitSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        adm = admission_flow.admit(**ser.validated_data)
+        adm = self._base_queryset().get(pk=adm.pk)
+        return Response(AdmissionSerializer(adm).data, status=status.HTTP_201_CREATED)
+
+    # POST /api/admissions/<id>/discharge/  {discharge_time?, notes?}
+    @action(detail=True, methods=['post'])
+    def discharge(self, request, pk=None):
+        ser = DischargeSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        adm = admission_flow.discharge(self.get_object(), **ser.validated_data)
+        adm = self._base_queryset().get(pk=adm.pk)
+        return Response(AdmissionSerializer(adm).data)
+
+    # POST /api/admissions/<id>/transfer/  {bed}
+    @action(detail=True, methods=['post'])
+    def transfer(self, request, pk=None):
+        ser = TransferSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        adm = admission_flow.transfer(self.get_object(), ser.validated_data['bed'])
+        adm = self._base_queryset().get(pk=adm.pk)
+        return Response(AdmissionSerializer(adm).data)
+
     @action(detail=False, methods=['get'], url_path='my')
     def my_admissions(self, request):
         patient = request.query_params.get('patient')
@@ -150,6 +252,8 @@ class AdmissionTaskViewSet(viewsets.ModelViewSet):
 
 class ReportViewSet(viewsets.ModelViewSet):
     serializer_class = ReportSerializer
+    keyset_ordering = ("-uploaded_at", "-id")  # ?pagination=keyset
+    replica_read_actions = ("list",)  # core.dbrouter
 
     # Use upload serializer only for the /upload action
     def get_serializer_class(self):
@@ -157,14 +261,6 @@ class ReportViewSet(viewsets.ModelViewSet):
             return ReportUploadSerializer
         return ReportSerializer
 
-    # Map logged-in Django user -> AppUser (by email) — used by the web app
-    def _current_app_user(self):
-        u = self.request.user
-        try:
-            return AppUser.objects.get(email__iexact=getattr(u, "email", "") or "")
-        except AppUser.DoesNotExist:
-            return None
-
     def get_queryset(self):
         qs = (
             Report.objects
@@ -181,30 +277,12 @@ class ReportViewSet(viewsets.ModelViewSet):
         if p.get("type"):
             qs = qs.filter(report_type=p["type"])
 
-        # Access control
-        u = self.request.user
-        if not u.is_authenticated:
-            return Report.objects.none()
-
-        # Staff can see everything (web admin)
-        if u.is_staff:
-            return qs
-
-        # ✅ Mobile path: prefer request.app_user if middleware set it
-        app_user = getattr(self.request, "app_user", None)
-        if app_user:
-            patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                                               .values_list("patient_id", flat=True)
-            return qs.filter(patient_id__in=list(patient_ids))
-
-        # Web app path: fall back to Django-auth → AppUser mapping
-        app_user = self._current_app_user()
-        if not app_user:
+        # Access control: staff see everything; guardians (JWT or web login
+        # mapped by email) see their linked patients via a subquery
+        scope = get_access_scope(self.request)
+        if not scope.is_authenticated and scope.app_user is None:
             return Report.objects.none()
-
-        patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                                           .values_list("patient_id", flat=True)
-        return qs.filter(patient_id__in=list(patient_ids))
+        return scope.filter(qs)
 
     @action(
         detail=False,
@@ -229,23 +307,25 @@ class ReportViewSet(viewsets.ModelViewSet):
 
         original_name = upfile.name
         ext = Path(original_name).suffix or ".pdf"
-        unique_name = f"{uuid.uuid4().hex}{ext}"
-        dest_path = dest_dir / unique_name
-
-        # write file
-        with open(dest_path, "wb") as fh:
-            for chunk in upfile.chunks():
-                fh.write(chunk)
 
-        # checksum
-        sha = hashlib.sha256()
-        with open(dest_path, "rb") as fh:
-            for chunk in iter(lambda: fh.read(8192), b""):
-                sha.update(chunk)
-        checksum = sha.hexdigest()
+        # single pass: hash + count while writing, then atomic rename
+        unique_name, checksum, size_bytes = _store_upload(upfile, dest_dir, ext)
+
+        # same bytes already on disk -> point at the existing object instead
+        # (shared from then on: only delete a file once no report references it)
+        if getattr(settings, "REPORTS_DEDUPLICATE", False):
+            existing = (
+                Report.objects
+                .filter(checksum_sha256=checksum, size_bytes=size_bytes)
+                .values_list("object_key", flat=True)
+                .first()
+            )
+            if existing and existing != unique_name and (dest_dir / existing).exists():
+                (dest_dir / unique_name).unlink(missing_ok=True)
+                unique_name = existing
 
         # uploaded_by is AppUser id when available; keep working for web
-        app_user = getattr(self.request, "app_user", None) or self._current_app_user()
+        app_user = get_access_scope(request).app_user
         uploaded_by = app_user.id if app_user else 0
 
         obj = Report.objects.create(
@@ -255,7 +335,7 @@ class ReportViewSet(viewsets.ModelViewSet):
             file_name=original_name,
             object_key=unique_name,
             mime_type=getattr(upfile, "content_type", "application/pdf") or "application/pdf",
-            size_bytes=getattr(upfile, "size", None),
+            size_bytes=size_bytes,
             checksum_sha256=checksum,
             uploaded_by=uploaded_by,
             uploaded_at=timezone.now(),
@@ -276,12 +356,62 @@ class ReportViewSet(viewsets.ModelViewSet):
         if not path.exists():
             raise Http404("File not found")
 
-        return FileResponse(
-            open(path, "rb"),
-            as_attachment=True,
-            filename=Path(key).name,
-            content_type=getattr(obj, "mime_type", "application/octet-stream"),
+        # conditional GET: checksum is a strong validator, uploaded_at a weak one
+        etag = f'"{obj.checksum_sha256}"' if obj.checksum_sha256 else None
+        last_modified = int(obj.uploaded_at.timestamp()) if obj.uploaded_at else None
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
         )
+        if not_modified is not None:
+            return _with_download_headers(not_modified, etag, last_modified)
+
+        filename = Path(key).name
+        content_type = getattr(obj, "mime_type", None) or "application/octet-stream"
+
+        # let nginx / Apache stream the bytes (they handle Range themselves)
+        mode = getattr(settings, "REPORTS_SENDFILE_MODE", "")
+        if mode in ("x-accel", "x-sendfile"):
+            resp = HttpResponse(content_type=content_type)
+            if mode == "x-accel":
+                prefix = getattr(settings, "REPORTS_ACCEL_PREFIX", "/protected-reports/")
+                resp["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + path.relative_to(base.resolve()).as_posix()
+            else:
+                resp["X-Sendfile"] = str(path)
+            resp["Content-Disposition"] = content_disposition_header(True, filename)
+            return _with_download_headers(resp, etag, last_modified)
+
+        size = path.stat().st_size
+        byte_range = None
+        range_header = request.META.get("HTTP_RANGE")
+        # If-Range: only honour the range when the client's copy is current
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if range_header and (not if_range or if_range == etag):
+            byte_range = _parse_byte_range(range_header, size)
+            if byte_range == "unsatisfiable":
+                resp = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                resp["Content-Range"] = f"bytes */{size}"
+                return _with_download_headers(resp, etag, last_modified)
+
+        if byte_range is None:
+            resp = FileResponse(
+                open(path, "rb"),
+                as_attachment=True,
+                filename=filename,
+                content_type=content_type,
+            )
+            return _with_download_headers(resp, etag, last_modified)
+
+        first, last = byte_range
+        length = last - first + 1
+        resp = StreamingHttpResponse(
+            _iter_file_range(path, first, length),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type=content_type,
+        )
+        resp["Content-Length"] = str(length)
+        resp["Content-Range"] = f"bytes {first}-{last}/{size}"
+        resp["Content-Disposition"] = content_disposition_header(True, filename)
+        return _with_download_headers(resp, etag, last_modified)
 
 
 
@@ -312,22 +442,30 @@ class AppUserViewSet(viewsets.ModelViewSet):
                 Q(username__icontains=q)
             )
         return qs
+
+    # drop cached tokens so edits/deactivation take effect on the next request
+    def perform_update(self, serializer):
+        au = serializer.save()
+        invalidate_app_user(au.id)
+
+    def perform_destroy(self, instance):
+        au_id = instance.id
+        instance.delete()
+        invalidate_app_user(au_id)
     
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # ?fast=1: same JSON as ComplaintSerializer without its four method fields per row
+    fast_list_fields = {
+        'id': 'id', 'patient': 'patient_id', 'admission': 'admission_id', 'ward': 'ward_id', 'bed': 'bed_id',
+        'category': 'category', 'description': 'description', 'status': 'status',
+        'created_at': 'created_at', 'resolved_at': 'resolved_at',
+        'patient_name': full_name(strip_parts=True, blank_as_null=True), 'patient_mrn': 'patient__mrn',
+        'ward_name': 'ward__name', 'bed_code': 'bed__code',
+    }
 
     # ---- helpers ------------------------------------------------------------
-    def _current_app_user(self):
-        """Map logged-in Django user -> AppUser by email (returns None if not found)."""
-        u = self.request.user
-        if not u or not u.is_authenticated or not getattr(u, "email", None):
-            return None
-        try:
-            return AppUser.objects.get(email__iexact=u.email)
-        except AppUser.DoesNotExist:
-            return None
-
     def _active_admission_for(self, patient_id):
         return (
             Admission.objects
@@ -347,29 +485,12 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         if p.get("status"):
             qs = qs.filter(status=p["status"])
 
-        # Scope by role
-        u = self.request.user
-        if not u.is_authenticated:
-            return Complaint.objects.none()
-
-        if u.is_staff:
-            return qs
-
-        # ✅ NEW: Support JWT-based AppUser (mobile)
-        app_user = getattr(self.request, "app_user", None)
-        if app_user:
-            patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                                               .values_list("patient_id", flat=True)
-            return qs.filter(patient_id__in=patient_ids)
-
-        # Original fallback: Django-auth → AppUser mapping (for web app)
-        app_user = self._current_app_user()
-        if not app_user:
+        # Scope by role: staff see all; JWT AppUser (mobile) or web user
+        # mapped by email see their linked patients (see core.access)
+        scope = get_access_scope(self.request)
+        if not scope.is_authenticated and scope.app_user is None:
             return Complaint.objects.none()
-
-        patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                                           .values_list("patient_id", flat=True)
-        return qs.filter(patient_id__in=patient_ids)
+        return scope.filter(qs)
 
     # ---- create -------------------------------------------------------------
     def perform_create(self, serializer):
@@ -391,14 +512,13 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         extra = {"status": "open"}  # default
 
         # ✅ Updated: also allow request.app_user (mobile token)
-        app_user = getattr(self.request, "app_user", None) or self._current_app_user()
+        scope = get_access_scope(self.request)
+        app_user = scope.app_user
 
         # If a guardian/patient is posting, stamp user_id and enforce access
         if app_user:
             extra["user_id"] = app_user.id
-            if patient and not PatientAccess.objects.filter(
-                user_id=app_user.id, patient_id=patient.id
-            ).exists():
+            if patient and not scope.can_access_patient(patient.id):
                 raise PermissionError("You do not have access to this patient.")
 
         serializer.save(
@@ -411,101 +531,52 @@ class ComplaintViewSet(viewsets.ModelViewSet):
     # ---- guardian convenience endpoint -------------------------------------
     @action(detail=False, methods=["get"], url_path="my")
     def my_complaints(self, request):
-        u = request.user
-        if not u.is_authenticated:
+        scope = get_access_scope(request)
+        if not scope.is_authenticated and scope.app_user is None:
             return Response({"detail": "Authentication required."}, status=401)
 
-        if u.is_staff:
-            qs = self.get_queryset()
-        else:
-            # ✅ Also check request.app_user first
-            app_user = getattr(request, "app_user", None) or self._current_app_user()
-            if not app_user:
-                return Response([], status=200)
-            patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                                               .values_list("patient_id", flat=True)
-            qs = self.get_queryset().filter(patient_id__in=patient_ids)
+        if not scope.is_staff and not scope.app_user:
+            return Response([], status=200)
 
+        # get_queryset already applies the same scope
+        qs = self.get_queryset()
         return Response(self.get_serializer(qs, many=True).data)
 
     
 class NotificationViewSet(viewsets.ModelViewSet):
-    queryset = Notification.objects.all().order_by("-created_at")
+    queryset = Notification.objects.select_related("created_by", "target_user").order_by("-created_at")
     serializer_class = NotificationSerializer
     permission_classes = [StaffWriteOnly]
 
     filterset_fields = ["created_by", "target_user", "channels"]
     ordering_fields = ["created_at", "read_at"]
     ordering = ["-created_at"]
+    keyset_ordering = ("-created_at", "-id")  # ?pagination=keyset
 
     def _current_app_user(self):
-        """Resolve logged-in Django user to AppUser using email → username → phone → user FK."""
-        u = self.request.user
-
-        # Try email
-        if getattr(u, "email", None):
-            au = AppUser.objects.filter(email__iexact=u.email).first()
-            if au: return au
-
-        # Try username
-        if getattr(u, "username", None):
-            au = AppUser.objects.filter(username__iexact=u.username).first()
-            if au: return au
-
-        # Try phone if you store it on Django user (often you don't; skip if not)
-        if hasattr(u, "phone") and u.phone:
-            au = AppUser.objects.filter(phone=u.phone).first()
-            if au: return au
-
-        # Finally, join via FK to auth_user
-        au = AppUser.objects.filter(user_id=u.id).first()
+        """Resolve the caller to an AppUser: JWT request.app_user, else email → username match."""
+        au = getattr(self.request, "app_user", None)
         if au:
             return au
 
-        raise ValidationError({"created_by": "No AppUser linked to the current staff user (email/username/phone/user_id)."})
+        au_id = app_user_id_for(self.request.user)
+        au = AppUser.objects.filter(id=au_id).first() if au_id is not None else None
+        if au:
+            return au
 
-    def _user_has_active_admission(self, app_user):
-        patient_ids = PatientAccess.objects.filter(user_id=app_user.id)\
-                          .values_list("patient_id", flat=True)
-        if not patient_ids:
-            return False
-        return Admission.objects.filter(
-            patient_id__in=patient_ids,
-            status__iexact="Active"
-        ).exists()
+        raise ValidationError({"created_by": "No AppUser linked to the current staff user (email/username)."})
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        user = self.request.user
-
-        if not user.is_authenticated:
-            return Notification.objects.none()
-
-        # Staff see everything
-        if user.is_staff:
-            return qs
-
-        # Resolve to AppUser
-        au = None
-        # Try email/username/phone first:
-        if getattr(user, "email", None):
-            au = AppUser.objects.filter(email__iexact=user.email).first()
-        if not au and getattr(user, "username", None):
-            au = AppUser.objects.filter(username__iexact=user.username).first()
-        if not au:
-            au = AppUser.objects.filter(user_id=user.id).first()
-
-        if not au:
-            # No AppUser mapping → only show directly targeted notifications via auth join
-            return qs.filter(target_user__user_id=user.id)
+        # targeted + broadcast inbox in one statement (see core.inbox)
+        return inbox_queryset(self.request, super().get_queryset())
 
-        # Show targeted + (if has active admission) broadcasts
-        if self._user_has_active_admission(au):
-            return qs.filter(Q(target_user_id=au.id) | Q(target_user__isnull=True))
-        return qs.filter(target_user_id=au.id)
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        return Response({"unread": inbox_unread_count(request)})
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self._current_app_user(), created_at=timezone.now())
+        obj = serializer.save(created_by=self._current_app_user(), created_at=timezone.now())
+        notify_hub.publish_on_commit(obj)
 
     @action(detail=True, methods=["post"], url_path="mark-read",
             permission_classes=[permissions.IsAuthenticated, IsTargetUserOrStaff])
@@ -517,6 +588,114 @@ class NotificationViewSet(viewsets.ModelViewSet):
         obj.save(update_fields=["read_at"])
         return Response(NotificationSerializer(obj).data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="mark-read", url_name="mark-read-bulk",
+            permission_classes=[IsAuthenticatedOrAppUser])
+    def mark_read_bulk(self, request):
+        """
+        POST /api/notifications/mark-read/
+        Body: {"ids": [1, 2, 3]}  or  {"before": "2025-01-31T23:59:59Z"}
+        One UPDATE over the caller's inbox. Non-staff only mark rows targeted
+        at them (broadcast read_at is shared, same rule as /{id}/mark-read/).
+        Staff see every notification, so `before` also needs "target_user":
+        <AppUser id> (one user's rows), never a system-wide sweep.
+        """
+        ids = request.data.get("ids")
+        before = request.data.get("before")
+        if not ids and not before:
+            return Response({"detail": "Pass ids or before."}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = inbox_queryset(request).filter(read_at__isnull=True)
+        user = request.user
+        if getattr(request, "app_user", None) is not None or not (user and user.is_staff):
+            qs = qs.filter(target_user__isnull=False)
+        elif before and not ids:
+            target = request.data.get("target_user")
+            if target is None:
+                return Response({"detail": "Staff must pass ids, or before with target_user."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                qs = qs.filter(target_user_id=int(target))
+            except (TypeError, ValueError):
+                return Response({"detail": "target_user must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if ids:
+            if not isinstance(ids, list):
+                return Response({"detail": "ids must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                qs = qs.filter(id__in=[int(i) for i in ids])
+            except (TypeError, ValueError):
+                return Response({"detail": "ids must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if before:
+            ts = parse_datetime(str(before))
+            if ts is None:
+                return Response({"detail": "before must be an ISO 8601 timestamp."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(ts):
+                ts = timezone.make_aware(ts)
+            qs = qs.filter(created_at__lte=ts)
+
+        updated = qs.update(read_at=timezone.now())
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="fan-out")
+    def fan_out(self, request):
+        """
+        POST /api/notifications/fan-out/   (staff)
+        Body: {"title", "message", "channels"?, and one of
+               "ward": <id> | "department": <id> | "app_users": [ids]}
+        Ward/department targets every active AppUser linked to a patient
+        currently admitted there. Rows are inserted with bulk_create in batches.
+        """
+        title = (request.data.get("title") or "").strip()
+        message = (request.data.get("message") or "").strip()
+        channels = request.data.get("channels") or "in_app"
+        if not title or not message:
+            return Response({"detail": "title and message are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ward = request.data.get("ward")
+        dept = request.data.get("department")
+        app_users = request.data.get("app_users")
+        if sum(x is not None for x in (ward, dept, app_users)) != 1:
+            return Response({"detail": "Pass exactly one of ward, department or app_users."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        targets = AppUser.objects.filter(is_active=True)
+        admitted = {
+            "patient_accesses__patient__admissions__status__iexact": "active",
+            "patient_accesses__patient__admissions__discharge_time__isnull": True,
+        }
+        try:
+            if ward is not None:
+                targets = targets.filter(patient_accesses__patient__admissions__ward_id=int(ward), **admitted)
+            elif dept is not None:
+                targets = targets.filter(patient_accesses__patient__admissions__ward__department_id=int(dept), **admitted)
+            else:
+                if not isinstance(app_users, list):
+                    return Response({"detail": "app_users must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+                targets = targets.filter(id__in=[int(i) for i in app_users])
+        except (TypeError, ValueError):
+            return Response({"detail": "ward, department and app_users must be ids."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        target_ids = list(targets.order_by().values_list("id", flat=True).distinct())
+
+        created_by = self._current_app_user()
+        now = timezone.now()
+        batch_size = getattr(settings, "NOTIFICATION_FANOUT_BATCH_SIZE", 500)
+        with transaction.atomic():
+            rows = Notification.objects.bulk_create(
+                [
+                    Notification(created_by=created_by, target_user_id=au_id, title=title,
+                                 message=message, channels=channels, created_at=now)
+                    for au_id in target_ids
+                ],
+                batch_size=batch_size,
+            )
+            for obj in rows:
+                if obj.id:
+                    notify_hub.publish_on_commit(obj)
+
+        return Response({"created": len(rows)}, status=status.HTTP_201_CREATED)
+
 class MenuItemViewSet(viewsets.ModelViewSet):
     serializer_class = MenuItemSerializer
 
@@ -531,8 +710,26 @@ class MenuItemViewSet(viewsets.ModelViewSet):
 class CanteenOrderViewSet(viewsets.ModelViewSet):
     serializer_class = CanteenOrderSerializer
 
+    def _base_queryset(self):
+        # one query each for items and the active admission of every patient on the page
+        return (
+            CanteenOrder.objects
+            .select_related('patient')
+            .prefetch_related(
+                Prefetch('items', queryset=CanteenOrderItem.objects.select_related('menu_item').order_by('id')),
+                Prefetch(
+                    'patient__admissions',
+                    queryset=Admission.objects.select_related('ward', 'bed')
+                                              .filter(status__iexact='active')
+                                              .order_by('-admit_time'),
+                    to_attr='active_admissions',
+                ),
+            )
+            .order_by('-created_at')
+        )
+
     def get_queryset(self):
-        qs = CanteenOrder.objects.select_related('patient').order_by('-created_at')
+        qs = self._base_queryset()
         user_id = self.request.query_params.get('user')
         patient = self.request.query_params.get('patient')
         status_ = self.request.query_params.get('status')
@@ -574,14 +771,60 @@ class CanteenOrderViewSet(viewsets.ModelViewSet):
         )
 
         # recompute total
-        agg = CanteenOrderItem.objects.filter(order_id=order.id)\
-              .values_list('qty', 'price_cents')
-        total = sum(q * p for q, p in agg)
-        order.total_cents = total
-        order.save(update_fields=['total_cents'])
+        order.recompute_total()
 
+        # re-read so prefetched items include the new line
+        order = self._base_queryset().get(pk=order.pk)
         return Response(CanteenOrderSerializer(order).data, status=status.HTTP_200_OK)
-    
+
+    @action(detail=True, methods=['post'], url_path='add-items')
+    @transaction.atomic
+    def add_items(self, request, pk=None):
+        """
+        POST /api/canteen-orders/{id}/add-items/
+        Body: {"items": [{"menu_item": 3, "qty": 2}, {"menu_item": 5}]}
+        Adds every line in one go (one menu lookup, one INSERT, one total UPDATE).
+        """
+        order = self.get_object()
+        items = request.data.get('items')
+
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "items must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = []
+        for i, it in enumerate(items):
+            mi_id = it.get('menu_item') if isinstance(it, dict) else None
+            if not mi_id:
+                return Response({"detail": f"items[{i}].menu_item is required."}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                mi_id = int(mi_id)
+                qty = int(it.get('qty', 1))
+            except (TypeError, ValueError):
+                return Response({"detail": f"items[{i}] has an invalid menu_item or qty."}, status=status.HTTP_400_BAD_REQUEST)
+            if qty <= 0:
+                return Response({"detail": f"items[{i}].qty must be > 0."}, status=status.HTTP_400_BAD_REQUEST)
+            lines.append((mi_id, qty))
+
+        menu = MenuItem.objects.filter(is_active=True).in_bulk({mi_id for mi_id, _ in lines})
+        missing = sorted({mi_id for mi_id, _ in lines if mi_id not in menu})
+        if missing:
+            return Response({"detail": "Menu item not found or inactive.", "menu_items": missing},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        CanteenOrderItem.objects.bulk_create([
+            CanteenOrderItem(
+                order_id=order.id,
+                menu_item_id=mi_id,
+                qty=qty,
+                price_cents=menu[mi_id].price_cents,
+            )
+            for mi_id, qty in lines
+        ])
+        order.recompute_total()
+
+        order = self._base_queryset().get(pk=order.pk)
+        return Response(CanteenOrderSerializer(order).data, status=status.HTTP_200_OK)
+
 class CanteenOrderItemViewSet(viewsets.ModelViewSet):
     serializer_class = CanteenOrderItemSerializer
 
@@ -597,6 +840,7 @@ class CanteenOrderItemViewSet(viewsets.ModelViewSet):
     
 class PatientRecordViewSet(viewsets.ModelViewSet):
     serializer_class = PatientRecordSerializer
+    replica_read_actions = ('search', 'timeline')  # core.dbrouter
 
     def get_queryset(self):
         qs = PatientRecord.objects.all().order_by('-created_at')
@@ -616,6 +860,85 @@ class PatientRecordViewSet(viewsets.ModelViewSet):
             )
         return qs
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        GET /api/patients/search/?q=<mrn or name>&limit=20
+        Ranked, index-backed search (see core.search); returns at most
+        PATIENT_SEARCH_MAX_RESULTS rows, no pagination count. ?limit is
+        clamped to 1..PATIENT_SEARCH_MAX_RESULTS.
+        """
+        q = (request.query_params.get('q') or '').strip()
+        if not q:
+            return Response({"detail": "Pass ?q=<mrn or name>."}, status=status.HTTP_400_BAD_REQUEST)
+        min_length = getattr(settings, 'PATIENT_SEARCH_MIN_LENGTH', 2)
+        if len(q) < min_length:
+            return Response({"detail": f"q must be at least {min_length} characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        cap = max_search_results()
+        try:
+            limit = int(request.query_params.get('limit') or cap)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, cap))
+        qs = search_patients(q, limit=limit)
+        return Response(PatientRecordSerializer(qs, many=True).data)
+
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticatedOrAppUser])
+    def timeline(self, request, pk=None):
+        """
+        GET /api/patients/<id>/timeline/?types=admission,report&page_size=50&cursor=...
+        Admissions, tasks, reports, orders, bookings and complaints in one
+        newest-first stream (see core.timeline): {"next": <url or null>, "results": [...]}
+        """
+        try:
+            patient_id = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+        scope = get_access_scope(request)
+        if not scope.can_access_patient(patient_id) or (
+            scope.sees_everything and not PatientRecord.objects.filter(pk=patient_id).exists()
+        ):
+            raise Http404
+
+        p = request.query_params
+        kinds = None
+        if p.get('types'):
+            kinds = {t.strip() for t in p['types'].split(',') if t.strip()}
+            unknown = kinds - set(TIMELINE_KINDS)
+            if unknown:
+                return Response(
+                    {"detail": f"Unknown types: {', '.join(sorted(unknown))}. Use {', '.join(TIMELINE_KINDS)}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        try:
+            page_size = max(1, min(int(p.get('page_size') or 50), 200))
+        except ValueError:
+            return Response({"detail": "page_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        cursor = None
+        if p.get('cursor'):
+            try:
+                cursor = decode_timeline_cursor(p['cursor'])
+            except ValueError:
+                return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, has_more = patient_timeline(patient_id, kinds=kinds, cursor=cursor, limit=page_size)
+        next_url = None
+        if has_more and rows:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_timeline_cursor(rows[-1]))
+        results = [
+            {
+                "type": r["kind"],
+                "id": r["row_id"],
+                "at": r["at"],
+                "title": r["title"],
+                "status": r["status"],
+                "admission": r["admission_ref"],
+            }
+            for r in rows
+        ]
+        return Response({"next": next_url, "results": results})
+
     # NEW: set created_at on create
     def perform_create(self, serializer):
         try:
@@ -637,10 +960,6 @@ class PatientAccessViewSet(viewsets.ModelViewSet):
             qs = qs.filter(patient_id=patient)
         return qs
     
-def _generate_otp(n=6) -> str:
-    return f"{random.randint(0, 10**n - 1):0{n}d}"
-
-
 def _mask_destination(dest: str) -> str:
     # basic masking for SMS/email display
     if "@" in dest:
@@ -652,6 +971,16 @@ def _mask_destination(dest: str) -> str:
     return "***"
 
 
+def _otp_error_response(err, detail=None):
+    # core.otp errors -> HTTP; callers may keep their own wording for the detail
+    body = {"detail": detail or str(err)}
+    headers = None
+    if isinstance(err, otp_service.OtpThrottled):
+        body["retry_after"] = err.retry_after
+        headers = {"Retry-After": str(err.retry_after)}
+    return Response(body, status=err.status_code, headers=headers)
+
+
 class OtpSendView(APIView):
     """
     POST /api/otp/send/
@@ -668,20 +997,14 @@ class OtpSendView(APIView):
         if not destination:
             return Response({"detail": "destination is required."}, status=400)
 
-        # 6-digit OTP
-        code = f"{random.randint(0, 999999):06d}"
-        expires_at = timezone.now() + timedelta(minutes=5)
-
-        OtpCode.objects.create(
-            destination=destination,
-            purpose=purpose,
-            code_hash=make_password(code),
-            expires_at=expires_at,
-        )
+        try:
+            code, _ = otp_service.issue(destination, purpose)
+        except otp_service.OtpThrottled as e:
+            return _otp_error_response(e)
 
         resp = {
             "ok": True,
-            "expires_in": 300,
+            "expires_in": int(getattr(settings, "OTP_TTL_SECONDS", 300)),
         }
         if settings.DEBUG:
             resp["debug_code"] = code
@@ -699,27 +1022,12 @@ class OtpVerifyView(APIView):
         purpose = ser.validated_data["purpose"]
         code = ser.validated_data["code"]
 
-        now = timezone.now()
-        # get most recent valid OTP for this destination & purpose
-        otp = (
-            OtpCode.objects
-            .filter(destination=dest, purpose=purpose, expires_at__gte=now)
-            .order_by("-expires_at", "-id")
-            .first()
-        )
-
-        if not otp:
-            return Response({"valid": False, "detail": "OTP expired or not found."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        if not check_password(code, otp.code_hash):
-            return Response({"valid": False, "detail": "Invalid code."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        # Optional: mark as “used” if your table has a used_at column
-        if hasattr(otp, "used_at"):
-            otp.used_at = now
-            otp.save(update_fields=["used_at"])
+        try:
+            otp_service.verify(dest, [purpose], code)
+        except otp_service.OtpError as e:
+            resp = _otp_error_response(e, "Invalid code." if isinstance(e, otp_service.OtpInvalid) else None)
+            resp.data["valid"] = False
+            return resp
 
         return Response({"valid": True, "destination": _mask_destination(dest), "purpose": purpose},
                         status=status.HTTP_200_OK)
@@ -741,19 +1049,10 @@ class AppUserSignupView(APIView):
         if not dest or not code:
             return Response({"detail": "destination and code are required."}, status=400)
 
-        # Reuse your existing OTP verify logic:
-        from django.utils import timezone
-        now = timezone.now()
-        otp = (
-            OtpCode.objects
-            .filter(destination=dest, purpose__in=["signup", "login"], expires_at__gte=now)
-            .order_by("-expires_at", "-id")
-            .first()
-        )
-        if not otp:
-            return Response({"detail": "OTP expired or not found."}, status=400)
-        if not check_password(code, otp.code_hash):
-            return Response({"detail": "Invalid OTP."}, status=400)
+        try:
+            otp_service.verify(dest, ["signup", "login"], code)
+        except otp_service.OtpError as e:
+            return _otp_error_response(e)
 
         # Create or get AppUser
         au, created = AppUser.objects.get_or_create(
@@ -808,26 +1107,11 @@ class AppUserLoginView(APIView):
 
         now = timezone.now()
 
-        # Find the most recent, unconsumed, unexpired OTP for this destination (login/signup)
-        otp = (
-            OtpCode.objects
-            .filter(destination=dest,
-                    purpose__in=["login", "signup"],
-                    expires_at__gte=now)
-            .order_by("-expires_at", "-id")
-            .first()
-        )
-        if not otp:
-            return Response({"detail": "OTP expired or not found."}, status=400)
-
-        # Verify the raw code against the stored hash
-        if not check_password(code, otp.code_hash):
-            return Response({"detail": "Invalid OTP."}, status=400)
-
-        # Mark consumed if your schema supports it
-        if hasattr(otp, "consumed_at") and otp.consumed_at is None:
-            otp.consumed_at = now
-            otp.save(update_fields=["consumed_at"])
+        # newest unconsumed, unexpired login/signup OTP; consumed exactly once
+        try:
+            otp_service.verify(dest, ["login", "signup"], code, consume=True)
+        except otp_service.OtpError as e:
+            return _otp_error_response(e)
 
         # Find or create the AppUser mapped to the destination
         if "@" in dest:
@@ -977,14 +1261,27 @@ class MedicalOrderViewSet(viewsets.ModelViewSet):
             data['status'] = 'ordered'
         serializer.save(created_at=timezone.now(), **data)
 
-def _time_range(start_t: time, end_t: time, step_minutes: int):
-    """Yield times from start_t to end_t (exclusive) every step_minutes."""
-    dt = datetime.combine(datetime.today().date(), start_t)
-    end_dt = datetime.combine(datetime.today().date(), end_t)
-    step = timedelta(minutes=step_minutes)
-    while dt < end_dt:
-        yield dt.time()
-        dt += step
+SLOT_GRID_MAX = 288  # slots per doctor per day (a 5-minute grid over 24h)
+
+
+def _parse_slot_window(params):
+    """
+    Working window from ?start=HH:MM&end=HH:MM&step=<minutes> (defaults 09:00-17:00/30).
+    Raises ValueError for a bad value or a grid over SLOT_GRID_MAX slots.
+    """
+    start_s = params.get("start", "09:00")
+    end_s   = params.get("end",   "17:00")
+    step_s  = params.get("step",  "30")
+
+    start_t = datetime.strptime(start_s, "%H:%M").time()
+    end_t   = datetime.strptime(end_s, "%H:%M").time()
+    step    = int(step_s)
+    if step <= 0:
+        raise ValueError("step must be > 0")
+    minutes = (end_t.hour * 60 + end_t.minute) - (start_t.hour * 60 + start_t.minute)
+    if minutes > step * SLOT_GRID_MAX:
+        raise ValueError(f"more than {SLOT_GRID_MAX} slots")
+    return start_t, end_t, step
 
 class SlotsView(APIView):
     def get(self, request):
@@ -1000,7 +1297,7 @@ class SlotsView(APIView):
         # validate doctor
         try:
             Doctor.objects.only("id").get(id=doctor_id)
-        except Doctor.DoesNotExist:
+        except (Doctor.DoesNotExist, ValueError):
             return Response({"detail": "Doctor not found."}, status=status.HTTP_404_NOT_FOUND)
 
         # parse date
@@ -1011,31 +1308,13 @@ class SlotsView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
 
         # working window
-        start_s = request.query_params.get("start", "09:00")
-        end_s   = request.query_params.get("end",   "17:00")
-        step_s  = request.query_params.get("step",  "30")
-
         try:
-            start_t = datetime.strptime(start_s, "%H:%M").time()
-            end_t   = datetime.strptime(end_s, "%H:%M").time()
-            step    = int(step_s)
-            assert step > 0
-        except Exception:
+            start_t, end_t, step = _parse_slot_window(request.query_params)
+        except ValueError:
             return Response({"detail": "Invalid start/end/step."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # fetch taken slots for that doctor/date where status is not cancelled
-        taken = set(
-            Booking.objects
-                   .filter(doctor_id=doctor_id, slot_date=the_date)
-                   .exclude(status__iexact="cancelled")
-                   .values_list("slot_time", flat=True)
-        )
-        # slot_time is a time field; normalize to "HH:MM"
-        taken_str = {t.strftime("%H:%M") for t in taken}
-
-        # build full range and subtract taken
-        all_slots = [t.strftime("%H:%M") for t in _time_range(start_t, end_t, step)]
-        available = [s for s in all_slots if s not in taken_str]
+        # full range minus non-cancelled bookings (cached, see core.availability)
+        available = free_slots([int(doctor_id)], [the_date], start_t, end_t, step)[int(doctor_id)][the_date]
 
         return Response({
             "doctor": int(doctor_id),
@@ -1045,7 +1324,165 @@ class SlotsView(APIView):
             "step_minutes": step,
             "slots": available
         })
+
+
+class SlotsAvailabilityView(APIView):
+    """
+    GET /api/slots/availability/?from=2025-01-06&to=2025-01-12&doctors=3,5
+    GET /api/slots/availability/?from=2025-01-06&to=2025-01-12&department=2
+    Optional: start=HH:MM, end=HH:MM, step=<minutes> (same as /api/slots/).
+    Free slots per doctor per day for a whole week view in one request.
+    """
+    MAX_DAYS = 31
+    MAX_DOCTORS = 50
+
+    def get(self, request):
+        p = request.query_params
+        from_s = p.get("from")
+        to_s   = p.get("to") or from_s
+        doctors_s = p.get("doctors")
+        dept_id   = p.get("department")
+
+        if not from_s or not (doctors_s or dept_id):
+            return Response(
+                {"detail": "from and doctors or department are required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date_from = datetime.strptime(from_s, "%Y-%m-%d").date()
+            date_to   = datetime.strptime(to_s, "%Y-%m-%d").date()
+        except ValueError:
+            return Response({"detail": "Invalid date format. Use YYYY-MM-DD."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if date_to < date_from:
+            return Response({"detail": "to must not be before from."}, status=status.HTTP_400_BAD_REQUEST)
+        n_days = (date_to - date_from).days + 1
+        if n_days > self.MAX_DAYS:
+            return Response({"detail": f"Date range is limited to {self.MAX_DAYS} days."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start_t, end_t, step = _parse_slot_window(p)
+        except ValueError:
+            return Response({"detail": "Invalid start/end/step."}, status=status.HTTP_400_BAD_REQUEST)
+
+        doctors = Doctor.objects.order_by("full_name")
+        if doctors_s:
+            try:
+                ids = [int(x) for x in doctors_s.split(",") if x.strip()]
+            except ValueError:
+                return Response({"detail": "doctors must be a comma-separated list of ids."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > self.MAX_DOCTORS:
+                return Response({"detail": f"At most {self.MAX_DOCTORS} doctors per request."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            doctors = doctors.filter(id__in=ids)
+        if dept_id:
+            try:
+                doctors = doctors.filter(department_id=int(dept_id))
+            except ValueError:
+                return Response({"detail": "department must be an id."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        doctors = list(doctors.values("id", "full_name")[:self.MAX_DOCTORS + 1])
+        if len(doctors) > self.MAX_DOCTORS:
+            return Response({"detail": f"More than {self.MAX_DOCTORS} doctors match; pass doctors=."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        dates = [date_from + timedelta(days=i) for i in range(n_days)]
+        free = free_slots([d["id"] for d in doctors], dates, start_t, end_t, step) if doctors else {}
+
+        return Response({
+            "from": date_from.strftime("%Y-%m-%d"),
+            "to": date_to.strftime("%Y-%m-%d"),
+            "start": start_t.strftime("%H:%M"),
+            "end": end_t.strftime("%H:%M"),
+            "step_minutes": step,
+            "doctors": [
+                {
+                    "doctor": d["id"],
+                    "full_name": d["full_name"],
+                    "days": {day.strftime("%Y-%m-%d"): free[d["id"]][day] for day in dates},
+                }
+                for d in doctors
+            ],
+        })
     
+def _store_upload(upfile, dest_dir: Path, ext: str):
+    """
+    Stream an uploaded file into dest_dir in one pass.
+    Writes to a temp file in the same directory, hashing and counting bytes
+    as chunks arrive, then renames into place so readers never see a partial file.
+    Returns (object_key, sha256_hex, size_bytes).
+    """
+    unique_name = f"{uuid.uuid4().hex}{ext}"
+    tmp_path = dest_dir / f".{unique_name}.part"
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, "wb") as fh:
+            for chunk in upfile.chunks():
+                sha.update(chunk)
+                size += len(chunk)
+                fh.write(chunk)
+        os.replace(tmp_path, dest_dir / unique_name)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return unique_name, sha.hexdigest(), size
+
+def _parse_byte_range(header: str, size: int):
+    """
+    Parse a single "bytes=first-last" / "bytes=first-" / "bytes=-suffix" range.
+    Returns (first, last) inclusive, None to ignore the header (serve the whole
+    file, e.g. multi-range or malformed), or "unsatisfiable".
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first_s, sep, last_s = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first_s:
+            suffix = int(last_s)
+            if suffix <= 0 or size == 0:  # nothing to send the tail of
+                return "unsatisfiable"
+            return max(size - suffix, 0), size - 1
+        first = int(first_s)
+        last = int(last_s) if last_s else size - 1
+    except ValueError:
+        return None
+    if first >= size:
+        return "unsatisfiable"
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+def _iter_file_range(path: Path, first: int, length: int, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as fh:
+        fh.seek(first)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _with_download_headers(resp, etag, last_modified):
+    if etag:
+        resp["ETag"] = etag
+    if last_modified:
+        resp["Last-Modified"] = http_date(last_modified)
+    resp["Accept-Ranges"] = "bytes"
+    # reports are per-patient: never cache in shared proxies, always revalidate
+    resp["Cache-Control"] = "private, no-cache"
+    return resp
+
+
 def _safe_path(base: Path, name: str) -> Path:
     p = (base / name).resolve()
     if not str(p).startswith(str(base.resolve())):
@@ -1057,6 +1494,24 @@ def _safe_path(base: Path, name: str) -> Path:
 class WardViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ward.objects.all().order_by('name')
     serializer_class = WardSerializer
+    # no replica_read_actions (core.dbrouter): a lagging replica would refill
+    # the occupancy cache with the board invalidate_occupancy just dropped
+
+    # GET /api/wards/occupancy/?department=<id>&ward=<id>
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='occupancy',
+        permission_classes=[permissions.IsAuthenticated, permissions.IsAdminUser],
+    )
+    def occupancy(self, request):
+        p = request.query_params
+        try:
+            department = int(p['department']) if p.get('department') else None
+            ward = int(p['ward']) if p.get('ward') else None
+        except ValueError:
+            return Response({"detail": "department and ward must be integers."}, status=400)
+        return Response(occupancy_board(department_id=department, ward_id=ward))
 
 
 class BedViewSet(viewsets.ReadOnlyModelViewSet):
@@ -1122,18 +1577,12 @@ class AppUserSignupVerifyView(APIView):
 
         # 1) Find latest valid OTP for this destination (signup OR login)
         now = timezone.now()
-        otp = (
-            OtpCode.objects
-            .filter(destination=dest, purpose__in=["signup", "login"], expires_at__gte=now)
-            .order_by("-expires_at", "-id")
-            .first()
-        )
-        if not otp:
-            return Response({"detail": "OTP not found or expired."}, status=400)
-        if hasattr(otp, "consumed_at") and otp.consumed_at:
-            return Response({"detail": "OTP already used."}, status=400)
-        if not check_password(code, otp.code_hash):
-            return Response({"detail": "Invalid OTP."}, status=400)
+        try:
+            otp = otp_service.verify(dest, ["signup", "login"], code)
+        except otp_service.OtpNotFound as e:
+            return _otp_error_response(e, "OTP not found or expired.")
+        except otp_service.OtpError as e:
+            return _otp_error_response(e)
 
         # 2) Do not allow duplicate accounts
         email_dest = "@" in dest
@@ -1157,10 +1606,10 @@ class AppUserSignupVerifyView(APIView):
                 )
                 au.save()
 
-                # mark OTP consumed if field exists
-                if hasattr(otp, "consumed_at") and not otp.consumed_at:
-                    otp.consumed_at = now
-                    otp.save(update_fields=["consumed_at"])
+                # mark OTP consumed; a concurrent request may have used it first
+                if not otp_service.consume_code(otp, now):
+                    transaction.set_rollback(True)
+                    return Response({"detail": "OTP already used."}, status=400)
 
         except IntegrityError as e:
             return Response({"detail": f"Database error: {str(e)}"}, status=500)
@@ -1168,3 +1617,173 @@ class AppUserSignupVerifyView(APIView):
         # 4) Issue long-lived token (e.g., 30 days)
         token = create_appuser_jwt(au.id, days_valid=30)
         return Response({"token": token, "app_user": AppUserSerializer(au).data}, status=201)
+
+
+# ---------- notification push channel (ASGI) ----------
+# Plain async Django views (DRF views are sync), served natively by
+# healthvault.asgi. The SSE stream needs ASGI: WSGI consumes an async
+# streaming response completely before sending anything, so under WSGI it
+# answers 400 and clients use the long-poll, which there works but holds a
+# worker thread while it waits.
+
+def _notification_scope(app_user, user):
+    # stand-in "request" for core.inbox.inbox_queryset
+    return SimpleNamespace(app_user=app_user, user=user)
+
+
+async def _stream_caller(request):
+    """Returns (scope, app_user_id) for the caller, or (None, None) if not allowed."""
+    app_user = await aget_app_user_from_token(request)
+    if app_user:
+        return _notification_scope(app_user, None), app_user.id
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None, None
+    if user.is_staff:
+        return _notification_scope(None, user), None
+    au_id = app_user_id_for(user)
+    app_user = await AppUser.objects.filter(id=au_id).afirst() if au_id is not None else None
+    if not app_user:
+        return None, None
+    return _notification_scope(app_user, user), app_user.id
+
+
+def _notifications_after(scope, after_id, limit=50):
+    qs = inbox_queryset(scope, Notification.objects.select_related("created_by", "target_user"))
+    rows = list(qs.filter(id__gt=after_id).order_by("id")[:limit])
+    return NotificationSerializer(rows, many=True).data
+
+
+def _latest_notification_id(scope):
+    return inbox_queryset(scope).order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def _after_id(request):
+    raw = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    try:
+        return int(raw) if raw not in (None, "") else None
+    except ValueError:
+        return None
+
+
+async def notification_stream(request):
+    """
+    GET /api/notifications/stream/   (Server-Sent Events)
+    Pushes `event: notification` for each new inbox row. Resume with
+    Last-Event-ID or ?after=<id>; the stream closes after
+    NOTIFICATIONS_STREAM_MAX_SECONDS and clients just reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "The event stream needs an ASGI server; "
+                                       "use /api/notifications/poll/."}, status=400)
+    scope, au_id = await _stream_caller(request)
+    if scope is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    after = _after_id(request)
+    if after is None:
+        after = await sync_to_async(_latest_notification_id)(scope)
+
+    poll_every = getattr(settings, "NOTIFICATIONS_STREAM_POLL_SECONDS", 15)
+    max_seconds = getattr(settings, "NOTIFICATIONS_STREAM_MAX_SECONDS", 300)
+
+    async def events():
+        nonlocal after
+        sub = notify_hub.subscribe(au_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        try:
+            yield "retry: 3000\n\n"
+            while loop.time() < deadline:
+                try:
+                    await asyncio.wait_for(sub.queue.get(), timeout=poll_every)
+                except asyncio.TimeoutError:
+                    pass  # catch-up poll for rows created by other processes
+                rows = await sync_to_async(_notifications_after)(scope, after)
+                for row in rows:
+                    after = row["id"]
+                    yield f"id: {row['id']}\nevent: notification\ndata: {json.dumps(row, default=str)}\n\n"
+                if not rows:
+                    yield ": ping\n\n"
+        finally:
+            notify_hub.unsubscribe(sub)
+
+    resp = StreamingHttpResponse(events(), content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"  # nginx: don't buffer the stream
+    return resp
+
+
+async def notification_poll(request):
+    """
+    GET /api/notifications/poll/?after=<id>&timeout=25   (long-poll)
+    Returns new inbox rows immediately, or waits up to `timeout` seconds
+    (max 30) for one. Response: {"results": [...], "last_id": <id>}.
+    """
+    scope, au_id = await _stream_caller(request)
+    if scope is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    after = _after_id(request)
+    if after is None:
+        after = await sync_to_async(_latest_notification_id)(scope)
+    try:
+        timeout = min(max(float(request.GET.get("timeout", 25)), 0), 30)
+    except ValueError:
+        timeout = 25
+
+    # subscribe before the first read so nothing slips in between
+    sub = notify_hub.subscribe(au_id)
+    try:
+        rows = await sync_to_async(_notifications_after)(scope, after)
+        if not rows and timeout:
+            try:
+                await asyncio.wait_for(sub.queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            rows = await sync_to_async(_notifications_after)(scope, after)
+    finally:
+        notify_hub.unsubscribe(sub)
+
+    last_id = rows[-1]["id"] if rows else after
+    return JsonResponse({"results": rows, "last_id": last_id}, json_dumps_params={"default": str})
+
+
+# ---------- request metrics (core.metrics) ----------
+class MetricsView(APIView):
+    """
+    GET /api/metrics/  -> per-route latency, query counts and N+1 flags (this worker)
+    DELETE /api/metrics/ -> reset
+    """
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "routes": metrics_registry.snapshot(),
+            "token_cache": token_cache_stats(),
+            "notification_subscribers": notify_hub.subscriber_count(),
+            "db": connection_stats(),
+        })
+
+    def delete(self, request):
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PrometheusMetricsView(APIView):
+    """GET /api/metrics/prometheus/ -> the same numbers in Prometheus text format."""
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def get(self, request):
+        cache_stats = token_cache_stats()
+        gauges = {
+            "healthvault_notification_subscribers": ("Open notification streams.", notify_hub.subscriber_count()),
+        }
+        for key, value in cache_stats.items():
+            if isinstance(value, (int, float)):
+                gauges[f"healthvault_token_cache_{key}"] = (f"AppUser token cache: {key}.", value)
+        gauges.update(db_prometheus_gauges())
+        return HttpResponse(
+            metrics_registry.prometheus(gauges),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -3,6 +3,16 @@ ASGI config for healthvault project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Long-lived endpoints (/api/notifications/stream/ and /poll/) are async views
+and should be served from here, e.g. `uvicorn healthvault.asgi:application`,
+so a waiting client doesn't hold a worker thread.
+
+Under ASGI the hot read endpoints (slots, admissions/beds/notifications
+lists, app/auth/me) are also served by async views (core.async_views,
+healthvault.urls_asgi); set ASYNC_READ_VIEWS=False to route them to the DRF
+views as under WSGI. The WSGI app (healthvault.wsgi) is unaffected, so both
+can be deployed side by side.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
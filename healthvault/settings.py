@@ -9,6 +9,13 @@ ENV_PATH = BASE_DIR / '.env'
 load_dotenv(dotenv_path=ENV_PATH, override=True)
 
 REPORTS_DIR = (BASE_DIR / "reports")
+# reuse the stored file when the same bytes (sha256 + size) are uploaded again;
+# several reports can then share one object_key, so anything that deletes report
+# files must first check no other report row still references the key
+REPORTS_DEDUPLICATE = os.getenv('REPORTS_DEDUPLICATE', 'False') == 'True'
+# '' = Django streams downloads; 'x-accel' (nginx) or 'x-sendfile' (Apache) offloads them
+REPORTS_SENDFILE_MODE = os.getenv('REPORTS_SENDFILE_MODE', '')
+REPORTS_ACCEL_PREFIX = os.getenv('REPORTS_ACCEL_PREFIX', '/protected-reports/')  # nginx internal location
 SECRET_KEY = os.getenv('SECRET_KEY')
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 import dj_database_url
@@ -30,6 +37,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.QueryMetricsMiddleware',  # per-route latency / query counts, see /api/metrics/
+    'core.async_views.AsgiRoutesMiddleware',  # ASGI only: async read endpoints (healthvault.urls_asgi)
+    'core.dbrouter.ReplicaRoutingMiddleware',  # replica reads + read-your-writes, see DATABASE_REPLICA_URLS
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -42,6 +52,8 @@ MIDDLEWARE = [
 ]
 CORS_ALLOW_ALL_ORIGINS = True
 ROOT_URLCONF = 'healthvault.urls'
+ASGI_URLCONF = 'healthvault.urls_asgi'  # ASGI requests; see core.async_views
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'True') == 'True'  # False: ASGI serves the sync DRF views too
 
 TEMPLATES = [
     {
@@ -60,12 +72,50 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'healthvault.wsgi.application'
 
+# Connections: by default each worker thread keeps one persistent connection
+# (DB_CONN_MAX_AGE seconds), checked before reuse so a Postgres restart or
+# failover doesn't surface as errors. DB_POOL=psycopg switches to Django's
+# in-process psycopg_pool instead: at most DB_POOL_MAX_SIZE connections per
+# process, shared by all threads (psycopg[pool], in requirements.txt).
+# Stats: /api/metrics/ (core.dbpool), benchmark: `manage.py bench_db_pool`,
+# results in benchmarks/db_pool.json.
+DB_POOL = os.getenv('DB_POOL', '')  # '' | 'psycopg'
 DATABASES = {
     'default': dj_database_url.config(
         default=f"postgres://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}",
-        conn_max_age=600,
+        conn_max_age=0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '600')),  # the pool owns connection lifetime
+        conn_health_checks=True,
     )
 }
+if DB_POOL == 'psycopg' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),  # per process; keep workers * max_size under max_connections
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),  # seconds a request waits for a free connection
+        'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),  # close idle connections above min_size after this
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),  # recycle connections (e.g. after failover)
+        'name': 'healthvault',
+    }
+
+# Read replicas (core.dbrouter): comma-separated URLs, e.g. a streaming replica,
+# or a copy of the SQLite file for local testing. Views opt in with
+# replica_read_actions; clients that just wrote read the primary for a while.
+DATABASE_REPLICAS = []
+for _i, _url in enumerate(u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()):
+    _alias = f'replica{_i + 1}'
+    DATABASES[_alias] = dj_database_url.parse(
+        _url,
+        conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+        conn_health_checks=True,
+    )
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    if 'pool' in DATABASES['default'].get('OPTIONS', {}) and DATABASES[_alias]['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES[_alias].setdefault('OPTIONS', {})['pool'] = dict(DATABASES['default']['OPTIONS']['pool'], name=f'healthvault-{_alias}')
+    DATABASE_REPLICAS.append(_alias)
+DATABASE_ROUTERS = ['core.dbrouter.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))  # read-your-writes window after a write
+REPLICA_MAX_LAG_SECONDS = int(os.getenv('REPLICA_MAX_LAG_SECONDS', '10'))  # skip a replica further behind than this
+REPLICA_CHECK_INTERVAL = int(os.getenv('REPLICA_CHECK_INTERVAL', '5'))  # seconds between replica health checks
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,6 +147,9 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# test databases get the unmanaged core tables before migrate (core.testing)
+TEST_RUNNER = 'core.testing.SchemaTestRunner'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'core.auth_appuser.AppUserJWTAuthentication',
@@ -114,6 +167,49 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 25,
 }
 
+# AppUser JWT auth: per-process verified-token cache (core.auth_appuser)
+APPUSER_TOKEN_CACHE_TTL = int(os.getenv('APPUSER_TOKEN_CACHE_TTL', '60'))           # seconds, 0 disables
+APPUSER_TOKEN_CACHE_MAX_SIZE = int(os.getenv('APPUSER_TOKEN_CACHE_MAX_SIZE', '5000'))
+
+PATIENT_SEARCH_MAX_RESULTS = int(os.getenv('PATIENT_SEARCH_MAX_RESULTS', '50'))  # cap for /api/patients/search/
+PATIENT_SEARCH_MIN_LENGTH = int(os.getenv('PATIENT_SEARCH_MIN_LENGTH', '2'))  # shorter ?q= is a 400 (matches a big slice of the table)
+
+# Shared cache for the free-slot and occupancy caches (core.availability,
+# core.occupancy): a booking or admission must invalidate them in every worker,
+# so no per-process LocMemCache. REDIS_URL uses Redis (`pip install redis`);
+# otherwise the database cache table (`manage.py createcachetable`).
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000'))},
+        }
+    }
+SLOTS_CACHE_TTL = int(os.getenv('SLOTS_CACHE_TTL', '30'))  # seconds; free-slot cache (core.availability)
+
+# /api/notifications/stream/ (SSE): re-check the DB this often for rows created by
+# other workers, and close the stream after this long (clients reconnect)
+NOTIFICATIONS_STREAM_POLL_SECONDS = int(os.getenv('NOTIFICATIONS_STREAM_POLL_SECONDS', '15'))
+NOTIFICATIONS_STREAM_MAX_SECONDS = int(os.getenv('NOTIFICATIONS_STREAM_MAX_SECONDS', '300'))
+
+NOTIFICATION_FANOUT_BATCH_SIZE = int(os.getenv('NOTIFICATION_FANOUT_BATCH_SIZE', '500'))  # rows per INSERT
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', '90'))  # read notifications older than this are removed by compact_tables
+
+OCCUPANCY_CACHE_TTL = int(os.getenv('OCCUPANCY_CACHE_TTL', '15'))  # seconds; ward/bed occupancy board (core.occupancy)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'  # core.metrics middleware
+METRICS_NPLUSONE_THRESHOLD = int(os.getenv('METRICS_NPLUSONE_THRESHOLD', '5'))  # same SQL this many times in one request -> N+1 flag
+
+# One-time codes (core.otp)
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '300'))
+OTP_SEND_LIMIT = int(os.getenv('OTP_SEND_LIMIT', '5'))  # codes sent per destination per window
+OTP_SEND_WINDOW = int(os.getenv('OTP_SEND_WINDOW', '900'))  # seconds; sliding window for send/verify limits
+OTP_VERIFY_LIMIT = int(os.getenv('OTP_VERIFY_LIMIT', '10'))  # verify calls per destination per window
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', '5'))  # checks of one code (right or wrong) before it is burned
+
 CSRF_TRUSTED_ORIGINS = ['http://127.0.0.1:5173', 'http://localhost:5173', 'http://10.101.58.209:8000']
 SESSION_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SAMESITE = 'Lax'
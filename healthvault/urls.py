@@ -1,5 +1,5 @@
 
-from core.views import SlotsView
+from core.views import SlotsView, SlotsAvailabilityView, notification_stream, notification_poll, MetricsView, PrometheusMetricsView
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -27,7 +27,12 @@ router.register(r'beds', BedViewSet, basename='bed')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # before the router so "stream"/"poll" aren't taken as notification ids
+    path('api/notifications/stream/', notification_stream, name='notification-stream'),
+    path('api/notifications/poll/', notification_poll, name='notification-poll'),
     path('api/', include(router.urls)),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
+    path('api/metrics/prometheus/', PrometheusMetricsView.as_view(), name='metrics-prometheus'),
     path('api/otp/send/', OtpSendView.as_view(), name='otp-send'),
     path('api/otp/verify/', OtpVerifyView.as_view(), name='otp-verify'),
     path('api/auth/signup/', SignupView.as_view(), name='auth-signup'),
@@ -35,6 +40,7 @@ urlpatterns = [
     path('api/auth/logout/', LogoutView.as_view(), name='auth-logout'),
     path('api/auth/me/',     MeView.as_view(),     name='auth-me'),
     path('api/slots/', SlotsView.as_view(), name='slots'),
+    path('api/slots/availability/', SlotsAvailabilityView.as_view(), name='slots-availability'),
     path('api/app/auth/signup/', AppUserSignupView.as_view(), name='appuser-signup'),
     path('api/app/auth/login/',  AppUserLoginView.as_view(),  name='appuser-login'),
     path('api/app/auth/me/',     AppUserMeView.as_view(),     name='appuser-me'),
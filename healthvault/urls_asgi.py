@@ -0,0 +1,18 @@
+"""
+URLconf for ASGI requests (settings.ASGI_URLCONF, set by
+core.async_views.AsgiRoutesMiddleware): async versions of the hot read
+endpoints first, then everything from healthvault.urls. Names match the
+sync routes so reverse() gives the same URLs under both.
+"""
+from django.urls import path
+
+from core import async_views
+from healthvault.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/slots/', async_views.SlotsView.as_view(), name='slots'),
+    path('api/admissions/', async_views.AdmissionListView.as_view(), name='admission-list'),
+    path('api/notifications/', async_views.NotificationListView.as_view(), name='notification-list'),
+    path('api/beds/', async_views.BedListView.as_view(), name='bed-list'),
+    path('api/app/auth/me/', async_views.AppUserMeView.as_view(), name='appuser-me'),
+] + sync_urlpatterns